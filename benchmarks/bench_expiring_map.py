@@ -0,0 +1,147 @@
+"""Benchmark the memory of per-user and per-channel AI state over a simulated month.
+
+Replays 30 days of AI prompts from a growing set of users and channels, once into the old
+plain dicts (cooldowns and deque(maxlen=20) per channel) and once into ExpiringMap and
+ConversationMemory, and reports entries and traced memory at the end of each week.
+
+Run from the repo root:
+    python benchmarks/bench_expiring_map.py
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python"))
+
+from utils.expiring_map import ExpiringMap  # noqa: E402
+from utils.misc.ai_context import IDLE_TIMEOUT, MAX_CHANNELS, ConversationMemory  # noqa: E402
+
+DAYS: int = 30
+PROMPTS_PER_DAY: int = 3_000
+NEW_USERS_PER_DAY: int = 400
+NEW_CHANNELS_PER_DAY: int = 40  # Threads and new servers.
+COOLDOWN: float = 5.0
+DAY: float = 86_400.0
+
+Event = tuple[float, int, int, str, str]  # time, user, channel, prompt, reply
+
+
+def traffic(rng: random.Random) -> list[Event]:
+    """Generate a month of prompts, most from recently seen users and channels.
+
+    Args:
+        rng (random.Random): Seeded generator.
+
+    Returns:
+        list[Event]: Prompts in time order.
+    """
+    events: list[Event] = []
+    users: list[int] = []
+    channels: list[int] = []
+    for day in range(DAYS):
+        users.extend(rng.getrandbits(62) for _ in range(NEW_USERS_PER_DAY))
+        channels.extend(rng.getrandbits(62) for _ in range(NEW_CHANNELS_PER_DAY))
+        for at in sorted(rng.uniform(0, DAY) for _ in range(PROMPTS_PER_DAY)):
+            # Skewed towards the newest users and channels, like real activity.
+            user: int = users[-1 - int(rng.expovariate(1 / 300)) % len(users)]
+            channel: int = channels[-1 - int(rng.expovariate(1 / 30)) % len(channels)]
+            prompt: str = "p" * rng.randint(10, 300)
+            reply: str = "r" * rng.randint(100, 1500)
+            events.append((day * DAY + at, user, channel, prompt, reply))
+    return events
+
+
+def replay_old(events: list[Event], report: Callable[[int, int, int], None]) -> None:
+    """Replay into the old unbounded dicts.
+
+    Args:
+        events (list[Event]): From traffic().
+        report (Callable[[int, int, int], None]): Called weekly with day, cooldowns and
+            channels.
+    """
+    cooldowns: dict[int, float] = {}
+    cache: dict[int, deque] = {}
+    next_report: float = 7 * DAY
+    for at, user, channel, prompt, reply in events:
+        if at >= next_report:
+            report(int(next_report // DAY), len(cooldowns), len(cache))
+            next_report += 7 * DAY
+        if at - cooldowns.get(user, 0) < COOLDOWN:
+            continue
+        cooldowns[user] = at
+        history: deque = cache.setdefault(channel, deque(maxlen=20))
+        history.append({"role": "user", "content": prompt})
+        history.append({"role": "assistant", "content": reply})
+    report(DAYS, len(cooldowns), len(cache))
+
+
+def replay_new(events: list[Event], report: Callable[[int, int, int], None]) -> None:
+    """Replay into ExpiringMap cooldowns and ConversationMemory.
+
+    Args:
+        events (list[Event]): From traffic().
+        report (Callable[[int, int, int], None]): Called weekly with day, cooldowns and
+            channels.
+    """
+    now: list[float] = [0.0]
+    cooldowns: ExpiringMap[int, float] = ExpiringMap(COOLDOWN, clock=lambda: now[0])
+    memory: ConversationMemory = ConversationMemory()
+    memory.channels = ExpiringMap(IDLE_TIMEOUT, max_size=MAX_CHANNELS, clock=lambda: now[0])
+    next_report: float = 7 * DAY
+    for at, user, channel, prompt, reply in events:
+        now[0] = at
+        if at >= next_report:
+            report(int(next_report // DAY), len(cooldowns), len(memory))
+            next_report += 7 * DAY
+        if at - (cooldowns.get(user) or 0.0) < COOLDOWN:
+            continue
+        cooldowns.set(user, at)
+        memory.get(channel).add_turn(prompt, reply)
+    report(DAYS, len(cooldowns), len(memory))
+    print(f"  cooldowns: {cooldowns.summary()}")
+    print(f"  channels:  {memory.channels.summary()}")
+
+
+def measure(
+    name: str,
+    replay: Callable[[list[Event], Callable], None],
+    events: list[Event],
+) -> None:
+    """Replay traffic and print entries and live memory weekly.
+
+    Args:
+        name (str): Label.
+        replay (Callable[[list[Event], Callable], None]): replay_old or replay_new.
+        events (list[Event]): From traffic().
+    """
+    print(name)
+
+    def report(day: int, cooldowns: int, channels: int) -> None:
+        used: int = tracemalloc.get_traced_memory()[0]
+        print(
+            f"  day {day:>2}: {cooldowns:>7,} cooldowns {channels:>6,} channels "
+            f"{used / 1024 / 1024:>8.2f} MB",
+        )
+
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    replay(events, report)
+    print(f"  {len(events):,} prompts in {time.perf_counter() - start:.2f}s")
+    tracemalloc.stop()
+
+
+def run() -> None:
+    """Compare both designs on the same month of traffic."""
+    events: list[Event] = traffic(random.Random(0))
+    # Only count the state itself, not the pregenerated traffic.
+    measure("old dicts", replay_old, events)
+    measure("ExpiringMap + ConversationMemory", replay_new, events)
+
+
+if __name__ == "__main__":
+    run()
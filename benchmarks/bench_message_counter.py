@@ -0,0 +1,108 @@
+"""Benchmark per-message overhead of on_message, with and without MessageCounter.
+
+Run from the repo root:
+    python benchmarks/bench_message_counter.py
+"""
+
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python"))
+
+import user as user_module  # noqa: E402
+from user import User, UserCache  # noqa: E402
+from utils.misc.message_counter import FLUSH_INTERVAL, MessageCounter  # noqa: E402
+
+RATES_PER_MINUTE: tuple[int, ...] = (1_000, 10_000, 100_000)
+ACTIVE_USERS: int = 2_000
+
+
+def setup_db(db_path: Path) -> None:
+    """Create a users table with ACTIVE_USERS users and point user.py at it.
+
+    Args:
+        db_path (Path): Path to the temporary users.db.
+    """
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                money INTEGER DEFAULT 0,
+                prestige INTEGER DEFAULT 0,
+                level INTEGER DEFAULT 0,
+                message_count INTEGER DEFAULT 0,
+                last_seen INTEGER DEFAULT 0
+            )
+            """,
+        )
+        conn.executemany(
+            "INSERT INTO users (id, name, message_count, level) VALUES (?, ?, ?, ?)",
+            [(i, f"user{i}", 5_000, 40) for i in range(ACTIVE_USERS)],
+        )
+    user_module.DB_PATH = db_path
+
+
+def direct(message_authors: list[int]) -> None:
+    """The old on_message path: materialize and update a User per message.
+
+    Args:
+        message_authors (list[int]): Author ID of each message.
+    """
+    for user_id in message_authors:
+        user: User = User.create_if_not_exists(user_id=user_id, username="")
+        user.message_count += 1
+        user.touch()
+        user.level_up_if_able()
+
+
+def buffered(message_authors: list[int], flush_every: int) -> None:
+    """The buffered on_message path, flushing as often as the bot would.
+
+    Args:
+        message_authors (list[int]): Author ID of each message.
+        flush_every (int): Messages between flushes.
+    """
+    counter: MessageCounter = MessageCounter()
+    for i, user_id in enumerate(message_authors, 1):
+        if counter.add(user_id):
+            counter.settle(User.create_if_not_exists(user_id=user_id, username=""))
+        if i % flush_every == 0:
+            counter.flush()
+    counter.flush()
+
+
+def run() -> None:
+    """Simulate one minute of traffic at each rate and print per-message cost."""
+    rng: random.Random = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_db(Path(tmp) / "users.db")
+        print(f"{'msgs/min':>10} {'direct us/msg':>15} {'buffered us/msg':>17} {'speedup':>9}")
+        for rate in RATES_PER_MINUTE:
+            # A few heavy chatters and a long tail, like a real server.
+            authors: list[int] = [
+                min(int(rng.paretovariate(1.2)) - 1, ACTIVE_USERS - 1) for _ in range(rate)
+            ]
+            flush_every: int = max(1, rate * FLUSH_INTERVAL // 60)
+
+            results: list[float] = []
+            for fn, args in ((direct, (authors,)), (buffered, (authors, flush_every))):
+                user_module.USER_CACHE = UserCache(max_users=ACTIVE_USERS)
+                direct(list(range(ACTIVE_USERS)))  # Warm the cache so both start equal.
+                start: float = time.perf_counter()
+                fn(*args)
+                results.append((time.perf_counter() - start) / rate * 1e6)
+
+            print(
+                f"{rate:>10,} {results[0]:>15.2f} {results[1]:>17.2f} "
+                f"{results[0] / results[1]:>8.1f}x",
+            )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,156 @@
+"""Benchmark the net worth leaderboard and rank at 1k, 10k and 100k users.
+
+Compares the old per-user get_user_stocks loop, the single query joining holdings to prices,
+and the indexed users.stock_value column now read by utils/misc/leaderboard.py, on databases
+where users hold anywhere from no stocks to every stock.
+
+Run from the repo root:
+    python benchmarks/bench_networth.py
+"""
+
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python"))
+
+from utils.misc.leaderboard import get_networth_leaderboard, get_networth_rank  # noqa: E402
+from utils.money.stocks import (  # noqa: E402
+    DEFAULT_PRICES,
+    ensure_stocks_tables,
+    get_user_stocks,
+    repair_stock_values,
+)
+
+USER_COUNTS: tuple[int, ...] = (1_000, 10_000, 100_000)
+
+
+def build_db(db_path: Path, users: int, rng: random.Random) -> None:
+    """Create users.db with users holding a varied number of stocks.
+
+    Args:
+        db_path (Path): Path to the new database.
+        users (int): Users to create.
+        rng (random.Random): Seeded generator.
+    """
+    ensure_stocks_tables(db_path)
+    stocks: list[str] = list(DEFAULT_PRICES)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO users (id, name, money) VALUES (?, ?, ?)",
+            ((i, f"user{i}", rng.randint(0, 1_000_000_00)) for i in range(users)),
+        )
+        holdings: list[tuple[int, str, int]] = []
+        for user_id in range(users):
+            # About a third hold nothing, the rest between one and every stock.
+            held: int = max(0, rng.randint(-len(stocks) // 2, len(stocks)))
+            holdings.extend(
+                (user_id, name, rng.randint(1, 500)) for name in rng.sample(stocks, held)
+            )
+        conn.executemany("INSERT INTO user_stocks VALUES (?, ?, ?)", holdings)
+    repair_stock_values(db_path)
+
+
+def old_leaderboard(db_path: Path, limit: int = 10) -> list[tuple[str, int]]:
+    """The old get_networth_leaderboard: every user, then one holdings query each.
+
+    Args:
+        db_path (Path): Path to users.db.
+        limit (int): Results to return.
+
+    Returns:
+        list[tuple[str, int]]: (username, networth).
+    """
+    with sqlite3.connect(db_path) as conn:
+        rows: list[tuple] = conn.execute("SELECT id, name, money FROM users").fetchall()
+    results: list[tuple[str, int]] = [
+        (name, money + sum(value for _, _, value in get_user_stocks(db_path, uid)))
+        for uid, name, money in rows
+    ]
+    results.sort(key=lambda x: x[1], reverse=True)
+    return results[:limit]
+
+
+def join_leaderboard(db_path: Path, limit: int = 10) -> list[tuple[str, int]]:
+    """The previous get_networth_leaderboard: holdings summed per user and joined every time.
+
+    Args:
+        db_path (Path): Path to users.db.
+        limit (int): Results to return.
+
+    Returns:
+        list[tuple[str, int]]: (username, networth).
+    """
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            """
+            SELECT u.name, u.money + IFNULL(h.value, 0) AS networth
+            FROM users u
+            LEFT JOIN (
+                SELECT us.user_id, SUM(us.quantity * sp.price) AS value
+                FROM user_stocks us
+                JOIN stock_prices sp ON us.stock_name = sp.name
+                WHERE us.quantity > 0
+                GROUP BY us.user_id
+            ) h ON h.user_id = u.id
+            ORDER BY networth DESC, u.id LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+
+
+def timed(fn: Callable[[], object], repeat: int) -> float:
+    """Time the best of a few calls.
+
+    Args:
+        fn (Callable[[], object]): Call to time.
+        repeat (int): Calls to make.
+
+    Returns:
+        float: Fastest call in milliseconds.
+    """
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run() -> None:
+    """Time the old loop, the join and the stored column at each size."""
+    rng: random.Random = random.Random(0)
+    print(
+        f"{'users':>8} {'holdings':>9} {'loop top 10':>12} {'join top 10':>12} "
+        f"{'new top 10':>12} {'new rank':>10}",
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for users in USER_COUNTS:
+            db_path: Path = Path(tmp) / f"users_{users}.db"
+            build_db(db_path, users, rng)
+            with sqlite3.connect(db_path) as conn:
+                holdings: int = conn.execute("SELECT COUNT(*) FROM user_stocks").fetchone()[0]
+
+            expected: list[int] = [worth for _, worth in old_leaderboard(db_path)]
+            assert [worth for _, worth in get_networth_leaderboard(db_path)] == expected
+            assert [worth for _, worth in join_leaderboard(db_path)] == expected
+
+            old_ms: float = timed(lambda: old_leaderboard(db_path), 1)  # noqa: B023
+            join_ms: float = timed(lambda: join_leaderboard(db_path), 3)  # noqa: B023
+            new_ms: float = timed(lambda: get_networth_leaderboard(db_path), 3)  # noqa: B023
+            rank_ms: float = timed(
+                lambda: get_networth_rank(db_path, users // 2),  # noqa: B023
+                3,
+            )
+            print(
+                f"{users:>8,} {holdings:>9,} {old_ms:>10.1f}ms {join_ms:>10.1f}ms "
+                f"{new_ms:>10.1f}ms {rank_ms:>8.1f}ms",
+            )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,158 @@
+"""Benchmark the database reads behind $profile, and batch ranks, on a 50k-user users.db.
+
+$profile awaits get_net_worth_async and get_all_ranks_async. This times that pair with
+get_all_ranks as four separate rank queries (before), as one combined statement, and as it
+runs in the bot, with RANKINGS loaded. It also times get_ranks_for_users against calling
+get_all_ranks once per user.
+
+Run from the repo root:
+    python benchmarks/bench_profile.py
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python"))
+
+import user  # noqa: E402
+from utils.misc import leaderboard  # noqa: E402
+from utils.misc.leaderboard import (  # noqa: E402
+    get_all_ranks,
+    get_all_ranks_async,
+    get_balance_rank,
+    get_level_rank,
+    get_networth_rank,
+    get_prestige_rank,
+    get_ranks_for_users,
+)
+from utils.money.stocks import (  # noqa: E402
+    DEFAULT_PRICES,
+    ensure_stocks_tables,
+    get_net_worth_async,
+    repair_stock_values,
+)
+from utils.rank_index import Rankings  # noqa: E402
+
+USERS: int = 50_000
+PROFILES: int = 300
+BATCH_SIZES: tuple[int, ...] = (10, 100, 1_000, USERS)
+
+
+def build_db(db_path: Path, rng: random.Random) -> None:
+    """Create users.db with USERS users, most holding a few stocks.
+
+    Args:
+        db_path (Path): Path to the new database.
+        rng (random.Random): Seeded generator.
+    """
+    ensure_stocks_tables(db_path)
+    stocks: list[str] = list(DEFAULT_PRICES)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO users (id, name, money, prestige, level) VALUES (?, ?, ?, ?, ?)",
+            (
+                (i, f"user{i}", rng.randint(0, 1_000_000_00), rng.randint(0, 5), rng.randint(0, 80))
+                for i in range(USERS)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO user_stocks VALUES (?, ?, ?)",
+            (
+                (user_id, name, rng.randint(1, 500))
+                for user_id in range(USERS)
+                for name in rng.sample(stocks, rng.randint(0, 4))
+            ),
+        )
+    repair_stock_values(db_path)
+
+
+def four_queries(db_path: Path, user_id: int) -> dict[str, int | None]:
+    """The previous get_all_ranks: one rank function per category.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+
+    Returns:
+        dict[str, int | None]: Ranks keyed by category name.
+    """
+    return {
+        "balance": get_balance_rank(db_path, user_id),
+        "networth": get_networth_rank(db_path, user_id),
+        "prestige": get_prestige_rank(db_path, user_id),
+        "level": get_level_rank(db_path, user_id),
+    }
+
+
+async def profile_reads(
+    db_path: Path,
+    users: list[user.User],
+    ranks: Callable[[Path, int], Awaitable[dict[str, int | None]]],
+) -> float:
+    """Time the reads of one $profile per user, one after another.
+
+    Args:
+        db_path (Path): Path to users.db.
+        users (list[user.User]): Users whose profiles are shown.
+        ranks (Callable[[Path, int], Awaitable[dict[str, int | None]]]): Rank lookup.
+
+    Returns:
+        float: Average milliseconds per profile.
+    """
+    start: float = time.perf_counter()
+    for profiled in users:
+        await get_net_worth_async(profiled, db_path)
+        await ranks(db_path, profiled.id)
+    return (time.perf_counter() - start) / len(users) * 1000
+
+
+async def run() -> None:
+    """Time every variant on the same database."""
+    rng: random.Random = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path: Path = Path(tmp) / "users.db"
+        build_db(db_path, rng)
+        with sqlite3.connect(db_path) as conn:
+            rows: list[tuple] = conn.execute(
+                f"SELECT {user.SELECT_USER_COLUMNS} FROM users",  # noqa: S608
+            ).fetchall()
+        users: list[user.User] = [user.User(*row) for row in rng.sample(rows, PROFILES)]
+
+        async def before(db_path: Path, user_id: int) -> dict[str, int | None]:
+            return await asyncio.to_thread(four_queries, db_path, user_id)
+
+        print(f"$profile reads, {USERS:,} users, average of {PROFILES} profiles")
+        print(f"  four rank queries:    {await profile_reads(db_path, users, before):6.2f} ms")
+        combined: float = await profile_reads(db_path, users, get_all_ranks_async)
+        print(f"  one statement:        {combined:6.2f} ms")
+
+        rankings: Rankings = Rankings(user.RANKED_COLUMNS)
+        rankings.load(db_path)
+        leaderboard.RANKINGS = rankings
+        in_memory: float = await profile_reads(db_path, users, get_all_ranks_async)
+        print(f"  RANKINGS + net worth: {in_memory:6.2f} ms")
+        leaderboard.RANKINGS = Rankings(user.RANKED_COLUMNS)
+
+        print("Ranks for many users")
+        for size in BATCH_SIZES:
+            ids: list[int] = rng.sample(range(USERS), size)
+            start: float = time.perf_counter()
+            batch: dict[int, dict[str, int | None]] = get_ranks_for_users(db_path, ids)
+            batch_ms: float = (time.perf_counter() - start) * 1000
+
+            sample: list[int] = ids[:100]
+            start = time.perf_counter()
+            looped: list[dict[str, int | None]] = [get_all_ranks(db_path, i) for i in sample]
+            loop_ms: float = (time.perf_counter() - start) / len(sample) * size * 1000
+            assert looped == [batch[i] for i in sample]
+            print(f"  {size:>6,} users: batch {batch_ms:8.1f} ms, per user {loop_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
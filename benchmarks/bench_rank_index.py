@@ -0,0 +1,106 @@
+"""Benchmark balance ranks from SQL against the in-memory RankIndex at 1k, 10k and 100k users.
+
+Reports the time to build the indexes, the memory they take, and the per-call cost of a
+rank lookup, a top 10 read and a balance change.
+
+Run from the repo root:
+    python benchmarks/bench_rank_index.py
+"""
+
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python"))
+
+from migrations import USERS_INDEXES, USERS_MIGRATIONS, migrate  # noqa: E402
+from utils.misc import leaderboard  # noqa: E402
+from utils.misc.leaderboard import get_balance_leaderboard, get_balance_rank  # noqa: E402
+from utils.rank_index import Rankings  # noqa: E402
+
+USER_COUNTS: tuple[int, ...] = (1_000, 10_000, 100_000)
+CALLS: int = 2_000
+
+
+def build_db(db_path: Path, users: int, rng: random.Random) -> None:
+    """Create users.db with random balances, prestiges and levels.
+
+    Args:
+        db_path (Path): Path to the new database.
+        users (int): Users to create.
+        rng (random.Random): Seeded generator.
+    """
+    migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO users (id, name, money, prestige, level) VALUES (?, ?, ?, ?, ?)",
+            (
+                (i, f"user{i}", rng.randint(0, 1_000_000_00), rng.randint(0, 5), rng.randint(0, 80))
+                for i in range(users)
+            ),
+        )
+
+
+def per_call(fn: Callable[[int], object], calls: int) -> float:
+    """Time calls of fn(i).
+
+    Args:
+        fn (Callable[[int], object]): Call to time, given the call number.
+        calls (int): Calls to make.
+
+    Returns:
+        float: Average call in microseconds.
+    """
+    start: float = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+def run() -> None:
+    """Time SQL and in-memory ranks at each size."""
+    rng: random.Random = random.Random(0)
+    print(
+        f"{'users':>8} {'build':>9} {'memory':>9} {'sql rank':>10} {'mem rank':>10} "
+        f"{'sql top':>10} {'mem top':>10} {'update':>10}",
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for users in USER_COUNTS:
+            db_path: Path = Path(tmp) / f"users_{users}.db"
+            build_db(db_path, users, rng)
+            rankings: Rankings = Rankings(("money", "prestige", "level"))
+
+            ids: list[int] = [rng.randrange(users) for _ in range(CALLS)]
+            sql_rank: float = per_call(lambda i: get_balance_rank(db_path, ids[i]), CALLS)  # noqa: B023
+            sql_top: float = per_call(lambda _: get_balance_leaderboard(db_path), CALLS // 10)  # noqa: B023
+
+            start: float = time.perf_counter()
+            rankings.load(db_path)
+            build_ms: float = (time.perf_counter() - start) * 1000
+            tracemalloc.start()
+            rankings.load(db_path)
+            memory: int = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            # Patched in the way the bot has it after init_db().
+            leaderboard.RANKINGS = rankings
+            mem_rank: float = per_call(lambda i: get_balance_rank(db_path, ids[i]), CALLS)  # noqa: B023
+            mem_top: float = per_call(lambda _: get_balance_leaderboard(db_path), CALLS)  # noqa: B023
+            update: float = per_call(
+                lambda i: rankings.update(ids[i], "money", rng.randint(0, 1_000_000_00)),  # noqa: B023
+                CALLS,
+            )
+            print(
+                f"{users:>8,} {build_ms:>7.1f}ms {memory / 1024 / 1024:>7.1f}MB "
+                f"{sql_rank:>8.1f}us {mem_rank:>8.1f}us {sql_top:>8.1f}us {mem_top:>8.1f}us "
+                f"{update:>8.1f}us",
+            )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,207 @@
+"""Benchmark trigger matching on short and long messages.
+
+Compares the old per-message loop with TriggerMatcher and with the two one-pass designs that
+were considered for it: a single regex alternation (with a lookahead so overlapping triggers
+are all seen) and a pure-Python Aho-Corasick automaton. All four return the same trigger.
+
+Run from the repo root:
+    python benchmarks/bench_triggers.py
+"""
+
+import random
+import re
+import sys
+import timeit
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python"))
+
+from utils.misc.triggers import TRIGGERS_PATH, Trigger, TriggerMatcher  # noqa: E402
+
+MESSAGE_LENGTHS: tuple[int, ...] = (50, 500, 2_000, 4_000)
+WORDS: tuple[str, ...] = ("hello", "there", "what", "is", "up", "bro", "nothing", "much", "lol")
+RUNS: int = 2_000
+
+
+def old_loop(content: str, bot_tag: str, triggers: tuple[Trigger, ...]) -> str | None:
+    """The old _handle_triggers: rebuild the list, then scan it.
+
+    Args:
+        content (str): Lowercased message.
+        bot_tag (str): AI trigger, checked first.
+        triggers (tuple[Trigger, ...]): The other triggers.
+
+    Returns:
+        str | None: Matched trigger.
+    """
+    rebuilt: list[Trigger] = [(bot_tag, ""), *list(triggers)]
+    for trigger, _ in rebuilt:
+        if trigger in content:
+            return trigger
+    return None
+
+
+def new_path(content: str, bot_tag: str, matcher: TriggerMatcher) -> str | None:
+    """The new _handle_triggers: bot tag first, then the compiled triggers.
+
+    Args:
+        content (str): Lowercased message.
+        bot_tag (str): AI trigger, checked first.
+        matcher (TriggerMatcher): The other triggers.
+
+    Returns:
+        str | None: Matched trigger.
+    """
+    if bot_tag in content:
+        return bot_tag
+    trigger: Trigger | None = matcher.match(content)
+    return trigger[0] if trigger else None
+
+
+def build_regex(triggers: tuple[Trigger, ...]) -> tuple[re.Pattern[str], dict[str, int]]:
+    """Compile every trigger into one alternation, tried at each position.
+
+    Args:
+        triggers (tuple[Trigger, ...]): Triggers in priority order.
+
+    Returns:
+        tuple[re.Pattern[str], dict[str, int]]: Pattern and priority of each trigger.
+    """
+    pattern: str = "|".join(re.escape(trigger) for trigger, _ in triggers)
+    return re.compile(f"(?=({pattern}))"), {t: i for i, (t, _) in enumerate(triggers)}
+
+
+def regex_match(content: str, pattern: re.Pattern[str], priority: dict[str, int]) -> str | None:
+    """Find the highest priority trigger with the combined regex.
+
+    Args:
+        content (str): Lowercased message.
+        pattern (re.Pattern[str]): From build_regex().
+        priority (dict[str, int]): From build_regex().
+
+    Returns:
+        str | None: Matched trigger.
+    """
+    best: str | None = None
+    for found in pattern.finditer(content):
+        trigger: str = found.group(1)
+        if best is None or priority[trigger] < priority[best]:
+            best = trigger
+    return best
+
+
+def build_automaton(triggers: tuple[Trigger, ...]) -> tuple[list[dict[str, int]], list[int]]:
+    """Build an Aho-Corasick automaton as a full transition table.
+
+    Args:
+        triggers (tuple[Trigger, ...]): Triggers in priority order.
+
+    Returns:
+        tuple[list[dict[str, int]], list[int]]: Transitions per state and the best priority
+            ending at each state (len(triggers) for none).
+    """
+    none: int = len(triggers)
+    goto: list[dict[str, int]] = [{}]
+    best: list[int] = [none]
+    for priority, (trigger, _) in enumerate(triggers):
+        state: int = 0
+        for char in trigger:
+            if char not in goto[state]:
+                goto.append({})
+                best.append(none)
+                goto[state][char] = len(goto) - 1
+            state = goto[state][char]
+        best[state] = min(best[state], priority)
+
+    fail: list[int] = [0] * len(goto)
+    queue: deque[int] = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        best[state] = min(best[state], best[fail[state]])
+        for char, child in goto[state].items():
+            queue.append(child)
+            fallback: int = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            target: int = goto[fallback].get(char, 0)
+            fail[child] = target if target != child else 0
+
+    # Fill in fallbacks so matching is one dict lookup per character.
+    order: list[int] = [0]
+    for state in order:
+        order.extend(goto[state].values())
+    for state in order[1:]:
+        for char, target in goto[fail[state]].items():
+            goto[state].setdefault(char, target)
+    return goto, best
+
+
+def automaton_match(
+    content: str,
+    automaton: tuple[list[dict[str, int]], list[int]],
+    triggers: tuple[Trigger, ...],
+) -> str | None:
+    """Find the highest priority trigger with the automaton.
+
+    Args:
+        content (str): Lowercased message.
+        automaton (tuple[list[dict[str, int]], list[int]]): From build_automaton().
+        triggers (tuple[Trigger, ...]): Triggers in priority order.
+
+    Returns:
+        str | None: Matched trigger.
+    """
+    goto: list[dict[str, int]]
+    best: list[int]
+    goto, best = automaton
+    root: dict[str, int] = goto[0]
+    found: int = len(triggers)
+    state: int = 0
+    for char in content:
+        state = goto[state].get(char) or root.get(char, 0)
+        if best[state] < found:
+            found = best[state]
+            if not found:
+                break
+    return triggers[found][0] if found < len(triggers) else None
+
+
+def run() -> None:
+    """Time each matcher on messages with no trigger and with one near the end."""
+    rng: random.Random = random.Random(0)
+    bot_tag: str = "dizznem"
+    matcher: TriggerMatcher = TriggerMatcher(TRIGGERS_PATH)
+    triggers: tuple[Trigger, ...] = matcher.triggers
+    with_tag: tuple[Trigger, ...] = ((bot_tag, ""), *triggers)
+    pattern: re.Pattern[str]
+    priority: dict[str, int]
+    pattern, priority = build_regex(with_tag)
+    automaton: tuple[list[dict[str, int]], list[int]] = build_automaton(with_tag)
+
+    print(f"{len(with_tag)} triggers, microseconds per message")
+    print(
+        f"{'length':>7} {'case':>8} {'old loop':>10} {'matcher':>10} {'regex':>10} "
+        f"{'automaton':>10}",
+    )
+    for length in MESSAGE_LENGTHS:
+        filler: str = " ".join(rng.choice(WORDS) for _ in range(length // 3))[:length]
+        for case, content in (("none", filler), ("late", filler[: -len("wallahi")] + "wallahi")):
+            expected: str | None = old_loop(content, bot_tag, triggers)
+            candidates = (
+                lambda: old_loop(content, bot_tag, triggers),  # noqa: B023
+                lambda: new_path(content, bot_tag, matcher),  # noqa: B023
+                lambda: regex_match(content, pattern, priority),  # noqa: B023
+                lambda: automaton_match(content, automaton, with_tag),  # noqa: B023
+            )
+            timings: list[float] = []
+            for candidate in candidates:
+                assert candidate() == expected
+                timings.append(min(timeit.repeat(candidate, number=RUNS, repeat=3)) / RUNS * 1e6)
+            print(
+                f"{length:>7,} {case:>8} " + " ".join(f"{timing:>10.2f}" for timing in timings),
+            )
+
+
+if __name__ == "__main__":
+    run()
@@ -2,8 +2,21 @@
 
 import logging
 import sys
+from collections.abc import Iterator
 from pathlib import Path
 
+import pytest
+
 logging.raiseExceptions = False
 
 sys.path.insert(0, str(Path(__file__).parent / "python"))
+
+
+@pytest.fixture(autouse=True)
+def _close_pooled_connections() -> Iterator[None]:
+    """Stop the async facade and close pooled connections so they don't leak between tests."""
+    yield
+    from database import close_connections, shutdown  # noqa: PLC0415
+
+    shutdown()
+    close_connections()
@@ -0,0 +1,257 @@
+"""Online backups of users.db.
+
+Snapshots are taken with SQLite's backup API while the bot keeps running. Pages are copied a
+few at a time with a short sleep in between. Under WAL the backup only holds a read
+transaction on users.db, so the writer thread never waits on it; the small steps just keep
+each burst of work short.
+
+Each snapshot is written to a temporary file and renamed once complete, so a half-written
+snapshot never shows up next to the finished ones. Only the newest BACKUP_RETENTION
+snapshots are kept.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from log import logger
+
+BACKUP_DIR: Path = Path("data/backups")
+BACKUP_INTERVAL: int = 6 * 60 * 60  # Seconds between scheduled backups.
+BACKUP_RETENTION: int = 8
+PAGES_PER_STEP: int = 256  # 1 MB with the default 4 KB page size.
+STEP_SLEEP: float = 0.005  # Seconds between steps.
+# Writes from other connections restart the copy. After this many restarts, or once stepping
+# has taken STEP_DEADLINE seconds, copy the rest in one step instead of chasing a busy database.
+MAX_RESTARTS: int = 5
+STEP_DEADLINE: float = 60.0
+
+ProgressFn = Callable[["BackupProgress"], None]
+
+_backup_lock: threading.Lock = threading.Lock()
+
+
+class BackupProgress:
+    """Live progress of a running backup."""
+
+    __slots__ = ("copied_pages", "path", "restarts", "started", "total_pages")
+
+    def __init__(self, path: Path) -> None:
+        """Initialize progress for a snapshot.
+
+        Args:
+            path (Path): Final path of the snapshot.
+        """
+        self.path: Path = path
+        self.started: float = time.perf_counter()
+        self.total_pages: int = 0
+        self.copied_pages: int = 0
+        self.restarts: int = 0
+
+    @property
+    def percent(self) -> float:
+        """Share of pages copied so far.
+
+        Returns:
+            float: 0 to 100.
+        """
+        return self.copied_pages / self.total_pages * 100 if self.total_pages else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the backup started.
+
+        Returns:
+            float: Elapsed seconds.
+        """
+        return time.perf_counter() - self.started
+
+
+class _GiveUpStepping(Exception):  # noqa: N818 -- Internal control flow, never escapes.
+    """Raised from the progress callback to abandon stepping."""
+
+
+def snapshot_path(backup_dir: Path, db_path: Path, now: datetime | None = None) -> Path:
+    """Build the timestamped path of a new snapshot.
+
+    Never returns the path of an existing snapshot: on a clash the timestamp is moved forward
+    a microsecond at a time, which keeps names sorting in creation order.
+
+    Args:
+        backup_dir (Path): Directory holding snapshots.
+        db_path (Path): Database being backed up.
+        now (datetime | None): Snapshot time. Defaults to the current UTC time.
+
+    Returns:
+        Path: e.g. ``data/backups/users-20240101-120000-000000.db``.
+    """
+    moment: datetime = now or datetime.now(timezone.utc)
+    while True:
+        stamp: str = moment.strftime("%Y%m%d-%H%M%S-%f")
+        path: Path = backup_dir / f"{db_path.stem}-{stamp}{db_path.suffix}"
+        if not path.exists():
+            return path
+        moment += timedelta(microseconds=1)
+
+
+def list_snapshots(backup_dir: Path, db_path: Path) -> list[Path]:
+    """Find finished snapshots of a database.
+
+    Args:
+        backup_dir (Path): Directory holding snapshots.
+        db_path (Path): Database that was backed up.
+
+    Returns:
+        list[Path]: Snapshot paths, oldest first.
+    """
+    return sorted(backup_dir.glob(f"{db_path.stem}-*{db_path.suffix}"))
+
+
+def prune_snapshots(backup_dir: Path, db_path: Path, retention: int) -> list[Path]:
+    """Delete all but the newest snapshots.
+
+    Args:
+        backup_dir (Path): Directory holding snapshots.
+        db_path (Path): Database that was backed up.
+        retention (int): Number of snapshots to keep.
+
+    Returns:
+        list[Path]: Deleted snapshots.
+    """
+    snapshots: list[Path] = list_snapshots(backup_dir, db_path)
+    expired: list[Path] = snapshots[: max(len(snapshots) - retention, 0)]
+    for path in expired:
+        path.unlink(missing_ok=True)
+    return expired
+
+
+def _copy(
+    source: sqlite3.Connection,
+    target: sqlite3.Connection,
+    progress: BackupProgress,
+    on_progress: ProgressFn | None,
+    pages: int,
+) -> None:
+    """Copy a database, updating progress after every step.
+
+    Args:
+        source (sqlite3.Connection): Connection to the live database.
+        target (sqlite3.Connection): Connection to the snapshot.
+        progress (BackupProgress): Progress to update.
+        on_progress (ProgressFn | None): Called after every step.
+        pages (int): Pages per step, -1 for everything at once.
+
+    Raises:
+        _GiveUpStepping: If the copy restarted more than MAX_RESTARTS times or stepping ran
+            past STEP_DEADLINE.
+    """
+    last_remaining: int | None = None
+
+    def step(_status: int, remaining: int, total: int) -> None:
+        nonlocal last_remaining
+        # Every step copies at least one page, so anything but a shrinking remainder means the
+        # copy started over (or the database grew, which also restarts it).
+        if last_remaining is not None and remaining >= last_remaining:
+            progress.restarts += 1
+        last_remaining = remaining
+        progress.total_pages = total
+        progress.copied_pages = total - remaining
+        if on_progress is not None:
+            on_progress(progress)
+        if pages > 0 and remaining and (
+            progress.restarts > MAX_RESTARTS or progress.elapsed > STEP_DEADLINE
+        ):
+            raise _GiveUpStepping
+
+    source.backup(target, pages=pages, progress=step, sleep=STEP_SLEEP)
+
+
+def backup_database(
+    db_path: Path,
+    backup_dir: Path = BACKUP_DIR,
+    retention: int = BACKUP_RETENTION,
+    on_progress: ProgressFn | None = None,
+) -> BackupProgress:
+    """Take a consistent snapshot of a live database and prune old snapshots.
+
+    Only one backup runs at a time; a second caller waits for the first to finish.
+
+    Args:
+        db_path (Path): Database to back up.
+        backup_dir (Path): Directory holding snapshots. Defaults to BACKUP_DIR.
+        retention (int): Number of snapshots to keep. Defaults to BACKUP_RETENTION.
+        on_progress (ProgressFn | None): Called from the backup thread after every step.
+
+    Returns:
+        BackupProgress: Final progress, with the snapshot path and timings.
+    """
+    with _backup_lock:
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        path: Path = snapshot_path(backup_dir, db_path)
+        partial: Path = path.with_name(f"{path.name}.tmp")
+        progress: BackupProgress = BackupProgress(path)
+
+        source: sqlite3.Connection = sqlite3.connect(db_path, check_same_thread=False)
+        target: sqlite3.Connection = sqlite3.connect(partial, check_same_thread=False)
+        try:
+            try:
+                _copy(source, target, progress, on_progress, PAGES_PER_STEP)
+            except _GiveUpStepping:
+                logger.warning(
+                    f"Backup of {db_path} restarted {progress.restarts} times, "
+                    "copying the rest in one step.",
+                )
+                _copy(source, target, progress, on_progress, -1)
+        except BaseException:
+            target.close()
+            partial.unlink(missing_ok=True)
+            raise
+        finally:
+            source.close()
+        target.close()
+        partial.replace(path)
+
+        expired: list[Path] = prune_snapshots(backup_dir, db_path, retention)
+        logger.info(
+            f"Backed up {db_path} to {path} ({progress.total_pages} pages) in "
+            f"{progress.elapsed * 1000:.0f} ms, pruned {len(expired)} old snapshot(s).",
+        )
+        return progress
+
+
+async def backup_database_async(
+    db_path: Path,
+    backup_dir: Path = BACKUP_DIR,
+    retention: int = BACKUP_RETENTION,
+    on_progress: ProgressFn | None = None,
+) -> BackupProgress:
+    """Awaitable backup_database, run on its own thread.
+
+    Args:
+        db_path (Path): Database to back up.
+        backup_dir (Path): Directory holding snapshots. Defaults to BACKUP_DIR.
+        retention (int): Number of snapshots to keep. Defaults to BACKUP_RETENTION.
+        on_progress (ProgressFn | None): Called from the backup thread after every step.
+
+    Returns:
+        BackupProgress: Final progress, with the snapshot path and timings.
+    """
+    return await asyncio.to_thread(backup_database, db_path, backup_dir, retention, on_progress)
+
+
+async def backup_periodically(db_path: Path) -> None:
+    """Back up a database every BACKUP_INTERVAL seconds.
+
+    Args:
+        db_path (Path): Database to back up.
+    """
+    while True:
+        await asyncio.sleep(BACKUP_INTERVAL)
+        try:
+            await backup_database_async(db_path)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Scheduled backup of {db_path} failed: {e}")
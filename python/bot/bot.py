@@ -3,10 +3,11 @@
 import asyncio
 import os
 import time
-from collections import deque
 from pathlib import Path
 from typing import TYPE_CHECKING, cast
 
+from backup import backup_periodically
+from database import shutdown as shutdown_database
 from discord import (
     Color,
     Embed,
@@ -18,8 +19,15 @@ from discord import (
 )
 from discord.ext import commands
 from log import logger
-from user import User, autosave
-from utils.misc.ai import get_ai_response
+from user import DB_PATH, User, autosave, preload_users
+from utils.expiring_map import ExpiringMap
+from utils.http_client import HttpClient
+from utils.misc.ai import StreamedReply, get_ai_response, is_failure, stream_ai_response
+from utils.misc.ai_cache import AiReplyCache
+from utils.misc.ai_context import ConversationMemory
+from utils.misc.ai_scheduler import AiScheduler, QueueFullError
+from utils.misc.message_counter import MessageCounter, flush_periodically
+from utils.misc.triggers import Trigger, TriggerMatcher
 from utils.numbers import format_duration
 
 if TYPE_CHECKING:
@@ -27,6 +35,8 @@ if TYPE_CHECKING:
 
 AI_COOLDOWN: float = 5.0
 MAX_PROMPT_LENGTH: int = 1000
+DEFAULT_PRELOAD_MAX_BYTES: int = 16 * 1024 * 1024
+
 
 class DizznemBot(commands.Bot):
     """Dizznem Bot class."""
@@ -51,12 +61,26 @@ class DizznemBot(commands.Bot):
             cast("str", os.getenv("ADMIN_ID", "222002830964162561")),
         )
         self.ai_api_key: str = cast("str", os.getenv("AI_API_KEY", ""))
-        self.cache: dict[int, deque] = {}
-        self.ai_cooldowns: dict[int, float] = {}
-        self.ai_semaphore: asyncio.Semaphore = asyncio.Semaphore(3)
+        self.ai_streaming: bool = os.getenv("AI_STREAMING", "").lower() in {"1", "true", "yes"}
+        self.conversations: ConversationMemory = ConversationMemory()
+        self.ai_cooldowns: ExpiringMap[int, float] = ExpiringMap(AI_COOLDOWN)
+        self.ai_scheduler: AiScheduler = AiScheduler()
+        self.ai_replies: AiReplyCache = AiReplyCache()
+        self.http_client: HttpClient = HttpClient()
+        self.message_counter: MessageCounter = MessageCounter()
+        self.triggers: TriggerMatcher = TriggerMatcher()
+        # Empty values (as copied from .env.example) mean "use the default".
+        self.preload_count: int = int(os.getenv("USER_PRELOAD_COUNT") or 0)
+        self.preload_max_bytes: int = int(
+            os.getenv("USER_PRELOAD_MAX_BYTES") or DEFAULT_PRELOAD_MAX_BYTES,
+        )
 
     async def setup_hook(self) -> None:
-        """Load all cogs and start autosave for database."""
+        """Open the HTTP client, warm the user cache, load all cogs and start autosave."""
+        await self.http_client.start()
+        if self.preload_count > 0:
+            await preload_users(self.preload_count, self.preload_max_bytes)
+
         logger.info("Loading cogs...")
         cogs_path: Path = Path(__file__).parent / "cogs"
         for file in cogs_path.rglob("*.py"):
@@ -81,8 +105,17 @@ class DizznemBot(commands.Bot):
         except (commands.ExtensionError, OSError) as e:
             logger.error(f"Failed to sync commands: {e}")
 
+        self.loop.create_task(flush_periodically(self.message_counter))
         self.loop.create_task(autosave())
         logger.info("Autosave task started.")
+        self.loop.create_task(backup_periodically(DB_PATH))
+
+    async def close(self) -> None:
+        """Flush buffered message counts and queued writes, and close the HTTP client."""
+        self.message_counter.flush()
+        await super().close()
+        await self.http_client.close()
+        await asyncio.to_thread(shutdown_database)
 
     async def on_ready(self) -> None:
         """Bot startup."""
@@ -186,80 +219,119 @@ class DizznemBot(commands.Bot):
     async def _handle_triggers(self, message: Message) -> None:
         """Check message content against triggers and respond accordingly.
 
+        The bot tag comes before every other trigger.
+
         Args:
             message (Message): The message to check.
         """
-        triggers: list[tuple[str, str]] = [
-            (self.bot_tag, ""),
-            ("wackdiff", "cuckdiff*"),
-            ("wack", "cuck*"),
-            ("minor", "A MINORRRRRRRRRRRRRRRRRRRRRRRRRRRRRRRRR"),
-            ("spark", "Please spark Dizznem please!!!!!!"),
-            ("dizznem", "dihhnem*"),
-            ("cook", "We need to cook."),
-            ("call", "Better Call Saul!"),
-            # ("gay", "Dizznem Bot is an LGBTQ+ ally!"),  # Vaulted pride month command
-            ("limit", "WE SAIYANS HAVE NO LIMITS!!!"),
-            (
-                "super speed clicker",
-                "https://www.roblox.com/games/139600379808227/Super-Speed-Clicker",
-            ),
-            ("good bot", "Thank you! I try my best!"),
-            ("monster", "Aura Monster."),
-            ("all girls", "All girls are the same bro..."),
-            ("67", "67"),
-            ("six seven", "SIX SEVEN!"),
-            ("wallahi", "Say wallahi bro, say wallahi!"),
-        ]
-
         content: str = message.content.lower()
-        for trigger, response in triggers:
-            if trigger not in content:
-                continue
+        if self.bot_tag in content:
+            await self._handle_ai_prompt(message)
+            return
+
+        trigger: Trigger | None = self.triggers.match(content)
+        if trigger is not None:
+            await message.channel.send(trigger[1])
+
+    async def _handle_ai_prompt(self, message: Message) -> None:
+        """Answer a message that mentions the bot tag with an AI response.
+
+        Args:
+            message (Message): The message mentioning the bot.
+        """
+        now: float = time.monotonic()
+        last: float = self.ai_cooldowns.get(message.author.id) or 0.0
+        if now - last < AI_COOLDOWN:
+            remaining: float = AI_COOLDOWN - (now - last)
+            await message.channel.send(
+                f"Slow down! Try again in **{remaining:.1f}** seconds.",
+            )
+            return
+
+        self.ai_cooldowns.set(message.author.id, now)
+        prompt: str = message.content.replace(self.bot_tag, "").strip()
+
+        if not prompt:
+            await message.channel.send("Ask me something!")
+            return
+        if len(prompt) > MAX_PROMPT_LENGTH:
+            await message.channel.send(
+                f"Your prompt is too long! Keep it under **{MAX_PROMPT_LENGTH}** characters.",
+            )
+            return
 
-            if trigger == self.bot_tag:
-                now: float = time.monotonic()
-                last: float = self.ai_cooldowns.get(message.author.id, 0)
-                if now - last < AI_COOLDOWN:
-                    remaining: float = AI_COOLDOWN - (now - last)
-                    await message.channel.send(
-                        f"Slow down! Try again in **{remaining:.1f}** seconds.",
-                    )
-                    break
-
-                self.ai_cooldowns[message.author.id] = now
-                prompt: str = message.content.replace(self.bot_tag, "").strip()
-
-                if not prompt:
-                    await message.channel.send("Ask me something!")
-                elif len(prompt) > MAX_PROMPT_LENGTH:
-                    await message.channel.send(
-                        f"Your prompt is too long! Keep it under **{MAX_PROMPT_LENGTH}** characters.",  # noqa: E501
-                    )
-                else:
-                    channel_id: int = message.channel.id
-                    if channel_id not in self.cache:
-                        self.cache[channel_id] = deque(
-                            maxlen=20,
-                        )  # 10 messages each from user/bot
-
-                    cache: deque = self.cache[channel_id]
-
-                    async with self.ai_semaphore, message.channel.typing():
-                        ai_response: str = await asyncio.to_thread(
-                            get_ai_response,
-                            prompt,
-                            self.ai_api_key,
-                            list(cache),
-                        )
-
-                    cache.append({"role": "user", "content": prompt})
-                    cache.append({"role": "assistant", "content": ai_response})
-                    await message.channel.send(ai_response)
-            else:
-                await message.channel.send(response)
-
-            break
+        channel_id: int = message.channel.id
+        context: list[dict] = self.conversations.get(channel_id).messages()
+
+        key: str = self.ai_replies.key(prompt, context)
+        ai_response: str | None = await self.ai_replies.get_or_wait(key)
+        fresh: bool = ai_response is None
+        if ai_response is None:
+            try:
+                ai_response = await self._scheduled_ai_reply(message, prompt, context)
+            finally:
+                self.ai_replies.resolve(key, ai_response)
+            if ai_response is None:
+                return
+
+        # Looked up again, the channel may have been forgotten while waiting for the reply.
+        self.conversations.get(channel_id).add_turn(prompt, ai_response)
+        if not (fresh and self.ai_streaming):
+            await message.channel.send(ai_response)
+
+    async def _scheduled_ai_reply(
+        self,
+        message: Message,
+        prompt: str,
+        context: list[dict],
+    ) -> str | None:
+        """Wait for a turn with the AI scheduler and get a reply.
+
+        Args:
+            message (Message): The message mentioning the bot.
+            prompt (str): The prompt, without the bot tag.
+            context (list[dict]): Earlier messages in the channel.
+
+        Returns:
+            str | None: The reply, None if the queue was full (the user is told).
+        """
+        try:
+            async with (
+                self.ai_scheduler.slot(message.channel.id, message.author.id, len(prompt)) as slot,
+                message.channel.typing(),
+            ):
+                ai_response: str = await self._generate_ai_reply(message, prompt, context)
+                if is_failure(ai_response):
+                    slot.failed()
+                return ai_response
+        except QueueFullError:
+            await message.channel.send(
+                "I'm answering a lot of questions right now, try again in a minute!",
+            )
+            return None
+
+    async def _generate_ai_reply(self, message: Message, prompt: str, context: list[dict]) -> str:
+        """Get an AI reply, streaming it into the channel if AI_STREAMING is on.
+
+        Args:
+            message (Message): The message mentioning the bot.
+            prompt (str): The prompt, without the bot tag.
+            context (list[dict]): Earlier messages in the channel.
+
+        Returns:
+            str: The complete reply.
+        """
+        if self.ai_streaming:
+            reply: StreamedReply = StreamedReply(message.channel)
+            async for piece in stream_ai_response(
+                self.http_client,
+                prompt,
+                self.ai_api_key,
+                context,
+            ):
+                await reply.add(piece)
+            return await reply.finish()
+        return await get_ai_response(self.http_client, prompt, self.ai_api_key, context)
 
     async def on_message(self, message: Message) -> None:
         """Handle message events.
@@ -271,12 +343,11 @@ class DizznemBot(commands.Bot):
             return
 
         user_id: int = message.author.id
-        username: str = message.author.name
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
-        user.message_count += 1
-
-        if user.level_up_if_able():
-            await self._handle_level_up(message, user)
+        if self.message_counter.add(user_id):
+            username: str = message.author.name
+            user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+            if self.message_counter.settle(user):
+                await self._handle_level_up(message, user)
 
         await self._handle_triggers(message)
         await self.process_commands(message)
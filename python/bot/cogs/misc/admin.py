@@ -6,12 +6,23 @@ bot is being used.
 
 """
 
+import asyncio
+import sqlite3
+
+from backup import BackupProgress, backup_database_async
 from bot.bot import DizznemBot
-from discord import Color, Embed, Member
+from discord import Color, Embed, Member, Message
 from discord.ext import commands
 from log import logger  # noqa: F401
-from user import User
-from utils.numbers import convert_money_str, format_number
+from user import DB_PATH, User
+from utils.leveling import level_for_messages
+from utils.misc.leaderboard_cache import LEADERBOARD_CACHE
+from utils.money.stocks import find_stock_value_drift_async, repair_stock_values_async
+from utils.money.transactions import adjust_balance, lock_users
+from utils.numbers import convert_money_str, format_money, format_number
+
+BACKUP_PROGRESS_INTERVAL: float = 1.0  # Seconds between progress updates.
+NETWORTH_DRIFT_SHOWN: int = 10  # Drifted users listed by $checknetworth.
 
 
 class Admin(commands.Cog):
@@ -53,7 +64,7 @@ class Admin(commands.Cog):
             return
 
         try:
-            amount_float: float = convert_money_str(money_str=amount)
+            amount_cents: int = convert_money_str(money_str=amount)
         except ValueError:
             await ctx.send(
                 embed=Embed(
@@ -64,16 +75,16 @@ class Admin(commands.Cog):
             )
             return
 
-        user: User = User.create_if_not_exists(user_id=member.id, username=member.name)
-        user.money += amount_float
+        user: User = await User.create_if_not_exists_async(user_id=member.id, username=member.name)
+        await adjust_balance(user, amount_cents)
 
         await ctx.send(
             embed=Embed(
                 title="🏦",
                 color=Color.green(),
                 description=(
-                    f"Added **${format_number(amount_float)}** to **{member.display_name}**'s balance.\n"  # noqa: E501
-                    f"New balance: **${format_number(user.money)}**"
+                    f"Added **${format_money(amount_cents)}** to **{member.display_name}**'s balance.\n"  # noqa: E501
+                    f"New balance: **${format_money(user.money)}**"
                 ),
             ),
         )
@@ -105,7 +116,7 @@ class Admin(commands.Cog):
             return
 
         try:
-            amount_float: float = convert_money_str(money_str=amount)
+            amount_cents: int = convert_money_str(money_str=amount)
         except ValueError:
             await ctx.send(
                 embed=Embed(
@@ -116,10 +127,11 @@ class Admin(commands.Cog):
             )
             return
 
-        user: User = User.create_if_not_exists(user_id=member.id, username=member.name)
-        user.money = amount_float
+        user: User = await User.create_if_not_exists_async(user_id=member.id, username=member.name)
+        async with lock_users(user.id):
+            user.money = amount_cents
 
-        formatted_amount: str = format_number(amount_float)
+        formatted_amount: str = format_money(amount_cents)
 
         embed: Embed = Embed(
             title="🏦",
@@ -129,6 +141,61 @@ class Admin(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    @commands.hybrid_command(
+        name="setmessages",
+        description="Set a user's message count and sync their level (admin command).",
+    )
+    async def set_messages(
+        self,
+        ctx: commands.Context,
+        member: Member,
+        message_count: int,
+    ) -> None:
+        """Set a user's message count, e.g. when importing old data.
+
+        Args:
+            ctx (commands.Context): Context.
+            member (Member): Member to set the message count for.
+            message_count (int): New message count.
+        """
+        if ctx.author.id != self.bot.admin_id:
+            await ctx.send(
+                embed=Embed(
+                    title="Error",
+                    color=Color.red(),
+                    description="You do not have access to this command.",
+                ),
+            )
+            return
+
+        if message_count < 0:
+            await ctx.send(
+                embed=Embed(
+                    title="Error",
+                    color=Color.red(),
+                    description="Message count can't be negative.",
+                ),
+            )
+            return
+
+        user: User = await User.create_if_not_exists_async(user_id=member.id, username=member.name)
+        self.bot.message_counter.apply_pending(user)
+        user.message_count = message_count
+        user.level = level_for_messages(message_count)
+        self.bot.message_counter.settle(user)
+
+        await ctx.send(
+            embed=Embed(
+                title="📈",
+                color=Color.green(),
+                description=(
+                    f"Set **{member.display_name}**'s messages to "
+                    f"**{format_number(message_count)}** "
+                    f"(level **{format_number(user.level)}**)."
+                ),
+            ),
+        )
+
     @commands.hybrid_command(
         name="resetcooldown",
         description="Reset all cooldowns for a given command (admin command).",
@@ -183,6 +250,182 @@ class Admin(commands.Cog):
                 ),
             )
 
+    @commands.hybrid_command(
+        name="backup",
+        description="Back up the users database now (admin command).",
+    )
+    async def backup(self, ctx: commands.Context) -> None:
+        """Take a snapshot of users.db, showing progress while it runs.
+
+        Args:
+            ctx (commands.Context): Context.
+        """
+        if ctx.author.id != self.bot.admin_id:
+            await ctx.send(
+                embed=Embed(
+                    title="Error",
+                    color=Color.red(),
+                    description="You do not have access to this command.",
+                ),
+            )
+            return
+
+        latest: list[BackupProgress] = []
+        task: asyncio.Task[BackupProgress] = asyncio.create_task(
+            backup_database_async(DB_PATH, on_progress=latest.append),
+        )
+        message: Message = await ctx.send(
+            embed=Embed(title="💾 Backing up...", color=Color.blue(), description="Starting."),
+        )
+
+        while not task.done():
+            await asyncio.wait({task}, timeout=BACKUP_PROGRESS_INTERVAL)
+            if latest and not task.done():
+                await message.edit(
+                    embed=Embed(
+                        title="💾 Backing up...",
+                        color=Color.blue(),
+                        description=(
+                            f"**{latest[-1].percent:.0f}%** "
+                            f"({latest[-1].copied_pages}/{latest[-1].total_pages} pages)"
+                        ),
+                    ),
+                )
+            del latest[:-1]
+
+        try:
+            progress: BackupProgress = task.result()
+        except (sqlite3.Error, OSError) as e:
+            await message.edit(
+                embed=Embed(title="Error", color=Color.red(), description=f"Backup failed: {e}"),
+            )
+            return
+
+        await message.edit(
+            embed=Embed(
+                title="💾 Backup Complete",
+                color=Color.green(),
+                description=(
+                    f"Saved **{progress.path.name}** ({progress.total_pages} pages) "
+                    f"in **{progress.elapsed:.2f}s**."
+                ),
+            ),
+        )
+
+    @commands.hybrid_command(
+        name="aistats",
+        description="Show the AI request queue and reply cache (admin command).",
+    )
+    async def ai_stats(self, ctx: commands.Context) -> None:
+        """Show the AI queue, reply cache hit rate and the size of per-channel and per-user state.
+
+        Args:
+            ctx (commands.Context): Context.
+        """
+        if ctx.author.id != self.bot.admin_id:
+            await ctx.send(
+                embed=Embed(
+                    title="Error",
+                    color=Color.red(),
+                    description="You do not have access to this command.",
+                ),
+            )
+            return
+
+        await ctx.send(
+            embed=Embed(
+                title="🤖 AI Requests",
+                color=Color.blue(),
+                description=(
+                    f"**Queue:** {self.bot.ai_scheduler.summary()}\n"
+                    f"**Cache:** {self.bot.ai_replies.summary()}\n"
+                    f"**Conversations:** {self.bot.conversations.channels.summary()}\n"
+                    f"**Cooldowns:** {self.bot.ai_cooldowns.summary()}"
+                ),
+            ),
+        )
+
+    @commands.hybrid_command(
+        name="flushai",
+        description="Forget every cached AI reply (admin command).",
+    )
+    async def flush_ai(self, ctx: commands.Context) -> None:
+        """Drop the AI reply cache, e.g. after changing the system note.
+
+        Args:
+            ctx (commands.Context): Context.
+        """
+        if ctx.author.id != self.bot.admin_id:
+            await ctx.send(
+                embed=Embed(
+                    title="Error",
+                    color=Color.red(),
+                    description="You do not have access to this command.",
+                ),
+            )
+            return
+
+        dropped: int = self.bot.ai_replies.flush()
+        await ctx.send(
+            embed=Embed(
+                title="🤖 AI Cache Flushed",
+                color=Color.green(),
+                description=f"Dropped **{format_number(dropped)}** cached replies.",
+            ),
+        )
+
+    @commands.hybrid_command(
+        name="checknetworth",
+        description="Recompute every stored stock value and fix any drift (admin command).",
+    )
+    async def check_networth(self, ctx: commands.Context) -> None:
+        """Compare users.stock_value against holdings at current prices, and repair mismatches.
+
+        Args:
+            ctx (commands.Context): Context.
+        """
+        if ctx.author.id != self.bot.admin_id:
+            await ctx.send(
+                embed=Embed(
+                    title="Error",
+                    color=Color.red(),
+                    description="You do not have access to this command.",
+                ),
+            )
+            return
+
+        drift: list[tuple[int, int, int]] = await find_stock_value_drift_async(DB_PATH)
+        if not drift:
+            await ctx.send(
+                embed=Embed(
+                    title="📊 Net Worth Consistent",
+                    color=Color.green(),
+                    description="Every stored stock value matches its holdings.",
+                ),
+            )
+            return
+
+        repaired: int = await repair_stock_values_async(DB_PATH)
+        LEADERBOARD_CACHE.invalidate("networth")
+        total: int = sum(abs(actual - stored) for _, stored, actual in drift)
+        lines: list[str] = [
+            f"<@{user_id}>: ${format_money(stored)} → ${format_money(actual)}"
+            for user_id, stored, actual in drift[:NETWORTH_DRIFT_SHOWN]
+        ]
+        if len(drift) > NETWORTH_DRIFT_SHOWN:
+            lines.append(f"...and {format_number(len(drift) - NETWORTH_DRIFT_SHOWN)} more.")
+        await ctx.send(
+            embed=Embed(
+                title="📊 Net Worth Drift Repaired",
+                color=Color.orange(),
+                description=(
+                    f"**{format_number(len(drift))}** users were off by "
+                    f"**${format_money(total)}** in total, "
+                    f"**{format_number(repaired)}** repaired.\n" + "\n".join(lines)
+                ),
+            ),
+        )
+
 
 async def setup(bot: DizznemBot) -> None:
     """Setup for Admin.
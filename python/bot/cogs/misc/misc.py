@@ -8,9 +8,9 @@ from bot.bot import DizznemBot
 from discord import Color, Embed, TextChannel
 from discord.ext import commands, tasks
 from log import logger
-from utils.misc.count import ensure_count_db, increment_count
+from utils.misc.count import ensure_count_db, increment_count_async
 from utils.misc.help import get_help_text
-from utils.misc.inspiration import ensure_inspiration_db, get_random_quote
+from utils.misc.inspiration import ensure_inspiration_db, get_random_quote_async
 
 INSPIRATION_DB_PATH: Path = Path("data/inspiration.db")
 COUNT_DB_PATH: Path = Path("data/count.db")
@@ -45,7 +45,7 @@ class Misc(commands.Cog):
             logger.error("Inspiration channel not found.")
             return
 
-        quote: str | None = get_random_quote(INSPIRATION_DB_PATH)
+        quote: str | None = await get_random_quote_async(INSPIRATION_DB_PATH)
         if quote is None:
             logger.error("No inspirational quotes found in the database.")
             return
@@ -104,7 +104,7 @@ class Misc(commands.Cog):
         Args:
             ctx (commands.Context): Context.
         """
-        quote: str | None = get_random_quote(INSPIRATION_DB_PATH)
+        quote: str | None = await get_random_quote_async(INSPIRATION_DB_PATH)
         if quote is None:
             await ctx.send(
                 "No inspirational quotes found in the database.",
@@ -126,7 +126,7 @@ class Misc(commands.Cog):
         Args:
             ctx (commands.Context): Context.
         """
-        new_count: int = increment_count(COUNT_DB_PATH)
+        new_count: int = await increment_count_async(COUNT_DB_PATH)
         embed: Embed = Embed(
             title="🔢 Count",
             color=Color.og_blurple(),
@@ -5,14 +5,16 @@ from discord import Color, Embed, Member
 from discord.ext import commands
 from log import logger  # noqa: F401
 from user import User
+from utils.leveling import messages_for_level
 from utils.misc.leaderboard import (
     USERS_DB_PATH,
-    build_leaderboard_embed,
-    get_all_ranks,
-    get_level_rank,
+    get_all_ranks_async,
+    get_level_rank_async,
 )
+from utils.misc.leaderboard_cache import LEADERBOARD_CACHE
 from utils.misc.leaderboard_views import LeaderboardView
-from utils.numbers import format_number, get_net_worth
+from utils.money.stocks import get_net_worth_async
+from utils.numbers import format_money, format_number
 
 
 class UserInfo(commands.Cog):
@@ -24,18 +26,7 @@ class UserInfo(commands.Cog):
         Args:
             bot (commands.Bot): Dizznem Bot.
         """
-        self.bot: commands.Bot = bot
-
-    def messages_for_level(self, level: int) -> float:
-        """Total messages required to reach a given level.
-
-        Args:
-            level (int): Level to calculate messages for.
-
-        Returns:
-            float: Total messages required to reach the level.
-        """
-        return 2 * (level**2) + (50 * level) + 100
+        self.bot: DizznemBot = bot
 
     @commands.hybrid_command(
         name="level",
@@ -55,17 +46,18 @@ class UserInfo(commands.Cog):
         avatar_url: str = (
             member.display_avatar.url if member else ctx.author.display_avatar.url
         )
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+        self.bot.message_counter.apply_pending(user)
 
         level: int = user.level
         message_count: int = user.message_count
-        level_rank: int | None = get_level_rank(USERS_DB_PATH, user_id)
+        level_rank: int | None = await get_level_rank_async(USERS_DB_PATH, user_id)
         rank_display: str = f"**#{level_rank}**" if level_rank else "**Unranked**"
 
-        total_for_current: float = self.messages_for_level(level - 1)
-        total_for_next: float = self.messages_for_level(level)
-        messages_into_level: float = message_count - total_for_current
-        messages_needed_this_level: float = total_for_next - total_for_current
+        total_for_current: int = messages_for_level(level - 1)
+        total_for_next: int = messages_for_level(level)
+        messages_into_level: int = message_count - total_for_current
+        messages_needed_this_level: int = total_for_next - total_for_current
 
         progress_percent: float = min(
             messages_into_level / messages_needed_this_level,
@@ -134,15 +126,16 @@ class UserInfo(commands.Cog):
             member.display_avatar.url if member else ctx.author.display_avatar.url
         )
 
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+        self.bot.message_counter.apply_pending(user)
 
         level: int = user.level
         message_count: int = user.message_count
 
-        total_for_current: float = self.messages_for_level(level - 1)
-        total_for_next: float = self.messages_for_level(level)
-        messages_into_level: float = message_count - total_for_current
-        messages_needed_this_level: float = total_for_next - total_for_current
+        total_for_current: int = messages_for_level(level - 1)
+        total_for_next: int = messages_for_level(level)
+        messages_into_level: int = message_count - total_for_current
+        messages_needed_this_level: int = total_for_next - total_for_current
 
         progress_percent: float = min(
             messages_into_level / messages_needed_this_level, 1.0,
@@ -153,11 +146,11 @@ class UserInfo(commands.Cog):
             progress_bar_length - filled_blocks
         )
 
-        balance: float = user.money
-        total_networth: float = get_net_worth(user=user, db_path=USERS_DB_PATH)
-        stock_value: float = total_networth - balance
+        balance: int = user.money
+        total_networth: int = await get_net_worth_async(user=user, db_path=USERS_DB_PATH)
+        stock_value: int = total_networth - balance
 
-        ranks: dict[str, int | None] = get_all_ranks(USERS_DB_PATH, user_id)
+        ranks: dict[str, int | None] = await get_all_ranks_async(USERS_DB_PATH, user_id)
 
         def fmt_rank(rank: int | None) -> str:
             return f"#{rank}" if rank else "Unranked"
@@ -196,17 +189,17 @@ class UserInfo(commands.Cog):
         )
         embed.add_field(
             name="💰 Balance",
-            value=f"**${format_number(balance)}**",
+            value=f"**${format_money(balance)}**",
             inline=True,
         )
         embed.add_field(
             name="📈 Stock Value",
-            value=f"**${format_number(stock_value)}**",
+            value=f"**${format_money(stock_value)}**",
             inline=True,
         )
         embed.add_field(
             name="📊 Net Worth",
-            value=f"**${format_number(total_networth)}**",
+            value=f"**${format_money(total_networth)}**",
             inline=True,
         )
         embed.add_field(
@@ -233,7 +226,7 @@ class UserInfo(commands.Cog):
         Args:
             ctx (commands.Context): Context.
         """
-        embed: Embed = build_leaderboard_embed("balance")
+        embed: Embed = await LEADERBOARD_CACHE.get("balance")
         view: LeaderboardView = LeaderboardView()
         view.message = await ctx.send(embed=embed, view=view)
 
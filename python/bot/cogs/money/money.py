@@ -8,9 +8,10 @@ from discord.ext import commands
 from log import logger  # noqa: F401
 from user import User
 from utils.general import reset_cd
-from utils.money.stocks import USERS_DB_PATH
+from utils.money.stocks import USERS_DB_PATH, get_net_worth_async
 from utils.money.store_views import StoreView
-from utils.numbers import convert_money_str, format_number, get_net_worth
+from utils.money.transactions import transfer
+from utils.numbers import CENTS_PER_DOLLAR, convert_money_str, format_money
 
 
 class Money(commands.Cog):
@@ -43,12 +44,12 @@ class Money(commands.Cog):
             member.display_avatar.url if member else ctx.author.display_avatar.url
         )
 
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
 
         embed: Embed = Embed(
             title=f"💰 {display_name}'s Balance",
             color=Color.og_blurple(),
-            description=f"## ${format_number(user.money)}",
+            description=f"## ${format_money(user.money)}",
         )
         embed.set_thumbnail(url=avatar_url)
         embed.set_footer(text=f"User ID: {user_id}")
@@ -74,7 +75,7 @@ class Money(commands.Cog):
             amount (str): Amount to give.
         """
         try:
-            amount_float: float = convert_money_str(money_str=amount)
+            amount_cents: int = convert_money_str(money_str=amount)
         except ValueError:
             reset_cd(ctx=ctx)
             await ctx.send(
@@ -86,7 +87,7 @@ class Money(commands.Cog):
             )
             return
 
-        if amount_float <= 0:
+        if amount_cents <= 0:
             reset_cd(ctx=ctx)
             embed: Embed = Embed(
                 title="Error",
@@ -96,9 +97,9 @@ class Money(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        MAX_TRANSFER_AMOUNT: Final[int] = 5_000_000
+        MAX_TRANSFER_AMOUNT: Final[int] = 5_000_000 * CENTS_PER_DOLLAR
 
-        if amount_float > MAX_TRANSFER_AMOUNT:
+        if amount_cents > MAX_TRANSFER_AMOUNT:
             reset_cd(ctx=ctx)
             embed: Embed = Embed(
                 title="Error",
@@ -119,19 +120,23 @@ class Money(commands.Cog):
             )
             return
 
-        formatted_amount: str = format_number(number=amount_float)
+        formatted_amount: str = format_money(amount_cents)
         sender_id: int = ctx.author.id
         sender_username: str = ctx.author.name
         recipient_id: int = member.id
         recipient_username: str = member.name
         recipient_display_name: str = member.display_name
 
-        sender_user: User = User.create_if_not_exists(
+        sender_user: User = await User.create_if_not_exists_async(
             user_id=sender_id,
             username=sender_username,
         )
+        recipient_user: User = await User.create_if_not_exists_async(
+            user_id=recipient_id,
+            username=recipient_username,
+        )
 
-        if sender_user.money < amount_float:
+        if not await transfer(USERS_DB_PATH, sender_user, recipient_user, amount_cents):
             reset_cd(ctx=ctx)
             embed: Embed = Embed(
                 title="Error",
@@ -141,14 +146,6 @@ class Money(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        recipient_user: User = User.create_if_not_exists(
-            user_id=recipient_id,
-            username=recipient_username,
-        )
-
-        recipient_user.money += amount_float
-        sender_user.money -= amount_float
-
         embed: Embed = Embed(
             title="💸 Success",
             color=Color.green(),
@@ -173,23 +170,23 @@ class Money(commands.Cog):
         display_name: str = member.display_name if member else ctx.author.display_name
         avatar: Asset | None = member.avatar if member else ctx.author.avatar
 
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
-        total_networth: float = get_net_worth(user=user, db_path=USERS_DB_PATH)
-        stock_value: float = total_networth - user.money
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+        total_networth: int = await get_net_worth_async(user=user, db_path=USERS_DB_PATH)
+        stock_value: int = total_networth - user.money
 
         embed: Embed = Embed(
             title="Net Worth",
             color=Color.og_blurple(),
-            description=f"${format_number(number=total_networth)}",
+            description=f"${format_money(total_networth)}",
         )
         embed.add_field(
             name="Balance",
-            value=f"${format_number(number=user.money)}",
+            value=f"${format_money(user.money)}",
             inline=True,
         )
         embed.add_field(
             name="Stocks",
-            value=f"${format_number(number=stock_value)}",
+            value=f"${format_money(stock_value)}",
             inline=True,
         )
         embed.set_author(name=display_name, icon_url=avatar)
@@ -207,7 +204,7 @@ class Money(commands.Cog):
         Args:
             ctx (commands.Context): Context.
         """
-        user: User = User.create_if_not_exists(
+        user: User = await User.create_if_not_exists_async(
             user_id=ctx.author.id,
             username=ctx.author.name,
         )
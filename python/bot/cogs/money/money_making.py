@@ -11,8 +11,9 @@ from log import logger  # noqa: F401
 from user import User
 from utils.general import get_user_answer, reset_cd
 from utils.money.roblox import check_answer, question
+from utils.money.transactions import adjust_balance
 from utils.money.trivia import VALID_ANSWERS, build_trivia_embed, get_random_question
-from utils.numbers import convert_money_str, format_number
+from utils.numbers import CENTS_PER_DOLLAR, convert_money_str, format_money
 
 
 class MoneyMaking(commands.Cog):
@@ -42,11 +43,11 @@ class MoneyMaking(commands.Cog):
         """
         user_id: int = ctx.author.id
         username: str = ctx.author.name
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
-        daily_value: int = random.randint(100_000, 1_000_000) * (  # noqa: S311
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+        daily_value: int = random.randint(100_000, 1_000_000) * CENTS_PER_DOLLAR * (  # noqa: S311
             user.prestige + 1
         )
-        formatted_daily_value: str = format_number(number=daily_value)
+        formatted_daily_value: str = format_money(daily_value)
 
         user.money += daily_value
 
@@ -71,11 +72,11 @@ class MoneyMaking(commands.Cog):
         """
         user_id: int = ctx.author.id
         username: str = ctx.author.name
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
-        weekly_value: int = random.randint(1_000_000, 5_000_000) * (  # noqa: S311
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+        weekly_value: int = random.randint(1_000_000, 5_000_000) * CENTS_PER_DOLLAR * (  # noqa: S311
             user.prestige + 1
         )
-        formatted_weekly_value: str = format_number(number=weekly_value)
+        formatted_weekly_value: str = format_money(weekly_value)
 
         user.money += weekly_value
 
@@ -102,15 +103,15 @@ class MoneyMaking(commands.Cog):
         """
         user_id: int = ctx.author.id
         username: str = ctx.author.name
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
 
         try:
             if amount.lower() == "all":
-                gamble_amount: float = user.money
+                gamble_amount: int = user.money
             elif amount.lower() == "half":
-                gamble_amount: float = user.money / 2
+                gamble_amount: int = user.money // 2
             else:
-                gamble_amount: float = convert_money_str(money_str=amount)
+                gamble_amount: int = convert_money_str(money_str=amount)
         except ValueError:
             reset_cd(ctx=ctx)
             embed: Embed = Embed(
@@ -121,9 +122,6 @@ class MoneyMaking(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        user_money_rounded: float = round(user.money, 2)
-        gamble_amount = round(gamble_amount, 2)
-
         if gamble_amount <= 0:
             reset_cd(ctx=ctx)
             embed: Embed = Embed(
@@ -134,55 +132,55 @@ class MoneyMaking(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        if user_money_rounded < gamble_amount:
-            reset_cd(ctx=ctx)
-            embed: Embed = Embed(
-                title="Error",
-                color=Color.red(),
-                description="You do not have enough money to gamble that amount.",
-            )
-            await ctx.send(embed=embed)
-            return
-
         WIN: Final[int] = 400
         LOSE: Final[int] = 950
         TRIPLE_WIN: Final[int] = 999
         roll: int = random.randint(1, 1000)  # noqa: S311
-        formatted_amount: str = format_number(number=gamble_amount)
+        formatted_amount: str = format_money(gamble_amount)
 
+        delta: int
         if roll <= WIN:
-            user.money += gamble_amount
+            delta = gamble_amount
             embed: Embed = Embed(
                 title="🎉 You won!",
                 color=Color.green(),
                 description=f"You won **${formatted_amount}**!",
             )
         elif roll <= LOSE:
-            user.money -= gamble_amount
+            delta = -gamble_amount
             embed: Embed = Embed(
                 title="💀 You Lost",
                 color=Color.red(),
                 description=f"You lost **${formatted_amount}**!",
             )
         elif roll <= TRIPLE_WIN:
-            winnings: float = gamble_amount * 3
-            formatted_winnings: str = format_number(number=winnings)
-            user.money += winnings
+            winnings: int = gamble_amount * 3
+            formatted_winnings: str = format_money(winnings)
+            delta = winnings
             embed: Embed = Embed(
                 title="🔥 3x WIN!",
                 color=Color.green(),
                 description=f"You won **${formatted_winnings}**!",
             )
         else:
-            winnings: float = gamble_amount * 10
-            formatted_winnings: str = format_number(number=winnings)
-            user.money += winnings
+            winnings: int = gamble_amount * 10
+            formatted_winnings: str = format_money(winnings)
+            delta = winnings
             embed: Embed = Embed(
                 title="💎 JACKPOT!",
                 color=Color.gold(),
                 description=f"You hit the jackpot and won **${formatted_winnings}**!",
             )
 
+        # Checked under the user's lock, so a purchase that is still committing is accounted for.
+        if not await adjust_balance(user, delta, minimum=gamble_amount):
+            reset_cd(ctx=ctx)
+            embed: Embed = Embed(
+                title="Error",
+                color=Color.red(),
+                description="You do not have enough money to gamble that amount.",
+            )
+
         await ctx.send(embed=embed)
 
     async def run_roblox_trivia(self, ctx: commands.Context, game: str) -> None:
@@ -196,8 +194,8 @@ class MoneyMaking(commands.Cog):
 
         user_id: int = ctx.author.id
         username: str = ctx.author.name
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
-        earnings: int = random.randint(25000, 50000) * (user.prestige + 1)  # noqa: S311
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+        earnings: int = random.randint(25_000, 50_000) * CENTS_PER_DOLLAR * (user.prestige + 1)  # noqa: S311
 
         loading_message: Message = await ctx.send(
             embed=Embed(
@@ -244,28 +242,28 @@ class MoneyMaking(commands.Cog):
         )
 
         if user_answer is None:
-            user.money -= earnings
+            await adjust_balance(user, -earnings)
             embed: Embed = Embed(
                 title="⏰ Time's Up!",
-                description=f"You lost $**{format_number(earnings)}!**\n\nThe correct answer was **{answer}**.",  # noqa: E501
+                description=f"You lost $**{format_money(earnings)}!**\n\nThe correct answer was **{answer}**.",  # noqa: E501
                 color=Color.red(),
             )
             await ctx.send(embed=embed)
             return
 
         if check_answer(answer=answer, user_answer=user_answer):
-            user.money += earnings
+            await adjust_balance(user, earnings)
             embed: Embed = Embed(
                 title="✅ Correct!",
-                description=f"You won **${format_number(earnings)}**!",
+                description=f"You won **${format_money(earnings)}**!",
                 color=Color.green(),
             )
             await ctx.send(embed=embed)
         else:
-            user.money -= earnings
+            await adjust_balance(user, -earnings)
             embed: Embed = Embed(
                 title="❌ Incorrect",
-                description=f"You lost **${format_number(earnings)}**!\n\nThe correct answer was **{answer}**.",  # noqa: E501
+                description=f"You lost **${format_money(earnings)}**!\n\nThe correct answer was **{answer}**.",  # noqa: E501
                 color=Color.red(),
             )
             await ctx.send(embed=embed)
@@ -311,8 +309,8 @@ class MoneyMaking(commands.Cog):
         """
         user_id: int = ctx.author.id
         username: str = ctx.author.name
-        user: User = User.create_if_not_exists(user_id=user_id, username=username)
-        earnings: int = random.randint(5_000, 10_000) * (  # noqa: S311
+        user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+        earnings: int = random.randint(5_000, 10_000) * CENTS_PER_DOLLAR * (  # noqa: S311
             user.prestige + 1
         )
 
@@ -347,9 +345,9 @@ class MoneyMaking(commands.Cog):
             )
             return
 
-        formatted_earnings: str = format_number(number=earnings)
+        formatted_earnings: str = format_money(earnings)
         if user_answer.lower() == answer:
-            user.money += earnings
+            await adjust_balance(user, earnings)
             await ctx.send(
                 embed=Embed(
                     title="✅ Correct!",
@@ -358,7 +356,7 @@ class MoneyMaking(commands.Cog):
                 ),
             )
         else:
-            user.money -= earnings
+            await adjust_balance(user, -earnings)
             answer_text: str = choices[ord(answer) - ord("a")]
             await ctx.send(
                 embed=Embed(
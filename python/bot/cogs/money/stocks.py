@@ -1,6 +1,5 @@
 """Stock market commands."""
 
-import asyncio
 from datetime import datetime, timezone
 from typing import Literal
 
@@ -8,20 +7,22 @@ from bot.bot import DizznemBot
 from discord import Color, Embed
 from discord.ext import commands, tasks
 from log import logger
+from utils.misc.leaderboard_cache import LEADERBOARD_CACHE
 from utils.money.stock_views import BuyView, SellView
 from utils.money.stocks import (
     STOCK_MAP,
     USERS_DB_PATH,
-    buy_stock,
+    buy_stock_async,
     ensure_stocks_tables,
-    get_all_prices,
-    get_price,
-    get_user_balance,
-    get_user_stocks,
+    get_all_prices_async,
+    get_price_async,
+    get_user_balance_async,
+    get_user_stocks_async,
     is_market_open,
-    refresh_prices,
-    sell_stock,
+    refresh_prices_async,
+    sell_stock_async,
 )
+from utils.numbers import format_money
 
 
 class Stocks(commands.Cog):
@@ -48,7 +49,8 @@ class Stocks(commands.Cog):
         market_open: bool = is_market_open()
         if market_open and not self._market_was_open:
             logger.info("Market opened — refreshing stock prices.")
-            await asyncio.to_thread(refresh_prices, USERS_DB_PATH)
+            await refresh_prices_async(USERS_DB_PATH)
+            LEADERBOARD_CACHE.invalidate("networth")
         self._market_was_open = market_open
 
     @market_open_watcher.before_loop
@@ -56,7 +58,8 @@ class Stocks(commands.Cog):
         """Wait until bot is ready before starting the loop."""
         await self.bot.wait_until_ready()
         logger.info("Refreshing stock prices on startup.")
-        await asyncio.to_thread(refresh_prices, USERS_DB_PATH)
+        await refresh_prices_async(USERS_DB_PATH)
+        LEADERBOARD_CACHE.invalidate("networth")
 
     @commands.hybrid_command(
         name="stockmarket",
@@ -68,14 +71,14 @@ class Stocks(commands.Cog):
         Args:
             ctx (commands.Context): Context.
         """
-        prices: list[tuple[str, float, float]] = get_all_prices(USERS_DB_PATH)
+        prices: list[tuple[str, int, int]] = await get_all_prices_async(USERS_DB_PATH)
         embed = Embed(
             title="📈 Stock Market",
             color=Color.green(),
             timestamp=datetime.now(timezone.utc),
         )
         for name, price, open_price in prices:
-            change: float = price - open_price
+            change: int = price - open_price
             change_pct: float | Literal[0] = (
                 (change / open_price * 100) if open_price else 0
             )
@@ -84,7 +87,7 @@ class Stocks(commands.Cog):
             )
             embed.add_field(
                 name=f"{arrow} {name}",
-                value=f"**${price:,.2f}** ({change_pct:+.2f}%)",
+                value=f"**${format_money(price)}** ({change_pct:+.2f}%)",
                 inline=True,
             )
         await ctx.send(embed=embed)
@@ -108,18 +111,18 @@ class Stocks(commands.Cog):
             )
             return
 
-        price: float | None = get_price(USERS_DB_PATH, match)
+        price: int | None = await get_price_async(USERS_DB_PATH, match)
         if price is None:
             await ctx.send("Could not retrieve stock price.", ephemeral=True)
             return
 
-        balance: float = get_user_balance(ctx.author.id, ctx.author.name)
+        balance: int = await get_user_balance_async(ctx.author.id, ctx.author.name)
         view = BuyView(
             user_id=ctx.author.id,
             stock_name=match,
             price=price,
             balance=balance,
-            execute_fn=lambda qty: buy_stock(
+            execute_fn=lambda qty: buy_stock_async(
                 USERS_DB_PATH,
                 ctx.author.id,
                 ctx.author.name,
@@ -149,12 +152,12 @@ class Stocks(commands.Cog):
             )
             return
 
-        price: float | None = get_price(USERS_DB_PATH, match)
+        price: int | None = await get_price_async(USERS_DB_PATH, match)
         if price is None:
             await ctx.send("Could not retrieve stock price.", ephemeral=True)
             return
 
-        holdings: list[tuple[str, int, float]] = get_user_stocks(
+        holdings: list[tuple[str, int, int]] = await get_user_stocks_async(
             USERS_DB_PATH,
             ctx.author.id,
         )
@@ -168,7 +171,7 @@ class Stocks(commands.Cog):
             stock_name=match,
             price=price,
             owned=owned,
-            execute_fn=lambda qty: sell_stock(
+            execute_fn=lambda qty: sell_stock_async(
                 USERS_DB_PATH,
                 ctx.author.id,
                 ctx.author.name,
@@ -186,7 +189,7 @@ class Stocks(commands.Cog):
         Args:
             ctx (commands.Context): Context.
         """
-        holdings: list[tuple[str, int, float]] = get_user_stocks(
+        holdings: list[tuple[str, int, int]] = await get_user_stocks_async(
             USERS_DB_PATH,
             ctx.author.id,
         )
@@ -197,16 +200,16 @@ class Stocks(commands.Cog):
             )
             return
 
-        total_value: float = sum(value for _, _, value in holdings)
+        total_value: int = sum(value for _, _, value in holdings)
         embed = Embed(
             title=f"💼 {ctx.author.display_name}'s Portfolio",
             color=Color.og_blurple(),
-            description=f"**Total Value: ${total_value:,.2f}**",
+            description=f"**Total Value: ${format_money(total_value)}**",
         )
         for name, qty, value in holdings:
             embed.add_field(
                 name=name,
-                value=f"{qty} shares — **${value:,.2f}**",
+                value=f"{qty} shares — **${format_money(value)}**",
                 inline=True,
             )
         await ctx.send(embed=embed)
@@ -0,0 +1,362 @@
+"""Shared SQLite connection layer.
+
+Every database file under data/ is accessed through here. Each thread keeps one long-lived
+connection per database file, so helpers no longer pay for connect/close (and statement
+parsing) on every call.
+
+Coroutines should not call the sync helpers directly. run_read() runs a helper on a small
+pool of reader threads, and run_write() queues it for the single writer thread, which runs
+whatever writes are queued at once in one transaction (group commit). WAL lets the readers
+keep going while the writer commits.
+"""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, TypeVar
+
+from log import logger
+
+STATEMENT_CACHE_SIZE: int = 256
+BUSY_TIMEOUT_MS: int = 5000
+
+PRAGMAS: tuple[str, ...] = (
+    "PRAGMA journal_mode = WAL",
+    # Safe with WAL, only the last commits can be lost on power loss.
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",  # ~8 MB page cache per connection.
+    "PRAGMA mmap_size = 67108864",  # 64 MB
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+)
+
+READ_POOL_SIZE: int = 4
+GROUP_COMMIT_MAX_OPS: int = 128
+
+T = TypeVar("T")
+
+_local: threading.local = threading.local()
+_all_connections: list[sqlite3.Connection] = []
+_all_connections_lock: threading.Lock = threading.Lock()
+_generation: int = 0  # Bumped by close_connections() so threads drop their closed connections.
+
+
+def _thread_connections() -> dict[Path, sqlite3.Connection]:
+    """Get the connection map for the current thread.
+
+    Returns:
+        dict[Path, sqlite3.Connection]: Connections keyed by resolved database path.
+    """
+    connections: dict[Path, sqlite3.Connection] | None = getattr(_local, "connections", None)
+    if connections is None or getattr(_local, "generation", None) != _generation:
+        connections = {}
+        _local.connections = connections
+        _local.depths = {}
+        _local.generation = _generation
+    return connections
+
+
+def _open(db_path: Path) -> sqlite3.Connection:
+    """Open and configure a new connection.
+
+    Args:
+        db_path (Path): Path to the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: Configured connection.
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn: sqlite3.Connection = sqlite3.connect(
+        db_path,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        # Only the owning thread uses it, but close_connections() may close it from another.
+        check_same_thread=False,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+    with _all_connections_lock:
+        _all_connections.append(conn)
+
+    logger.debug(f"Opened pooled connection to {db_path}.")
+    return conn
+
+
+def get_connection(db_path: Path) -> sqlite3.Connection:
+    """Get this thread's pooled connection for a database, opening it if needed.
+
+    Args:
+        db_path (Path): Path to the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: Long-lived connection owned by the calling thread.
+    """
+    key: Path = db_path.resolve()
+    connections: dict[Path, sqlite3.Connection] = _thread_connections()
+    conn: sqlite3.Connection | None = connections.get(key)
+    if conn is None:
+        conn = _open(key)
+        connections[key] = conn
+    return conn
+
+
+@contextmanager
+def connect(db_path: Path) -> Iterator[sqlite3.Connection]:
+    """Use a pooled connection, committing on success and rolling back on error.
+
+    Drop-in replacement for ``with sqlite3.connect(db_path) as conn:``, except that the
+    connection stays open afterwards for reuse. Nested uses on the same thread become
+    savepoints: an error only undoes the inner block, and nothing is committed until the
+    outermost block exits.
+
+    Args:
+        db_path (Path): Path to the SQLite database file.
+
+    Yields:
+        sqlite3.Connection: Pooled connection for the calling thread.
+    """
+    conn: sqlite3.Connection = get_connection(db_path)
+    depths: dict[sqlite3.Connection, int] = _local.depths
+    depth: int = depths.get(conn, 0)
+    depths[conn] = depth + 1
+    try:
+        if depth == 0:
+            with conn:
+                yield conn
+            return
+
+        if not conn.in_transaction:
+            # Releasing a savepoint that opened the transaction would commit it.
+            conn.execute("BEGIN")
+        savepoint: str = f"sp{depth}"
+        conn.execute(f"SAVEPOINT {savepoint}")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+            raise
+        conn.execute(f"RELEASE {savepoint}")
+    finally:
+        depths[conn] = depth
+
+
+def close_connections() -> None:
+    """Close every pooled connection, on all threads.
+
+    Stop the read pool and writer first (see shutdown()), a connection closed mid-query
+    fails that query.
+    """
+    global _generation  # noqa: PLW0603
+
+    with _all_connections_lock:
+        connections: list[sqlite3.Connection] = list(_all_connections)
+        _all_connections.clear()
+        _generation += 1
+
+    for conn in connections:
+        conn.close()
+
+    _local.connections = {}
+    _local.depths = {}
+    _local.generation = _generation
+
+
+class _WriteJob:
+    """A queued write and the future its result goes to."""
+
+    __slots__ = ("db_path", "fn", "future")
+
+    def __init__(self, db_path: Path, fn: Callable[[], Any]) -> None:
+        """Initialize the job.
+
+        Args:
+            db_path (Path): Database the write goes to.
+            fn (Callable[[], Any]): The write, with its arguments already bound.
+        """
+        self.db_path: Path = db_path
+        self.fn: Callable[[], Any] = fn
+        self.future: Future = Future()
+
+
+class DatabaseWriter:
+    """Single thread that runs every queued write, committing them in groups.
+
+    Whatever is queued when the thread wakes up is run in one transaction per database file,
+    so a burst of writes costs one commit instead of one each. Every write gets its own
+    savepoint, so one failing write doesn't undo the others in its group.
+    """
+
+    def __init__(self) -> None:
+        """Start the writer thread."""
+        self._queue: queue.SimpleQueue[_WriteJob | None] = queue.SimpleQueue()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run,
+            name="db-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self, db_path: Path, fn: Callable[[], T]) -> "Future[T]":
+        """Queue a write.
+
+        Args:
+            db_path (Path): Database the write goes to.
+            fn (Callable[[], T]): The write, with its arguments already bound.
+
+        Returns:
+            Future[T]: Resolved with fn's result once its group is committed.
+        """
+        job: _WriteJob = _WriteJob(db_path, fn)
+        self._queue.put(job)
+        return job.future
+
+    def stop(self) -> None:
+        """Finish every queued write, then stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Writer thread loop."""
+        running: bool = True
+        while running:
+            job: _WriteJob | None = self._queue.get()
+            batch: list[_WriteJob] = []
+            while job is not None:
+                batch.append(job)
+                if len(batch) >= GROUP_COMMIT_MAX_OPS:
+                    break
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            running = job is not None
+
+            groups: dict[Path, list[_WriteJob]] = {}
+            for queued in batch:
+                groups.setdefault(queued.db_path, []).append(queued)
+            for db_path, jobs in groups.items():
+                self._commit_group(db_path, jobs)
+
+    @staticmethod
+    def _commit_group(db_path: Path, jobs: list[_WriteJob]) -> None:
+        """Run a group of writes in one transaction and resolve their futures.
+
+        Args:
+            db_path (Path): Database the writes go to.
+            jobs (list[_WriteJob]): Writes to run, in submission order.
+        """
+        outcomes: list[tuple[_WriteJob, Any, BaseException | None]] = []
+        try:
+            with connect(db_path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for job in jobs:
+                    if not job.future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with connect(db_path):
+                            result: Any = job.fn()
+                    except Exception as exc:  # noqa: BLE001 -- Handed to the caller's future.
+                        outcomes.append((job, None, exc))
+                    else:
+                        outcomes.append((job, result, None))
+        except sqlite3.Error as exc:
+            logger.exception(f"Group commit of {len(jobs)} writes to {db_path} failed.")
+            for job in jobs:
+                if not job.future.done():
+                    job.future.set_exception(exc)
+            return
+
+        for job, result, error in outcomes:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+
+_read_pool: ThreadPoolExecutor | None = None
+_writer: DatabaseWriter | None = None
+_facade_lock: threading.Lock = threading.Lock()
+
+
+def _get_read_pool() -> ThreadPoolExecutor:
+    """Get the reader thread pool, starting it if needed.
+
+    Returns:
+        ThreadPoolExecutor: Reader pool.
+    """
+    global _read_pool  # noqa: PLW0603
+
+    with _facade_lock:
+        if _read_pool is None:
+            _read_pool = ThreadPoolExecutor(
+                max_workers=READ_POOL_SIZE,
+                thread_name_prefix="db-read",
+            )
+        return _read_pool
+
+
+def _get_writer() -> DatabaseWriter:
+    """Get the writer, starting it if needed.
+
+    Returns:
+        DatabaseWriter: Writer.
+    """
+    global _writer  # noqa: PLW0603
+
+    with _facade_lock:
+        if _writer is None:
+            _writer = DatabaseWriter()
+        return _writer
+
+
+async def run_read(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a read-only helper on the reader pool.
+
+    Args:
+        fn (Callable[..., T]): Sync helper to run.
+        *args (Any): Positional arguments for fn.
+        **kwargs (Any): Keyword arguments for fn.
+
+    Returns:
+        T: fn's result.
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_read_pool(), partial(fn, *args, **kwargs))
+
+
+async def run_write(db_path: Path, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Queue a helper that writes to db_path for the writer thread.
+
+    Args:
+        db_path (Path): Database the helper writes to.
+        fn (Callable[..., T]): Sync helper to run.
+        *args (Any): Positional arguments for fn.
+        **kwargs (Any): Keyword arguments for fn.
+
+    Returns:
+        T: fn's result, once it is committed.
+    """
+    return await asyncio.wrap_future(_get_writer().submit(db_path, partial(fn, *args, **kwargs)))
+
+
+def shutdown() -> None:
+    """Finish queued writes and stop the reader pool and writer thread."""
+    global _read_pool, _writer  # noqa: PLW0603
+
+    with _facade_lock:
+        writer: DatabaseWriter | None = _writer
+        read_pool: ThreadPoolExecutor | None = _read_pool
+        _writer = None
+        _read_pool = None
+
+    if writer is not None:
+        writer.stop()
+    if read_pool is not None:
+        read_pool.shutdown(wait=True)
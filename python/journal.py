@@ -0,0 +1,183 @@
+"""Append-only journal of user changes made between autosaves.
+
+Every change to a journaled User field is appended as a fixed-size binary record holding the
+field's new value. Records are written straight to the OS without Python buffering, so they
+survive the process being killed (SIGKILL, OOM) even though they are never fsynced.
+
+Autosave rotates the active segment at the same moment it snapshots dirty users, and deletes
+the sealed segments once that snapshot is committed. On startup, whatever segments are left
+over get replayed on top of users.db, oldest first.
+"""
+
+import struct
+from io import FileIO
+from pathlib import Path
+
+from database import connect
+from log import logger
+from utils.numbers import CENTS_PER_DOLLAR
+
+MAGIC: bytes = b"DZJ2"
+RECORD: struct.Struct = struct.Struct("<qBq")  # user id, field index, new value
+
+# Segments written before money was stored in cents hold every value as a double, with money
+# in dollars. They are still replayed so an upgrade doesn't lose the last few changes.
+LEGACY_MAGIC: bytes = b"DZJ1"
+LEGACY_RECORD: struct.Struct = struct.Struct("<qBd")
+
+JOURNAL_FIELDS: tuple[str, ...] = ("money", "prestige", "level", "message_count")
+_FIELD_INDEX: dict[str, int] = {name: i for i, name in enumerate(JOURNAL_FIELDS)}
+_MONEY: int = _FIELD_INDEX["money"]
+
+
+class Journal:
+    """Segmented append-only log of User field changes."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the journal. Nothing is written until open() is called.
+
+        Args:
+            path (Path): Path of the active segment, sealed segments get a numeric suffix.
+        """
+        self.path: Path = path
+        self._file: FileIO | None = None
+        self._next_seq: int = 1
+        self._active_has_records: bool = False
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the journal is accepting records.
+
+        Returns:
+            bool: True if open() has been called.
+        """
+        return self._file is not None
+
+    def _sealed_segments(self) -> list[tuple[int, Path]]:
+        """Find sealed segments on disk.
+
+        Returns:
+            list[tuple[int, Path]]: (sequence number, path) pairs, oldest first.
+        """
+        segments: list[tuple[int, Path]] = []
+        for candidate in self.path.parent.glob(f"{self.path.name}.*"):
+            suffix: str = candidate.name.rsplit(".", 1)[1]
+            if suffix.isdigit():
+                segments.append((int(suffix), candidate))
+        return sorted(segments)
+
+    def open(self) -> None:
+        """Start accepting records in a fresh active segment."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        sealed: list[tuple[int, Path]] = self._sealed_segments()
+        self._next_seq = sealed[-1][0] + 1 if sealed else 1
+        self._file = open(self.path, "ab", buffering=0)  # noqa: SIM115 -- Kept open for appends.
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._active_has_records = self._file.tell() > len(MAGIC)
+
+    def close(self) -> None:
+        """Stop accepting records."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, user_id: int, field: str, value: int) -> None:
+        """Append a field change.
+
+        Args:
+            user_id (int): Discord user ID.
+            field (str): One of JOURNAL_FIELDS.
+            value (int): The field's new value.
+        """
+        if self._file is None:
+            return
+        self._file.write(RECORD.pack(user_id, _FIELD_INDEX[field], value))
+        self._active_has_records = True
+
+    def rotate(self) -> int | None:
+        """Seal the active segment so new records go to a fresh one.
+
+        Returns:
+            int | None: Sequence number of the sealed segment, or None if there was nothing
+                to seal.
+        """
+        if self._file is None or not self._active_has_records:
+            return None
+
+        seq: int = self._next_seq
+        self._next_seq += 1
+        self._file.close()
+        self.path.rename(self.path.with_name(f"{self.path.name}.{seq}"))
+        self._file = open(self.path, "ab", buffering=0)  # noqa: SIM115
+        self._file.write(MAGIC)
+        self._active_has_records = False
+        return seq
+
+    def discard_through(self, seq: int) -> None:
+        """Delete sealed segments whose changes are now safely in users.db.
+
+        Args:
+            seq (int): Highest sequence number to delete.
+        """
+        for segment_seq, segment in self._sealed_segments():
+            if segment_seq <= seq:
+                segment.unlink(missing_ok=True)
+
+    def truncate(self) -> None:
+        """Drop every segment, used once all cached users have been written."""
+        seq: int | None = self.rotate()
+        if seq is not None:
+            self.discard_through(seq)
+
+    def replay(self, db_path: Path) -> int:
+        """Apply leftover segments to the users table, then delete them.
+
+        Must be called before open().
+
+        Args:
+            db_path (Path): Path to users.db.
+
+        Returns:
+            int: Number of records applied.
+        """
+        segments: list[Path] = [path for _, path in self._sealed_segments()]
+        if self.path.exists():
+            segments.append(self.path)
+        if not segments:
+            return 0
+
+        # Later records win, so only the final value per (user, field) needs writing.
+        latest: dict[tuple[int, int], int] = {}
+        applied: int = 0
+        for segment in segments:
+            data: bytes = segment.read_bytes()
+            legacy: bool = data.startswith(LEGACY_MAGIC)
+            if not legacy and not data.startswith(MAGIC):
+                logger.error(f"Skipping journal segment {segment} with unknown format.")
+                continue
+            record: struct.Struct = LEGACY_RECORD if legacy else RECORD
+            body: memoryview = memoryview(data)[len(MAGIC) :]
+            usable: int = len(body) - len(body) % record.size  # Drop a torn final record.
+            for user_id, field_index, value in record.iter_unpack(body[:usable]):
+                if legacy:
+                    value = round(value * CENTS_PER_DOLLAR) if field_index == _MONEY else int(value)  # noqa: PLW2901
+                latest[(user_id, field_index)] = value
+                applied += 1
+
+        with connect(db_path) as conn:
+            for field_index, field in enumerate(JOURNAL_FIELDS):
+                conn.executemany(
+                    f"UPDATE users SET {field} = ? WHERE id = ?",  # noqa: S608 -- Fixed column names.
+                    [
+                        (value, user_id)
+                        for (user_id, index), value in latest.items()
+                        if index == field_index
+                    ],
+                )
+
+        for segment in segments:
+            segment.unlink(missing_ok=True)
+
+        logger.info(f"Replayed {applied} journaled changes from {len(segments)} segment(s).")
+        return applied
@@ -0,0 +1,380 @@
+"""Versioned schema migrations.
+
+Each database file has an ordered list of migrations. The versions already applied are
+recorded in a schema_migrations table, and migrate() applies the missing ones at startup in a
+single transaction, so a database is either fully upgraded or left exactly as it was.
+
+Secondary indexes are declared per database rather than written as migrations. After the
+migrations run, missing indexes are created, indexes whose definition changed are rebuilt,
+and managed indexes (``idx_`` prefix) that are no longer declared are dropped.
+"""
+
+import sqlite3
+from collections.abc import Callable, Mapping, Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+
+from database import connect
+from log import logger
+
+MANAGED_INDEX_PREFIX: str = "idx_"
+
+Step = str | Callable[[sqlite3.Connection], None]
+
+
+class Migration:
+    """One schema version: SQL statements and/or callables run in order."""
+
+    __slots__ = ("description", "steps", "version")
+
+    def __init__(self, version: int, description: str, *steps: Step) -> None:
+        """Initialize a migration.
+
+        Args:
+            version (int): Schema version this migration brings the database to.
+            description (str): Short summary, recorded in schema_migrations.
+            *steps (Step): SQL statements or callables taking the connection.
+        """
+        self.version: int = version
+        self.description: str = description
+        self.steps: tuple[Step, ...] = steps
+
+    def apply(self, conn: sqlite3.Connection) -> None:
+        """Run every step on a connection that is already inside a transaction.
+
+        Args:
+            conn (sqlite3.Connection): Database connection.
+        """
+        for step in self.steps:
+            if isinstance(step, str):
+                conn.execute(step)
+            else:
+                step(conn)
+
+    def __repr__(self) -> str:
+        """Representation of Migration.
+
+        Returns:
+            str: Representation of Migration.
+        """
+        return f"Migration(version={self.version}, description={self.description!r})"
+
+
+def add_column(table: str, column: str, definition: str) -> Callable[[sqlite3.Connection], None]:
+    """Build a step that adds a column unless it already exists.
+
+    Databases created before migrations were tracked may already have some columns, so
+    column additions have to be idempotent.
+
+    Args:
+        table (str): Table name.
+        column (str): Column name.
+        definition (str): Column type and constraints, e.g. ``INTEGER DEFAULT 0``.
+
+    Returns:
+        Callable[[sqlite3.Connection], None]: Migration step.
+    """
+
+    def step(conn: sqlite3.Connection) -> None:
+        columns: set[str] = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    return step
+
+
+USERS_MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create users",
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            money REAL DEFAULT 0,
+            prestige INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 0,
+            message_count INTEGER DEFAULT 0
+        )
+        """,
+    ),
+    Migration(
+        2,
+        "create stock_prices and user_stocks",
+        """
+        CREATE TABLE IF NOT EXISTS stock_prices (
+            name         TEXT PRIMARY KEY,
+            price        REAL NOT NULL,
+            open_price   REAL NOT NULL,
+            last_updated TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_stocks (
+            user_id    INTEGER NOT NULL,
+            stock_name TEXT NOT NULL,
+            quantity   INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, stock_name)
+        )
+        """,
+    ),
+    Migration(3, "add users.last_seen", add_column("users", "last_seen", "INTEGER DEFAULT 0")),
+    Migration(
+        4,
+        "create ledger",
+        """
+        CREATE TABLE IF NOT EXISTS ledger (
+            id         INTEGER PRIMARY KEY,
+            created_at INTEGER NOT NULL,
+            from_user  INTEGER,
+            to_user    INTEGER,
+            amount     REAL NOT NULL,
+            reason     TEXT NOT NULL,
+            memo       TEXT NOT NULL DEFAULT ''
+        )
+        """,
+    ),
+    Migration(
+        5,
+        "store money as integer cents",
+        # SQLite can't change a column's type in place, so each table is rebuilt.
+        """
+        CREATE TABLE users_new (
+            id            INTEGER PRIMARY KEY,
+            name          TEXT NOT NULL,
+            money         INTEGER DEFAULT 0,
+            prestige      INTEGER DEFAULT 0,
+            level         INTEGER DEFAULT 0,
+            message_count INTEGER DEFAULT 0,
+            last_seen     INTEGER DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO users_new (id, name, money, prestige, level, message_count, last_seen)
+        SELECT id, name, CAST(ROUND(IFNULL(money, 0) * 100) AS INTEGER), prestige, level,
+               message_count, last_seen
+        FROM users
+        """,
+        "DROP TABLE users",
+        "ALTER TABLE users_new RENAME TO users",
+        """
+        CREATE TABLE stock_prices_new (
+            name         TEXT PRIMARY KEY,
+            price        INTEGER NOT NULL,
+            open_price   INTEGER NOT NULL,
+            last_updated TEXT NOT NULL
+        )
+        """,
+        """
+        INSERT INTO stock_prices_new (name, price, open_price, last_updated)
+        SELECT name, CAST(ROUND(price * 100) AS INTEGER), CAST(ROUND(open_price * 100) AS INTEGER),
+               last_updated
+        FROM stock_prices
+        """,
+        "DROP TABLE stock_prices",
+        "ALTER TABLE stock_prices_new RENAME TO stock_prices",
+        """
+        CREATE TABLE ledger_new (
+            id         INTEGER PRIMARY KEY,
+            created_at INTEGER NOT NULL,
+            from_user  INTEGER,
+            to_user    INTEGER,
+            amount     INTEGER NOT NULL,
+            reason     TEXT NOT NULL,
+            memo       TEXT NOT NULL DEFAULT ''
+        )
+        """,
+        """
+        INSERT INTO ledger_new (id, created_at, from_user, to_user, amount, reason, memo)
+        SELECT id, created_at, from_user, to_user, CAST(ROUND(amount * 100) AS INTEGER), reason,
+               memo
+        FROM ledger
+        """,
+        "DROP TABLE ledger",
+        "ALTER TABLE ledger_new RENAME TO ledger",
+    ),
+    Migration(
+        6,
+        "add users.stock_value",
+        add_column("users", "stock_value", "INTEGER NOT NULL DEFAULT 0"),
+        """
+        UPDATE users SET stock_value = IFNULL(
+            (
+                SELECT SUM(us.quantity * sp.price)
+                FROM user_stocks us
+                JOIN stock_prices sp ON us.stock_name = sp.name
+                WHERE us.user_id = users.id AND us.quantity > 0
+            ),
+            0
+        )
+        """,
+    ),
+)
+
+USERS_INDEXES: dict[str, str] = {
+    # Leaderboards and rank lookups.
+    "idx_users_money": "users(money)",
+    "idx_users_prestige": "users(prestige)",
+    "idx_users_level": "users(level)",
+    "idx_users_net_worth": "users(money + stock_value)",
+    # Startup preload.
+    "idx_users_last_seen": "users(last_seen, message_count)",
+    # Holders of a given stock.
+    "idx_user_stocks_stock_name": "user_stocks(stock_name)",
+    # A user's transaction history.
+    "idx_ledger_from_user": "ledger(from_user)",
+    "idx_ledger_to_user": "ledger(to_user)",
+}
+
+COUNT_MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create count",
+        """
+        CREATE TABLE IF NOT EXISTS count (
+            id    INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        """,
+    ),
+)
+
+INSPIRATION_MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create messages",
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            messageID INTEGER PRIMARY KEY AUTOINCREMENT,
+            message   TEXT NOT NULL
+        )
+        """,
+    ),
+)
+
+
+def applied_versions(conn: sqlite3.Connection) -> set[int]:
+    """Get the schema versions already applied to a database.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+
+    Returns:
+        set[int]: Applied versions.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at  TEXT NOT NULL
+        )
+        """,
+    )
+    return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def index_sql(name: str, definition: str) -> str:
+    """Build the CREATE INDEX statement for a declared index.
+
+    This is also exactly what SQLite stores in sqlite_master, which is how changed
+    definitions are detected.
+
+    Args:
+        name (str): Index name.
+        definition (str): ``table(columns)``.
+
+    Returns:
+        str: CREATE INDEX statement.
+    """
+    return f"CREATE INDEX {name} ON {definition}"
+
+
+def sync_indexes(conn: sqlite3.Connection, indexes: Mapping[str, str]) -> list[str]:
+    """Make the managed indexes of a database match the declared ones.
+
+    Args:
+        conn (sqlite3.Connection): Database connection, inside a transaction.
+        indexes (Mapping[str, str]): Declared indexes, name to ``table(columns)``.
+
+    Returns:
+        list[str]: Descriptions of the changes made.
+    """
+    existing: dict[str, str] = dict(
+        conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name LIKE ? ESCAPE '\\'",
+            (MANAGED_INDEX_PREFIX.replace("_", "\\_") + "%",),
+        ).fetchall(),
+    )
+
+    changes: list[str] = []
+    for name in existing.keys() - indexes.keys():
+        conn.execute(f"DROP INDEX {name}")
+        changes.append(f"dropped {name}")
+
+    for name, definition in indexes.items():
+        sql: str = index_sql(name, definition)
+        current: str | None = existing.get(name)
+        if current == sql:
+            continue
+        if current is not None:
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute(sql)
+        changes.append(f"{'rebuilt' if current else 'created'} {name}")
+
+    return changes
+
+
+def migrate(
+    db_path: Path,
+    migrations: Sequence[Migration],
+    indexes: Mapping[str, str] | None = None,
+) -> int:
+    """Apply pending migrations and sync indexes, all in one transaction.
+
+    Args:
+        db_path (Path): Path to the SQLite database file.
+        migrations (Sequence[Migration]): Every migration for this database, any order.
+        indexes (Mapping[str, str] | None): Declared indexes, name to ``table(columns)``.
+            None leaves existing indexes alone, while an empty mapping drops every managed
+            index.
+
+    Returns:
+        int: Number of migrations applied.
+    """
+    with connect(db_path) as conn:
+        if not conn.in_transaction:
+            # Take the write lock up front so two processes can't both decide to migrate.
+            conn.execute("BEGIN IMMEDIATE")
+        applied: set[int] = applied_versions(conn)
+
+        known: int = max((migration.version for migration in migrations), default=0)
+        if applied and max(applied) > known:
+            logger.warning(
+                f"{db_path} is at schema version {max(applied)}, newer than this code ({known}).",
+            )
+
+        pending: list[Migration] = sorted(
+            (migration for migration in migrations if migration.version not in applied),
+            key=lambda migration: migration.version,
+        )
+        for migration in pending:
+            migration.apply(conn)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)",
+                (
+                    migration.version,
+                    migration.description,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+            logger.info(
+                f"Migrated {db_path} to version {migration.version}: {migration.description}",
+            )
+
+        if indexes is not None:
+            index_changes: list[str] = sync_indexes(conn, indexes)
+            if index_changes:
+                logger.info(f"Indexes on {db_path}: {', '.join(index_changes)}.")
+
+    return len(pending)
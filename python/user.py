@@ -2,87 +2,229 @@
 
 import asyncio
 import atexit
+import os
 import sqlite3
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from functools import cache
 from pathlib import Path
 from typing import Any, Self
 
+from database import connect, run_read, run_write
+from journal import Journal
 from log import logger
+from migrations import USERS_INDEXES, USERS_MIGRATIONS, migrate
+from utils.leveling import level_for_messages, messages_for_level
+from utils.numbers import clamp_money
+from utils.rank_index import Rankings
 
 DB_PATH: Path = Path("data/users.db")
+JOURNAL_PATH: Path = Path("data/users.journal")
 
-USER_CACHE: dict[int, "User"] = {}
 SAVE_INTERVAL: int = 60
+DEFAULT_CACHE_MAX_USERS: int = 10_000
+ESTIMATED_USER_BYTES: int = 350  # User object, name string and cache bookkeeping.
+LAST_SEEN_RESOLUTION: int = 60  # Seconds, so last_seen isn't rewritten on every message.
+JOURNAL: Journal = Journal(JOURNAL_PATH)
+
+USER_COLUMNS: tuple[str, ...] = (
+    "name",
+    "money",
+    "prestige",
+    "level",
+    "message_count",
+    "last_seen",
+)
+SELECT_USER_COLUMNS: str = f"id, {', '.join(USER_COLUMNS)}"
+RANKED_COLUMNS: tuple[str, ...] = ("money", "prestige", "level")
+RANKINGS: Rankings = Rankings(RANKED_COLUMNS)
+
+DirtyRows = dict[int, list[tuple[Any, ...]]]  # dirty bitmask -> rows from User.to_row()
+
+
+@cache
+def update_sql(mask: int) -> str:
+    """Build an UPDATE that only writes the columns set in a dirty bitmask.
+
+    Args:
+        mask (int): Bitmask of changed columns, bit i is USER_COLUMNS[i].
+
+    Returns:
+        str: UPDATE statement taking the changed values followed by the user ID.
+    """
+    assignments: str = ", ".join(
+        f"{column} = ?" for i, column in enumerate(USER_COLUMNS) if mask & (1 << i)
+    )
+    return f"UPDATE users SET {assignments} WHERE id = ?"  # noqa: S608 -- Fixed column names.
+
+
+class _Column:
+    """Descriptor for a persisted User column that records changes as it's set."""
+
+    __slots__ = ("bit", "clamp", "journaled", "name", "ranked", "slot")
+
+    def __init__(
+        self,
+        *,
+        journaled: bool = True,
+        ranked: bool = False,
+        clamp: Callable[[Any], Any] | None = None,
+    ) -> None:
+        """Initialize the descriptor.
+
+        Args:
+            journaled (bool): Whether changes are written to the crash journal.
+            ranked (bool): Whether changes are passed on to RANKINGS.
+            clamp (Callable[[Any], Any] | None): Limits new values to what can be stored.
+        """
+        self.journaled: bool = journaled
+        self.ranked: bool = ranked
+        self.clamp: Callable[[Any], Any] | None = clamp
+        self.name: str = ""
+        self.slot: str = ""
+        self.bit: int = 0
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        """Bind the descriptor to its column.
+
+        Args:
+            owner (type): The User class.
+            name (str): Attribute name, same as the column name.
+        """
+        self.name = name
+        self.slot = f"_{name}"
+        self.bit = 1 << USER_COLUMNS.index(name)
+
+    def __get__(self, instance: "User | None", owner: type) -> Any:
+        """Get the column value.
+
+        Args:
+            instance (User | None): User instance, None for class access.
+            owner (type): The User class.
+
+        Returns:
+            Any: Column value, or the descriptor itself for class access.
+        """
+        if instance is None:
+            return self
+        return getattr(instance, self.slot)
+
+    def __set__(self, instance: "User", value: Any) -> None:
+        """Set the column value and mark it as changed.
+
+        Args:
+            instance (User): User instance.
+            value (Any): New value.
+        """
+        if self.clamp is not None:
+            value = self.clamp(value)
+        setattr(instance, self.slot, value)
+        instance._dirty_fields |= self.bit  # noqa: SLF001
+        if self.journaled:
+            JOURNAL.record(instance.id, self.name, value)
+        if self.ranked:
+            RANKINGS.update(instance.id, self.name, value)
+        if instance._evicted:  # noqa: SLF001
+            # Changed by someone still holding it, bring it back so autosave sees it.
+            USER_CACHE[instance.id] = instance
+
+
+def configure_user_cache() -> None:
+    """Size USER_CACHE from the USER_CACHE_MAX_USERS and USER_CACHE_MAX_BYTES env vars."""
+    max_users: int = int(os.getenv("USER_CACHE_MAX_USERS") or DEFAULT_CACHE_MAX_USERS)
+    max_bytes: str | None = os.getenv("USER_CACHE_MAX_BYTES")
+    if max_bytes:
+        max_users = min(max_users, int(max_bytes) // ESTIMATED_USER_BYTES)
+    USER_CACHE.resize(max_users)
+    logger.info(f"User cache holds up to {max_users} users.")
 
 
 def init_db() -> None:
     """Initalize database if not done so already."""
     logger.info("Initiating database...")
 
-    DB_PATH.parent.mkdir(exist_ok=True)
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                money REAL DEFAULT 0,
-                prestige INTEGER DEFAULT 0,
-                level INTEGER DEFAULT 0,
-                message_count INTEGER DEFAULT 0
-            )
-        """,
-        )
-
+    migrate(DB_PATH, USERS_MIGRATIONS, USERS_INDEXES)
+    JOURNAL.replay(DB_PATH)
+    JOURNAL.open()
+    configure_user_cache()
+    RANKINGS.load(DB_PATH)
     logger.info("Database initalized.")
 
 
 class User:
     """User class containing user information."""
 
+    __slots__ = (
+        "__weakref__",
+        "_dirty_fields",
+        "_evicted",
+        "_last_seen",
+        "_level",
+        "_message_count",
+        "_money",
+        "_name",
+        "_prestige",
+        "id",
+    )
+
+    name: str = _Column(journaled=False, ranked=True)  # pyright: ignore[reportAssignmentType]
+    money: int = _Column(ranked=True, clamp=clamp_money)  # pyright: ignore[reportAssignmentType]
+    prestige: int = _Column(ranked=True)  # pyright: ignore[reportAssignmentType]
+    level: int = _Column(ranked=True)  # pyright: ignore[reportAssignmentType]
+    message_count: int = _Column()  # pyright: ignore[reportAssignmentType]
+    last_seen: int = _Column(journaled=False)  # pyright: ignore[reportAssignmentType]
+
     def __init__(
         self,
         id: int,  # noqa: A002 -- disabled for clarity, (I prefer id over user_id since user implied).
         name: str,
-        money: float,
+        money: int,
         prestige: int,
         level: int,
         message_count: int,
+        last_seen: int = 0,
     ) -> None:
         """Initialize a user.
 
         Args:
             id (int): Discord user ID.
             name (str): Discord username.
-            money (float): Money count.
+            money (int): Money in cents.
             prestige (int): Prestige count.
             level (int): Current level.
             message_count (int): Number of messages sent.
+            last_seen (int): Unix time of the user's last message.
         """
-        self._initialized: bool = (
-            False  # This is so __setattr__ doesn't get triggered during init.
-        )
+        # Set the slots directly so loading a user doesn't mark anything as changed.
         self.id: int = id
-        self.name: str = name
-        self.money: float = money
-        self.prestige: int = prestige
-        self.level: int = level
-        self.message_count: int = message_count
-        self.dirty: bool = False
-        self._initialized = True
+        self._name: str = name
+        self._money: int = money
+        self._prestige: int = prestige
+        self._level: int = level
+        self._message_count: int = message_count
+        self._last_seen: int = last_seen
+        self._dirty_fields: int = 0
+        self._evicted: bool = False
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the user has unsaved changes.
+
+        Returns:
+            bool: True if any column changed since the last save.
+        """
+        return self._dirty_fields != 0
 
-    def __setattr__(self, key: str, value: Any) -> None:
-        """Mark users as dirty whenever an attribute changes.
+    @dirty.setter
+    def dirty(self, value: bool) -> None:
+        """Mark every column as changed, or none of them.
 
         Args:
-            key (str): Attribute name being set.
-            value (Any): New value being assigned to attribute.
+            value (bool): New dirty state.
         """
-        if getattr(self, "_initialized", False) and key not in {
-            "dirty",
-            "_initialized",
-        }:
-            object.__setattr__(self, "dirty", True)
-        object.__setattr__(self, key, value)
+        self._dirty_fields = (1 << len(USER_COLUMNS)) - 1 if value else 0
 
     @classmethod
     def from_db(cls, user_id: int) -> Self | None:
@@ -94,22 +236,29 @@ class User:
         Returns:
             User | None: User instance if found, otherwise None.
         """
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor: sqlite3.Cursor = conn.execute(
-                "SELECT * FROM users WHERE id = ?",
-                (user_id,),
-            )
-            row: Any = cursor.fetchone()
+        row: tuple[Any, ...] | None = fetch_user_row(user_id)
+        return None if row is None else cls(*row)
 
-        if row is None:
-            return None
+    @classmethod
+    async def from_db_async(cls, user_id: int) -> Self | None:
+        """Load a user from the database on the reader pool.
 
-        return cls(*row)
+        Args:
+            user_id (int): Discord user ID.
+
+        Returns:
+            User | None: User instance if found, otherwise None.
+        """
+        row: tuple[Any, ...] | None = await run_read(fetch_user_row, user_id)
+        return None if row is None else cls(*row)
 
     @classmethod
     def create_if_not_exists(cls, user_id: int, username: str) -> "User":
         """Create a new user if they don't exist in the database.
 
+        Blocks on the database when the user isn't cached, so coroutines should use
+        create_if_not_exists_async.
+
         Args:
             user_id (int): Discord user ID.
             username (str): Discord username.
@@ -117,54 +266,105 @@ class User:
         Returns:
             User: The existing or newly created user instance.
         """
-        if user_id in USER_CACHE:
-            return USER_CACHE[user_id]
+        user: User | None = USER_CACHE.get(user_id)
+        if user is not None:
+            return user
 
-        user: User | None = cls.from_db(user_id=user_id)
-        if user is None:
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.execute(
-                    "INSERT INTO users (id, name) VALUES (?, ?)",
-                    (user_id, username),
-                )
-                conn.commit()
-            user = cls.from_db(user_id)
+        row: tuple[Any, ...] | None = fetch_user_row(user_id)
+        if row is None:
+            insert_user_row(user_id, username)
+            row = fetch_user_row(user_id)
+
+        user = cls(*row)  # pyright: ignore[reportOptionalIterable]
+        USER_CACHE[user_id] = user
+        user.add_to_rankings()
+        return user
+
+    @classmethod
+    async def create_if_not_exists_async(cls, user_id: int, username: str) -> "User":
+        """Create a new user if they don't exist, without blocking the event loop.
+
+        The lookup runs on the reader pool and a new user is inserted by the writer thread.
+
+        Args:
+            user_id (int): Discord user ID.
+            username (str): Discord username.
 
-        USER_CACHE[user_id] = user  # pyright: ignore[reportArgumentType]
-        return user  # pyright: ignore[reportReturnType]
+        Returns:
+            User: The existing or newly created user instance.
+        """
+        user: User | None = USER_CACHE.get(user_id)
+        if user is not None:
+            return user
+
+        row: tuple[Any, ...] | None = await run_read(fetch_user_row, user_id)
+        if row is None:
+            await run_write(DB_PATH, insert_user_row, user_id, username)
+            row = await run_read(fetch_user_row, user_id)
+
+        # Another task may have cached the same user while this one was waiting, and there
+        # must only ever be one User object per ID.
+        user = USER_CACHE.get(user_id)
+        if user is None:
+            user = cls(*row)  # pyright: ignore[reportOptionalIterable]
+            USER_CACHE[user_id] = user
+            user.add_to_rankings()
+        return user
 
     def save(self) -> None:
-        """Save user's current state to database."""
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.execute(
-                """
-                UPDATE users
-                SET name = ?, money = ?, prestige = ?, level = ?, message_count = ?
-                WHERE id = ?
-                """,
-                (
-                    self.name,
-                    self.money,
-                    self.prestige,
-                    self.level,
-                    self.message_count,
-                    self.id,
-                ),
-            )
-            conn.commit()
-        self.dirty = False
+        """Save the user's changed columns to database."""
+        mask: int = self._dirty_fields
+        if not mask:
+            return
+        with connect(DB_PATH) as conn:
+            conn.execute(update_sql(mask), self.to_row(mask))
+        self._dirty_fields = 0
+
+    def to_row(self, mask: int) -> tuple[Any, ...]:
+        """Get the parameters for update_sql(mask).
+
+        Args:
+            mask (int): Bitmask of columns to include.
+
+        Returns:
+            tuple[Any, ...]: Changed column values followed by the user ID.
+        """
+        values: list[Any] = [
+            getattr(self, column) for i, column in enumerate(USER_COLUMNS) if mask & (1 << i)
+        ]
+        values.append(self.id)
+        return tuple(values)
+
+    def add_to_rankings(self) -> None:
+        """Index the user in RANKINGS if they aren't yet, e.g. when just created."""
+        values: dict[str, int] = {column: getattr(self, column) for column in RANKED_COLUMNS}
+        RANKINGS.add(self.id, self.name, values)
+
+    def touch(self) -> None:
+        """Record that the user was just active."""
+        now: int = int(time.time())
+        if now - self.last_seen >= LAST_SEEN_RESOLUTION:
+            self.last_seen = now
+
+    @property
+    def next_level_threshold(self) -> int:
+        """Total messages needed for the user's next level.
+
+        Returns:
+            int: Message count at which the user levels up.
+        """
+        return messages_for_level(self.level)
 
     def level_up_if_able(self) -> bool:
-        """Level up user if they have required message count.
+        """Level up user as far as their message count allows.
 
         Returns:
             bool: Level up successful.
         """
-        required_messages: float = 2 * (self.level**2) + (50 * self.level) + 100
-        if self.message_count >= required_messages:
-            self.level += 1
-            return True
-        return False
+        if self.message_count < messages_for_level(self.level):
+            return False
+        self.level = max(self.level, level_for_messages(self.message_count))
+        return True
 
     def __repr__(self) -> str:
         """__repr__ for object.
@@ -179,22 +379,320 @@ class User:
         )
 
 
+class UserCache:
+    """LRU cache of users that writes dirty users back when they're evicted.
+
+    Evicted users that are still dirty stay reachable until autosave has written them.
+    Evicted users that are still referenced elsewhere (e.g. by a command waiting on an
+    answer) are tracked weakly, so looking them up again returns the same object instead
+    of a second copy loaded from the database.
+    """
+
+    def __init__(self, max_users: int) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_users (int): Maximum number of users kept in the LRU.
+        """
+        self.max_users: int = max_users
+        self._users: OrderedDict[int, User] = OrderedDict()
+        self._write_back: dict[int, User] = {}
+        self._evicted: weakref.WeakValueDictionary[int, User] = weakref.WeakValueDictionary()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, user_id: int) -> User | None:
+        """Look up a user, marking it as recently used.
+
+        Args:
+            user_id (int): Discord user ID.
+
+        Returns:
+            User | None: The cached user, or None on a miss.
+        """
+        user: User | None = self._users.get(user_id)
+        if user is not None:
+            self._users.move_to_end(user_id)
+            self.hits += 1
+            return user
+
+        user = self._write_back.get(user_id) or self._evicted.get(user_id)
+        if user is not None:
+            self.hits += 1
+            self[user_id] = user
+            return user
+
+        self.misses += 1
+        return None
+
+    def __setitem__(self, user_id: int, user: User) -> None:
+        """Add a user, evicting the least recently used ones if over capacity.
+
+        Args:
+            user_id (int): Discord user ID.
+            user (User): User to cache.
+        """
+        self._write_back.pop(user_id, None)
+        self._evicted.pop(user_id, None)
+        user._evicted = False  # noqa: SLF001
+        self._users[user_id] = user
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        """Evict the least recently used user."""
+        user_id: int
+        user: User
+        user_id, user = self._users.popitem(last=False)
+        user._evicted = True  # noqa: SLF001
+        self.evictions += 1
+        if user.dirty:
+            self._write_back[user_id] = user
+        else:
+            self._evicted[user_id] = user
+
+    def __getitem__(self, user_id: int) -> User:
+        """Get a cached user without touching stats or recency.
+
+        Args:
+            user_id (int): Discord user ID.
+
+        Returns:
+            User: The cached user.
+        """
+        return self._users[user_id]
+
+    def __contains__(self, user_id: object) -> bool:
+        """Whether a user is in the LRU.
+
+        Args:
+            user_id (object): Discord user ID.
+
+        Returns:
+            bool: True if cached.
+        """
+        return user_id in self._users
+
+    def __len__(self) -> int:
+        """Number of users in the LRU.
+
+        Returns:
+            int: Cached user count.
+        """
+        return len(self._users)
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over cached user IDs.
+
+        Returns:
+            Iterator[int]: User IDs, least recently used first.
+        """
+        return iter(self._users)
+
+    def values(self) -> list[User]:
+        """Get every user that may need saving.
+
+        Includes evicted users waiting to be written back. Ones that have since been
+        saved are released here.
+
+        Returns:
+            list[User]: Cached users followed by evicted dirty users.
+        """
+        for user_id, user in list(self._write_back.items()):
+            if not user.dirty:
+                del self._write_back[user_id]
+                self._evicted[user_id] = user
+        return [*self._users.values(), *self._write_back.values()]
+
+    def resize(self, max_users: int) -> None:
+        """Change the capacity, evicting users if it shrank.
+
+        Args:
+            max_users (int): New maximum number of users.
+        """
+        self.max_users = max_users
+        while len(self._users) > self.max_users:
+            self._evict_oldest()
+
+    def stats(self) -> dict[str, int | float]:
+        """Get cache counters.
+
+        Returns:
+            dict[str, int | float]: Size, capacity, hits, misses, evictions and hit rate.
+        """
+        lookups: int = self.hits + self.misses
+        return {
+            "size": len(self._users),
+            "max_users": self.max_users,
+            "pending_write_back": len(self._write_back),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+USER_CACHE: UserCache = UserCache(DEFAULT_CACHE_MAX_USERS)
+
+
+def fetch_user_row(user_id: int) -> tuple[Any, ...] | None:
+    """Read one user's row.
+
+    Args:
+        user_id (int): Discord user ID.
+
+    Returns:
+        tuple[Any, ...] | None: Arguments for User(), or None if the user doesn't exist.
+    """
+    with connect(DB_PATH) as conn:
+        return conn.execute(
+            f"SELECT {SELECT_USER_COLUMNS} FROM users WHERE id = ?",  # noqa: S608
+            (user_id,),
+        ).fetchone()
+
+
+def insert_user_row(user_id: int, username: str) -> None:
+    """Insert a new user, doing nothing if they already exist.
+
+    Args:
+        user_id (int): Discord user ID.
+        username (str): Discord username.
+    """
+    with connect(DB_PATH) as conn:
+        conn.execute("INSERT OR IGNORE INTO users (id, name) VALUES (?, ?)", (user_id, username))
+
+
+def write_user_rows(batches: DirtyRows) -> None:
+    """Write many users' changes in a single transaction.
+
+    Args:
+        batches (DirtyRows): Rows grouped by the bitmask of columns they update.
+    """
+    with connect(DB_PATH) as conn:
+        for mask, rows in batches.items():
+            conn.executemany(update_sql(mask), rows)
+
+
+def collect_dirty_rows() -> tuple[list[tuple[User, int]], DirtyRows]:
+    """Snapshot every dirty cached user and clear their dirty flags.
+
+    This has to run on the event loop thread so the snapshot can't interleave with
+    changes made by commands.
+
+    Returns:
+        tuple[list[tuple[User, int]], DirtyRows]: The dirty users with the columns that
+            changed, and their rows grouped by changed columns.
+    """
+    dirty_users: list[tuple[User, int]] = []
+    batches: DirtyRows = {}
+    for user in USER_CACHE.values():
+        mask: int = user._dirty_fields  # noqa: SLF001
+        if not mask:
+            continue
+        dirty_users.append((user, mask))
+        batches.setdefault(mask, []).append(user.to_row(mask))
+        user._dirty_fields = 0  # noqa: SLF001
+    return dirty_users, batches
+
+
 async def autosave() -> None:
-    """Periodically save all unsaved users to the database."""
+    """Periodically flush all unsaved users to the database in one transaction."""
     while True:
-        dirty_users: list[User] = [u for u in USER_CACHE.values() if u.dirty]
-        if dirty_users:
-            logger.debug("Saving unsaved users.")
-            for user in dirty_users:
-                user.save()
         await asyncio.sleep(SAVE_INTERVAL)
 
+        dirty_users: list[tuple[User, int]]
+        batches: DirtyRows
+        dirty_users, batches = collect_dirty_rows()
+        sealed: int | None = JOURNAL.rotate()
+        if not batches:
+            if sealed is not None:
+                JOURNAL.discard_through(sealed)
+            continue
+
+        start: float = time.perf_counter()
+        try:
+            await run_write(DB_PATH, write_user_rows, batches)
+        except (sqlite3.Error, OverflowError) as e:
+            for user, mask in dirty_users:
+                user._dirty_fields |= mask  # noqa: SLF001
+            logger.error(f"Autosave of {len(dirty_users)} users failed: {e}")
+            continue
+
+        if sealed is not None:
+            JOURNAL.discard_through(sealed)
+
+        elapsed_ms: float = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Autosaved {len(dirty_users)} users ({len(batches)} column sets) "
+            f"in {elapsed_ms:.1f} ms.",
+        )
+        logger.debug(f"User cache stats: {USER_CACHE.stats()}")
+
+
+def fetch_active_user_rows(limit: int) -> list[tuple[Any, ...]]:
+    """Stream the most recently active users out of the database.
+
+    Args:
+        limit (int): Maximum number of rows.
+
+    Returns:
+        list[tuple[Any, ...]]: User rows, most recently active first.
+    """
+    with connect(DB_PATH) as conn:
+        cursor: sqlite3.Cursor = conn.execute(
+            f"""
+            SELECT {SELECT_USER_COLUMNS} FROM users
+            ORDER BY last_seen DESC, message_count DESC
+            LIMIT ?
+            """,  # noqa: S608
+            (limit,),
+        )
+        cursor.arraysize = 500
+        rows: list[tuple[Any, ...]] = []
+        while batch := cursor.fetchmany():
+            rows.extend(batch)
+    return rows
+
+
+async def preload_users(limit: int, max_bytes: int) -> int:
+    """Warm USER_CACHE with the most recently active users.
+
+    Args:
+        limit (int): Maximum number of users to load.
+        max_bytes (int): Memory budget for the loaded users.
+
+    Returns:
+        int: Number of users added to the cache.
+    """
+    limit = min(limit, max_bytes // ESTIMATED_USER_BYTES, USER_CACHE.max_users)
+    if limit <= 0:
+        return 0
+
+    start: float = time.perf_counter()
+    rows: list[tuple[Any, ...]] = await run_read(fetch_active_user_rows, limit)
+
+    loaded: int = 0
+    for row in reversed(rows):  # Least active first so the most active end up most recent.
+        if row[0] in USER_CACHE:
+            continue
+        USER_CACHE[row[0]] = User(*row)
+        loaded += 1
+
+    elapsed_ms: float = (time.perf_counter() - start) * 1000
+    logger.info(f"Preloaded {loaded} users into the cache in {elapsed_ms:.1f} ms.")
+    return loaded
+
 
 def save_all_users() -> None:
     """Save all users to database when shutting down bot."""
-    for user in USER_CACHE.values():
-        if user.dirty:
-            user.save()
+    batches: DirtyRows
+    _, batches = collect_dirty_rows()
+    if batches:
+        write_user_rows(batches)
+    JOURNAL.truncate()
+    JOURNAL.close()
     logger.info("All users saved.")
 
 
@@ -0,0 +1,347 @@
+"""Shared HTTP client for outgoing API calls.
+
+One aiohttp session is kept for the life of the bot, so connections (and their TLS sessions)
+are pooled and kept alive between calls instead of being set up for every request. Every
+call has a deadline covering all of its attempts. Connection errors and overload statuses
+are retried with exponential backoff and full jitter, so many callers failing at once don't
+all retry in lockstep.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from functools import partial
+from typing import Any, TypeVar
+
+import aiohttp
+from log import logger
+
+T = TypeVar("T")
+
+DEFAULT_DEADLINE: float = 15.0  # Seconds for a whole call, retries included.
+DEFAULT_STREAM_DEADLINE: float = 60.0  # Seconds for a whole streamed response.
+STREAM_IDLE_TIMEOUT: float = 15.0  # Seconds to wait for the next chunk of a stream.
+DEFAULT_RETRIES: int = 2
+RETRY_BACKOFF: float = 0.5  # Seconds, doubled after every attempt before jitter.
+RETRY_STATUSES: frozenset[int] = frozenset({408, 429, 500, 502, 503, 504})
+POOL_LIMIT: int = 20  # Open connections across all hosts.
+KEEPALIVE_TIMEOUT: float = 60.0  # Seconds an idle connection is kept for reuse.
+CONNECT_TIMEOUT: float = 10.0
+LATENCY_SAMPLES: int = 500  # Recent calls kept for percentiles.
+STATS_LOG_EVERY: int = 100  # Calls between latency summaries in the log.
+
+
+class HttpError(Exception):
+    """An API answered with an error status."""
+
+    def __init__(self, status: int, body: str) -> None:
+        """Initialize the error.
+
+        Args:
+            status (int): HTTP status.
+            body (str): Response body, for the log.
+        """
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status: int = status
+        self.body: str = body
+
+    @property
+    def retryable(self) -> bool:
+        """Whether the same request may succeed if sent again.
+
+        Returns:
+            bool: True for timeouts, rate limits and server errors.
+        """
+        return self.status in RETRY_STATUSES
+
+
+class LatencyStats:
+    """Counts and response times of the calls made through a client."""
+
+    __slots__ = ("_samples", "errors", "requests", "retries")
+
+    def __init__(self, samples: int = LATENCY_SAMPLES) -> None:
+        """Initialize empty stats.
+
+        Args:
+            samples (int): Recent response times kept for percentiles.
+        """
+        self.requests: int = 0
+        self.errors: int = 0
+        self.retries: int = 0
+        self._samples: deque[float] = deque(maxlen=samples)
+
+    def record(self, seconds: float) -> None:
+        """Record the response time of a successful call.
+
+        Args:
+            seconds (float): Time from the first attempt to the parsed response.
+        """
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        """Get a percentile of recent response times.
+
+        Args:
+            pct (float): Percentile, 0 to 100.
+
+        Returns:
+            float: Seconds, 0 if nothing was recorded yet.
+        """
+        if not self._samples:
+            return 0.0
+        ordered: list[float] = sorted(self._samples)
+        return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+    def summary(self) -> str:
+        """Describe the stats in one line.
+
+        Returns:
+            str: e.g. ``120 calls, 2 errors, 3 retries, p50 850 ms, p95 2100 ms``.
+        """
+        return (
+            f"{self.requests} calls, {self.errors} errors, {self.retries} retries, "
+            f"p50 {self.percentile(50) * 1000:.0f} ms, p95 {self.percentile(95) * 1000:.0f} ms"
+        )
+
+
+class HttpClient:
+    """Long-lived, pooled aiohttp session with deadlines, retries and latency stats."""
+
+    def __init__(
+        self,
+        pool_limit: int = POOL_LIMIT,
+        keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+    ) -> None:
+        """Initialize the client. The session is opened by start().
+
+        Args:
+            pool_limit (int): Open connections across all hosts. Defaults to POOL_LIMIT.
+            keepalive_timeout (float): Seconds an idle connection is kept. Defaults to
+                KEEPALIVE_TIMEOUT.
+        """
+        self.pool_limit: int = pool_limit
+        self.keepalive_timeout: float = keepalive_timeout
+        self.stats: LatencyStats = LatencyStats()
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        """Open the session, must be called from the event loop it will be used on."""
+        if self._session is not None:
+            return
+        connector: aiohttp.TCPConnector = aiohttp.TCPConnector(
+            limit=self.pool_limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            # Deadlines are enforced per call, this only bounds connecting.
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=CONNECT_TIMEOUT),
+        )
+
+    async def close(self) -> None:
+        """Close the session and every pooled connection."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The open session.
+
+        Returns:
+            aiohttp.ClientSession: Session.
+
+        Raises:
+            RuntimeError: If start() wasn't called.
+        """
+        if self._session is None:
+            msg: str = "HttpClient.start() must be called before making requests."
+            raise RuntimeError(msg)
+        return self._session
+
+    async def post_json(
+        self,
+        url: str,
+        payload: Any,
+        headers: Mapping[str, str] | None = None,
+        deadline: float = DEFAULT_DEADLINE,
+        retries: int = DEFAULT_RETRIES,
+    ) -> Any:
+        """POST a JSON body and parse the JSON response.
+
+        Args:
+            url (str): Endpoint.
+            payload (Any): JSON-serializable body.
+            headers (Mapping[str, str] | None): Extra headers.
+            deadline (float): Seconds for the whole call, retries included.
+            retries (int): Attempts after the first for retryable failures.
+
+        Returns:
+            Any: Parsed response body.
+
+        Raises:
+            TimeoutError: If the deadline passes.
+            HttpError: If the API answers with an error status.
+            aiohttp.ClientError: If the request still fails after every retry.
+        """
+        self.stats.requests += 1
+        start: float = time.perf_counter()
+        try:
+            async with asyncio.timeout(deadline):
+                data: Any = await self._retrying(
+                    url,
+                    partial(self._post_once, url, payload, headers),
+                    retries,
+                )
+        except (TimeoutError, aiohttp.ClientError, HttpError):
+            self.stats.errors += 1
+            raise
+
+        self.stats.record(time.perf_counter() - start)
+        if self.stats.requests % STATS_LOG_EVERY == 0:
+            logger.info(f"HTTP client: {self.stats.summary()}.")
+        return data
+
+    async def _retrying(
+        self,
+        url: str,
+        attempt_fn: Callable[[], Awaitable[T]],
+        retries: int,
+    ) -> T:
+        """Run an attempt until it succeeds, fails for good or runs out of retries.
+
+        Args:
+            url (str): Endpoint, for the log.
+            attempt_fn (Callable[[], Awaitable[T]]): Makes one attempt.
+            retries (int): Attempts after the first.
+
+        Returns:
+            T: Result of the successful attempt.
+        """
+        attempt: int = 0
+        while True:
+            try:
+                return await attempt_fn()
+            except (aiohttp.ClientConnectionError, HttpError) as e:
+                if attempt >= retries or (isinstance(e, HttpError) and not e.retryable):
+                    raise
+                delay: float = random.uniform(0, RETRY_BACKOFF * 2**attempt)  # noqa: S311
+                attempt += 1
+                self.stats.retries += 1
+                logger.warning(f"Request to {url} failed ({e}), retry {attempt} in {delay:.2f}s.")
+                await asyncio.sleep(delay)
+
+    async def _post_once(
+        self,
+        url: str,
+        payload: Any,
+        headers: Mapping[str, str] | None,
+    ) -> Any:
+        """Make a single POST attempt.
+
+        Args:
+            url (str): Endpoint.
+            payload (Any): JSON-serializable body.
+            headers (Mapping[str, str] | None): Extra headers.
+
+        Returns:
+            Any: Parsed response body.
+
+        Raises:
+            HttpError: If the API answers with an error status.
+        """
+        async with self.session.post(url, json=payload, headers=headers) as response:
+            if response.status >= 400:  # noqa: PLR2004
+                raise HttpError(response.status, await response.text())
+            return await response.json(content_type=None)
+
+    async def stream_events(
+        self,
+        url: str,
+        payload: Any,
+        headers: Mapping[str, str] | None = None,
+        deadline: float = DEFAULT_STREAM_DEADLINE,
+        idle_timeout: float = STREAM_IDLE_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+    ) -> AsyncIterator[str]:
+        """POST a JSON body and yield the data of each server-sent event in the response.
+
+        Opening the stream is retried like post_json(). Once events are flowing a failure
+        is raised instead, since the caller has already used part of the response.
+
+        Args:
+            url (str): Endpoint.
+            payload (Any): JSON-serializable body.
+            headers (Mapping[str, str] | None): Extra headers.
+            deadline (float): Seconds for the whole stream, retries included.
+            idle_timeout (float): Seconds to wait for the next chunk of data.
+            retries (int): Attempts after the first for retryable failures.
+
+        Yields:
+            str: ``data:`` payload of each event, one line per event.
+
+        Raises:
+            TimeoutError: If the deadline or the idle timeout passes.
+            HttpError: If the API answers with an error status.
+            aiohttp.ClientError: If the request fails.
+        """
+        self.stats.requests += 1
+        start: float = time.perf_counter()
+        try:
+            response: aiohttp.ClientResponse = await self._retrying(
+                url,
+                partial(self._open_stream, url, payload, headers, start + deadline, idle_timeout),
+                retries,
+            )
+            async with response:
+                async for raw in response.content:
+                    line: str = raw.decode("utf-8").strip()
+                    if line.startswith("data:"):
+                        yield line.removeprefix("data:").lstrip()
+        except (TimeoutError, aiohttp.ClientError, HttpError):
+            self.stats.errors += 1
+            raise
+
+        self.stats.record(time.perf_counter() - start)
+
+    async def _open_stream(
+        self,
+        url: str,
+        payload: Any,
+        headers: Mapping[str, str] | None,
+        deadline_at: float,
+        idle_timeout: float,
+    ) -> aiohttp.ClientResponse:
+        """Send the request of a stream and check its status.
+
+        Args:
+            url (str): Endpoint.
+            payload (Any): JSON-serializable body.
+            headers (Mapping[str, str] | None): Extra headers.
+            deadline_at (float): time.perf_counter() value the whole stream must end by.
+            idle_timeout (float): Seconds to wait for the next chunk of data.
+
+        Returns:
+            aiohttp.ClientResponse: Response whose body hasn't been read yet.
+
+        Raises:
+            HttpError: If the API answers with an error status.
+        """
+        response: aiohttp.ClientResponse = await self.session.post(
+            url,
+            json=payload,
+            headers=headers,
+            # aiohttp's total covers reading the body too, so it ends the stream on time.
+            timeout=aiohttp.ClientTimeout(
+                total=max(deadline_at - time.perf_counter(), 0.001),
+                sock_read=idle_timeout,
+            ),
+        )
+        if response.status >= 400:  # noqa: PLR2004
+            async with response:
+                raise HttpError(response.status, await response.text())
+        return response
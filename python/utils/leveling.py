@@ -0,0 +1,60 @@
+"""Level progression util.
+
+Reaching level ``n + 1`` takes ``2n^2 + 50n + 100`` total messages. Inverting that quadratic
+gives the level for any message count directly, so a backfilled or imported count can jump
+many levels at once.
+"""
+
+from math import isqrt
+
+LEVEL_TABLE_SIZE: int = 1000
+
+
+def _threshold(level: int) -> int:
+    """Total messages required to reach level + 1.
+
+    Args:
+        level (int): Current level.
+
+    Returns:
+        int: Total messages required.
+    """
+    return 2 * (level**2) + (50 * level) + 100
+
+
+LEVEL_THRESHOLDS: tuple[int, ...] = tuple(_threshold(level) for level in range(LEVEL_TABLE_SIZE))
+
+
+def messages_for_level(level: int) -> int:
+    """Total messages required to level up from a given level.
+
+    Args:
+        level (int): Level to calculate messages for.
+
+    Returns:
+        int: Total messages required to reach level + 1.
+    """
+    if 0 <= level < LEVEL_TABLE_SIZE:
+        return LEVEL_THRESHOLDS[level]
+    return _threshold(level)
+
+
+def level_for_messages(message_count: int) -> int:
+    """Get the level a message count earns.
+
+    Args:
+        message_count (int): Total messages sent.
+
+    Returns:
+        int: Level reached with that many messages.
+    """
+    if message_count < LEVEL_THRESHOLDS[0]:
+        return 0
+
+    # Largest n with 2n^2 + 50n + 100 <= message_count, then nudge for isqrt rounding.
+    n: int = (isqrt(8 * message_count + 1700) - 50) // 4
+    while messages_for_level(n + 1) <= message_count:
+        n += 1
+    while messages_for_level(n) > message_count:
+        n -= 1
+    return n + 1
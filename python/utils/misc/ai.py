@@ -1,7 +1,31 @@
 """AI response utilities."""
 
-import requests
+import json
+import time
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from discord.abc import Messageable
 from log import logger
+from utils.http_client import HttpClient, HttpError
+
+if TYPE_CHECKING:
+    from discord import Message
+
+API_URL: str = "https://api.deepseek.com/v1/chat/completions"
+MODEL: str = "deepseek-chat"
+AI_DEADLINE: float = 15.0  # Seconds for a reply, retries included.
+AI_STREAM_DEADLINE: float = 60.0  # Seconds for a streamed reply, which can run longer.
+# Discord allows 5 edits per 5 seconds per channel, stay under that with room to spare.
+STREAM_EDIT_INTERVAL: float = 1.2
+DISCORD_MESSAGE_LIMIT: int = 2000
+
+TIMEOUT_REPLY: str = "The request timed out. Try again later."
+ERROR_REPLY: str = "Something went wrong generating a response."
+EMPTY_REPLY: str = "I couldn't generate a response right now. Try again later."
+CUT_OFF_NOTE: str = " … *(response cut off)*"
+FAILURE_REPLIES: frozenset[str] = frozenset({TIMEOUT_REPLY, ERROR_REPLY, EMPTY_REPLY})
 
 SYSTEM_NOTE: str = """You are being used as a chatbot in a discord bot known as Dizznem bot.
 You are to respond as if you are Dizznem bot AI.
@@ -12,10 +36,35 @@ Only include relevant information in your response, if nothing is relevant here,
 Don't include any reference to this note in your response!"""
 
 
-def get_ai_response(prompt: str, api_key: str, cache: list[dict]) -> str:
+def build_request(prompt: str, cache: list[dict], *, stream: bool = False) -> dict[str, Any]:
+    """Build a chat completion request body.
+
+    Args:
+        prompt (str): The user's prompt.
+        cache (list[dict]): A list of previous messages for context.
+        stream (bool): Whether to ask for server-sent events. Defaults to False.
+
+    Returns:
+        dict[str, Any]: JSON body.
+    """
+    body: dict[str, Any] = {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_NOTE},
+            *cache,
+            {"role": "user", "content": prompt},
+        ],
+    }
+    if stream:
+        body["stream"] = True
+    return body
+
+
+async def get_ai_response(client: HttpClient, prompt: str, api_key: str, cache: list[dict]) -> str:
     """Get an AI response from DeepSeek.
 
     Args:
+        client (HttpClient): The bot's HTTP client.
         prompt (str): The user's prompt.
         api_key (str): DeepSeek API key.
         cache (list[dict]): A list of previous messages for context.
@@ -23,33 +72,162 @@ def get_ai_response(prompt: str, api_key: str, cache: list[dict]) -> str:
     Returns:
         str: The AI response.
     """
+    start: float = time.perf_counter()
     try:
-        response: requests.Response = requests.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "system", "content": SYSTEM_NOTE},
-                    *cache,
-                    {"role": "user", "content": prompt},
-                ],
-            },
-            timeout=15,
-        )
-        data: dict = response.json()
-        if "choices" in data and len(data["choices"]) > 0:
-            return data["choices"][0]["message"]["content"].strip()
-        logger.error(f"Unexpected DeepSeek API response: {data}")
-        return (  # noqa: TRY300
-            "I couldn't generate a response right now. Try again later."
+        data: Any = await client.post_json(
+            API_URL,
+            build_request(prompt, cache),
+            headers={"Authorization": f"Bearer {api_key}"},
+            deadline=AI_DEADLINE,
         )
-    except requests.Timeout:
+    except TimeoutError:
         logger.error("DeepSeek API request timed out.")
-        return "The request timed out. Try again later."
-    except requests.RequestException as e:
+        return TIMEOUT_REPLY
+    except (aiohttp.ClientError, HttpError, ValueError) as e:
         logger.exception("Error generating AI response.", exc_info=e)
-        return "Something went wrong generating a response."
+        return ERROR_REPLY
+
+    if isinstance(data, dict) and data.get("choices"):
+        logger.info(f"AI response complete after {(time.perf_counter() - start) * 1000:.0f} ms.")
+        return data["choices"][0]["message"]["content"].strip()
+    logger.error(f"Unexpected DeepSeek API response: {data}")
+    return EMPTY_REPLY
+
+
+def is_failure(reply: str) -> bool:
+    """Check whether a reply is one of the fallbacks given when the API call failed.
+
+    Args:
+        reply (str): Reply from get_ai_response() or a finished StreamedReply.
+
+    Returns:
+        bool: True if the API call failed, even part way through a stream.
+    """
+    return reply in FAILURE_REPLIES or reply.endswith(CUT_OFF_NOTE.strip())
+
+
+def parse_delta(data: str) -> str:
+    """Get the text of one streamed completion chunk.
+
+    Args:
+        data (str): ``data:`` payload of a server-sent event.
+
+    Returns:
+        str: New text, empty for chunks without any (e.g. the role or finish reason).
+    """
+    try:
+        chunk: Any = json.loads(data)
+        return chunk["choices"][0]["delta"].get("content") or ""
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        logger.warning(f"Unexpected DeepSeek stream chunk: {data[:200]}")
+        return ""
+
+
+async def stream_ai_response(
+    client: HttpClient,
+    prompt: str,
+    api_key: str,
+    cache: list[dict],
+) -> AsyncIterator[str]:
+    """Stream an AI response from DeepSeek as it is generated.
+
+    Failures end the stream with the reply get_ai_response() would give, or with
+    CUT_OFF_NOTE if part of the response was already yielded.
+
+    Args:
+        client (HttpClient): The bot's HTTP client.
+        prompt (str): The user's prompt.
+        api_key (str): DeepSeek API key.
+        cache (list[dict]): A list of previous messages for context.
+
+    Yields:
+        str: Pieces of the response, in order.
+    """
+    start: float = time.perf_counter()
+    first_token: float | None = None
+    try:
+        async for data in client.stream_events(
+            API_URL,
+            build_request(prompt, cache, stream=True),
+            headers={"Authorization": f"Bearer {api_key}"},
+            deadline=AI_STREAM_DEADLINE,
+        ):
+            if data == "[DONE]":
+                break
+            piece: str = parse_delta(data)
+            if first_token is None:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                first_token = time.perf_counter() - start
+                logger.info(f"AI stream first token after {first_token * 1000:.0f} ms.")
+            if piece:
+                yield piece
+    except TimeoutError:
+        logger.error("DeepSeek API stream timed out.")
+        yield TIMEOUT_REPLY if first_token is None else CUT_OFF_NOTE
+        return
+    except (aiohttp.ClientError, HttpError) as e:
+        logger.exception("Error streaming AI response.", exc_info=e)
+        yield ERROR_REPLY if first_token is None else CUT_OFF_NOTE
+        return
+
+    if first_token is None:
+        logger.error("DeepSeek API stream ended without any text.")
+        yield EMPTY_REPLY
+        return
+    logger.info(f"AI stream complete after {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+
+class StreamedReply:
+    """A Discord message that grows as pieces of a reply arrive.
+
+    The message is sent with the first piece and then edited at most every
+    STREAM_EDIT_INTERVAL seconds. finish() makes sure the last edit shows the whole reply.
+    """
+
+    __slots__ = ("_channel", "_last_edit", "_message", "_shown", "text")
+
+    def __init__(self, channel: Messageable) -> None:
+        """Initialize an empty reply.
+
+        Args:
+            channel (Messageable): Where to send the reply.
+        """
+        self._channel: Messageable = channel
+        self._message: Message | None = None
+        self._last_edit: float = 0.0
+        self._shown: str = ""
+        self.text: str = ""
+
+    async def add(self, piece: str) -> None:
+        """Append a piece, updating the message if enough time passed since the last edit.
+
+        Args:
+            piece (str): Next piece of the reply.
+        """
+        self.text += piece
+        if time.monotonic() - self._last_edit >= STREAM_EDIT_INTERVAL:
+            await self._show()
+
+    async def finish(self) -> str:
+        """Show the complete reply.
+
+        Returns:
+            str: The complete reply.
+        """
+        self.text = self.text.strip() or EMPTY_REPLY
+        await self._show()
+        return self.text
+
+    async def _show(self) -> None:
+        """Send or edit the message to show the reply so far."""
+        visible: str = self.text[:DISCORD_MESSAGE_LIMIT]
+        if not visible.strip() or visible == self._shown:
+            return
+        if self._message is None:
+            self._message = await self._channel.send(visible)
+        else:
+            await self._message.edit(content=visible)
+        self._shown = visible
+        self._last_edit = time.monotonic()
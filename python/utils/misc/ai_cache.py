@@ -0,0 +1,194 @@
+"""Cache of AI replies, with identical requests in flight coalesced into one API call."""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from utils.misc.ai import is_failure
+
+CACHE_SIZE: int = int(os.getenv("AI_CACHE_SIZE") or 256)  # 0 disables caching.
+CACHE_TTL: float = float(os.getenv("AI_CACHE_TTL") or 3600)  # Seconds a reply is reused.
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so trivially different spellings share a cache entry.
+
+    Args:
+        prompt (str): The user's prompt.
+
+    Returns:
+        str: Lowercased, with whitespace collapsed and trailing punctuation removed.
+    """
+    return " ".join(prompt.lower().split()).rstrip("?!. ")
+
+
+def context_hash(context: list[dict]) -> str:
+    """Hash the conversation a prompt is sent with.
+
+    Args:
+        context (list[dict]): Earlier messages sent along with the prompt.
+
+    Returns:
+        str: Hex digest, equal only for identical conversations.
+    """
+    data: bytes = json.dumps(context, sort_keys=True, ensure_ascii=False).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class AiReplyCache:
+    """LRU cache of AI replies with a TTL.
+
+    Keys include the whole conversation the prompt is sent with, so a reply is only reused
+    for the same question asked in the same context, never across unrelated conversations.
+    Fallback replies from failed API calls are shared with coalesced requests but never
+    cached.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_size (int): Replies kept, 0 disables caching. Defaults to CACHE_SIZE.
+            ttl (float): Seconds a reply is reused. Defaults to CACHE_TTL.
+        """
+        self.max_size: int = max_size
+        self.ttl: float = ttl
+        self.hits: int = 0
+        self.coalesced: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._pending: dict[str, asyncio.Future[str | None]] = {}
+        self._generation: int = 0
+        self._pending_generation: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Count cached replies, expired ones included until they are looked up.
+
+        Returns:
+            int: Cached replies.
+        """
+        return len(self._entries)
+
+    @staticmethod
+    def key(prompt: str, context: list[dict]) -> str:
+        """Build the cache key of a request.
+
+        Args:
+            prompt (str): The user's prompt.
+            context (list[dict]): Earlier messages sent along with the prompt.
+
+        Returns:
+            str: Cache key.
+        """
+        return f"{context_hash(context)}:{normalize_prompt(prompt)}"
+
+    async def get_or_wait(self, key: str) -> str | None:
+        """Get a cached reply, or wait for an identical request already in flight.
+
+        A None result makes the caller responsible for the request: it must call
+        resolve() with the reply, or with None if it couldn't get one, when done.
+
+        Args:
+            key (str): From key().
+
+        Returns:
+            str | None: Reply to reuse, None if the caller has to request one.
+        """
+        while True:
+            cached: str | None = self._get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            pending: asyncio.Future[str | None] | None = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                self._pending[key] = asyncio.get_running_loop().create_future()
+                self._pending_generation[key] = self._generation
+                return None
+            reply: str | None = await asyncio.shield(pending)
+            if reply is not None:
+                self.coalesced += 1
+                return reply
+            # The request we waited on gave up, try again (possibly taking it over).
+
+    def resolve(self, key: str, reply: str | None) -> None:
+        """Finish a request that get_or_wait() handed to the caller.
+
+        Args:
+            key (str): From key().
+            reply (str | None): The reply, None if the request failed without one.
+        """
+        pending: asyncio.Future[str | None] | None = self._pending.pop(key, None)
+        generation: int | None = self._pending_generation.pop(key, None)
+        if reply is not None and not is_failure(reply) and generation == self._generation:
+            self._put(key, reply)
+        if pending is not None and not pending.done():
+            pending.set_result(reply)
+
+    def flush(self) -> int:
+        """Drop every cached reply. Requests in flight finish but aren't cached.
+
+        Returns:
+            int: Replies dropped.
+        """
+        dropped: int = len(self._entries)
+        self._entries.clear()
+        self._generation += 1
+        return dropped
+
+    def _get(self, key: str) -> str | None:
+        """Look up a reply that hasn't expired, marking it recently used.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            str | None: Cached reply.
+        """
+        entry: tuple[float, str] | None = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key: str, reply: str) -> None:
+        """Cache a reply, evicting the least recently used ones over max_size.
+
+        Args:
+            key (str): Cache key.
+            reply (str): Reply to cache.
+        """
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, reply)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered without a new API call.
+
+        Returns:
+            float: 0 to 1, 0 before any lookup.
+        """
+        lookups: int = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        """Describe the cache in one line.
+
+        Returns:
+            str: e.g. ``12/256 cached, 30 hits, 2 coalesced, 70 misses (32% hit rate)``.
+        """
+        return (
+            f"{len(self._entries)}/{self.max_size} cached, {self.hits} hits, "
+            f"{self.coalesced} coalesced, {self.misses} misses "
+            f"({self.hit_rate:.0%} hit rate)"
+        )
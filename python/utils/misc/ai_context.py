@@ -0,0 +1,200 @@
+"""Per-channel AI conversation memory, bounded by an estimated token budget."""
+
+import os
+from collections import deque
+
+from utils.expiring_map import ExpiringMap
+
+CONTEXT_TOKENS: int = int(os.getenv("AI_CONTEXT_TOKENS") or 2000)  # Budget for recent turns.
+SUMMARY_TOKENS: int = 200  # Budget for the summary of older turns.
+MAX_CHANNELS: int = int(os.getenv("AI_CONTEXT_CHANNELS") or 500)
+IDLE_TIMEOUT: float = 3600.0  # Seconds without a prompt before a channel is forgotten.
+CHARS_PER_TOKEN: int = 4  # Rough average for English text.
+MESSAGE_OVERHEAD: int = 4  # Tokens the API adds around every message.
+SUMMARY_SNIPPET: int = 120  # Characters of each message kept in the summary.
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the tokens a message costs.
+
+    Args:
+        text (str): Message content.
+
+    Returns:
+        int: Estimated tokens, including the per-message overhead.
+    """
+    return -(-len(text) // CHARS_PER_TOKEN) + MESSAGE_OVERHEAD
+
+
+def snippet(text: str) -> str:
+    """Shorten a message for the summary, to its first sentence or SUMMARY_SNIPPET characters.
+
+    Args:
+        text (str): Message content.
+
+    Returns:
+        str: Single-line snippet.
+    """
+    line: str = " ".join(text.split())
+    for end in (". ", "? ", "! "):
+        index: int = line.find(end)
+        if 0 < index < SUMMARY_SNIPPET:
+            line = line[: index + 1]
+    if len(line) > SUMMARY_SNIPPET:
+        line = line[: SUMMARY_SNIPPET - 1].rstrip() + "…"
+    return line
+
+
+class ChannelContext:
+    """Recent turns of one channel's conversation, plus a summary of older ones.
+
+    Turns are kept newest first until they fill the token budget. Older turns are folded
+    into a rolling summary made of a snippet of each side, itself trimmed oldest first to
+    SUMMARY_TOKENS. No API call is spent on summarizing.
+    """
+
+    __slots__ = ("_turns", "summary", "token_budget", "tokens")
+
+    def __init__(self, token_budget: int = CONTEXT_TOKENS) -> None:
+        """Initialize an empty conversation.
+
+        Args:
+            token_budget (int): Tokens the recent turns may use. Defaults to CONTEXT_TOKENS.
+        """
+        self.token_budget: int = token_budget
+        self.tokens: int = 0
+        self.summary: str = ""
+        self._turns: deque[tuple[str, str, int]] = deque()
+
+    def __len__(self) -> int:
+        """Count the recent turns kept in full.
+
+        Returns:
+            int: Turns.
+        """
+        return len(self._turns)
+
+    def add_turn(self, prompt: str, reply: str) -> None:
+        """Remember a prompt and its reply, compacting old turns over the budget.
+
+        Args:
+            prompt (str): The user's prompt.
+            reply (str): The AI reply.
+        """
+        tokens: int = estimate_tokens(prompt) + estimate_tokens(reply)
+        self._turns.append((prompt, reply, tokens))
+        self.tokens += tokens
+        # The newest turn is always kept whole, it's what the next prompt most likely follows.
+        while self.tokens > self.token_budget and len(self._turns) > 1:
+            old_prompt: str
+            old_reply: str
+            old_tokens: int
+            old_prompt, old_reply, old_tokens = self._turns.popleft()
+            self.tokens -= old_tokens
+            self._summarize(old_prompt, old_reply)
+
+    def _summarize(self, prompt: str, reply: str) -> None:
+        """Fold a turn into the rolling summary.
+
+        Args:
+            prompt (str): The user's prompt.
+            reply (str): The AI reply.
+        """
+        entry: str = f"User: {snippet(prompt)} You: {snippet(reply)}"
+        summary: str = f"{self.summary}\n{entry}" if self.summary else entry
+        limit: int = SUMMARY_TOKENS * CHARS_PER_TOKEN
+        if len(summary) > limit:
+            # Drop whole entries from the start where possible.
+            cut: int = summary.find("\n", len(summary) - limit)
+            summary = summary[cut + 1 :] if cut != -1 else summary[-limit:]
+        self.summary = summary
+
+    def messages(self) -> list[dict]:
+        """Build the context to send with the next prompt.
+
+        Returns:
+            list[dict]: The summary as a system message, if any, then the recent turns.
+        """
+        messages: list[dict] = []
+        if self.summary:
+            messages.append(
+                {
+                    "role": "system",
+                    "content": f"Earlier in this conversation:\n{self.summary}",
+                },
+            )
+        for prompt, reply, _ in self._turns:
+            messages.append({"role": "user", "content": prompt})
+            messages.append({"role": "assistant", "content": reply})
+        return messages
+
+
+class ConversationMemory:
+    """Conversations of the channels the bot was recently prompted in.
+
+    A channel is forgotten once idle for idle_timeout, or when it is the least recently
+    used one over max_channels.
+    """
+
+    def __init__(
+        self,
+        max_channels: int = MAX_CHANNELS,
+        idle_timeout: float = IDLE_TIMEOUT,
+        token_budget: int = CONTEXT_TOKENS,
+    ) -> None:
+        """Initialize with no conversations.
+
+        Args:
+            max_channels (int): Channels remembered at once. Defaults to MAX_CHANNELS.
+            idle_timeout (float): Seconds a channel is remembered without prompts.
+                Defaults to IDLE_TIMEOUT.
+            token_budget (int): Token budget of each channel. Defaults to CONTEXT_TOKENS.
+        """
+        self.token_budget: int = token_budget
+        self.channels: ExpiringMap[int, ChannelContext] = ExpiringMap(
+            idle_timeout,
+            max_size=max_channels,
+        )
+
+    def __len__(self) -> int:
+        """Count remembered channels.
+
+        Returns:
+            int: Channels.
+        """
+        return len(self.channels)
+
+    def __contains__(self, channel_id: int) -> bool:
+        """Check whether a channel's conversation is remembered.
+
+        Args:
+            channel_id (int): Discord channel ID.
+
+        Returns:
+            bool: True if it is.
+        """
+        return channel_id in self.channels
+
+    @property
+    def evicted(self) -> int:
+        """Channels forgotten so far, for being idle or over max_channels.
+
+        Returns:
+            int: Channels.
+        """
+        return self.channels.expired + self.channels.evicted
+
+    def get(self, channel_id: int) -> ChannelContext:
+        """Get a channel's conversation, starting one if needed, and mark it used.
+
+        Args:
+            channel_id (int): Discord channel ID.
+
+        Returns:
+            ChannelContext: The conversation.
+        """
+        context: ChannelContext | None = self.channels.get(channel_id)
+        if context is None:
+            context = ChannelContext(self.token_budget)
+        self.channels.set(channel_id, context)
+        return context
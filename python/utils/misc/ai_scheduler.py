@@ -0,0 +1,246 @@
+"""Fair scheduling of AI requests.
+
+Requests wait in one queue ordered by self-clocked fair queuing (SCFQ). Each request gets a
+finish tag: the later of the scheduler's virtual time and the last tag of its channel and of
+its user, plus a cost that grows with prompt length. The smallest tag runs next. A channel
+or user with many queued requests gets later and later tags, so a newcomer goes ahead of
+their backlog, and a short prompt goes ahead of a long one queued at the same time.
+
+How many requests run at once adapts with AIMD. The limit grows by about one for every
+limit's worth of quick, successful replies while there is demand for it, and halves (at
+most once per target latency) when replies fail or come back slower than the target.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from log import logger
+from utils.http_client import LatencyStats
+
+MAX_QUEUE: int = int(os.getenv("AI_MAX_QUEUE") or 20)
+INITIAL_LIMIT: float = 3.0
+MIN_LIMIT: float = 1.0
+MAX_LIMIT: float = float(os.getenv("AI_MAX_CONCURRENCY") or 8)
+TARGET_LATENCY: float = 10.0  # Seconds, slower replies count as overload.
+DECREASE_FACTOR: float = 0.5
+SHORT_PROMPT_CHARS: int = 200  # A prompt this long costs twice as much as an empty one.
+STATS_LOG_EVERY: int = 50  # Replies between scheduler summaries in the log.
+
+
+class QueueFullError(Exception):
+    """The AI queue is full, the request was not queued."""
+
+
+class AiSlot:
+    """A running request, the caller marks it failed if the upstream call failed."""
+
+    __slots__ = ("ok",)
+
+    def __init__(self) -> None:
+        """Initialize a slot, successful until told otherwise."""
+        self.ok: bool = True
+
+    def failed(self) -> None:
+        """Count this request as an upstream failure."""
+        self.ok = False
+
+
+class AiScheduler:
+    """Fair queue with an adaptive concurrency limit in front of the AI API."""
+
+    def __init__(
+        self,
+        max_queue: int = MAX_QUEUE,
+        initial_limit: float = INITIAL_LIMIT,
+        min_limit: float = MIN_LIMIT,
+        max_limit: float = MAX_LIMIT,
+        target_latency: float = TARGET_LATENCY,
+    ) -> None:
+        """Initialize an idle scheduler.
+
+        Args:
+            max_queue (int): Requests that may wait at once. Defaults to MAX_QUEUE.
+            initial_limit (float): Starting concurrency. Defaults to INITIAL_LIMIT.
+            min_limit (float): Lowest concurrency. Defaults to MIN_LIMIT.
+            max_limit (float): Highest concurrency. Defaults to MAX_LIMIT.
+            target_latency (float): Seconds a reply may take before it counts as overload.
+                Defaults to TARGET_LATENCY.
+        """
+        self.max_queue: int = max_queue
+        self.limit: float = initial_limit
+        self.min_limit: float = min_limit
+        self.max_limit: float = max_limit
+        self.target_latency: float = target_latency
+        self.running: int = 0
+        self.queued: int = 0
+        self.max_queued: int = 0
+        self.completed: int = 0
+        self.failures: int = 0
+        self.rejected: int = 0
+        self.wait_stats: LatencyStats = LatencyStats()
+        self._heap: list[tuple[float, int, asyncio.Future[None]]] = []
+        self._seq: itertools.count[int] = itertools.count()
+        self._virtual: float = 0.0
+        self._channel_tags: dict[int, float] = {}
+        self._user_tags: dict[int, float] = {}
+        self._last_decrease: float = float("-inf")
+
+    @property
+    def capacity(self) -> int:
+        """Requests allowed to run at once.
+
+        Returns:
+            int: The concurrency limit, rounded down.
+        """
+        return max(1, int(self.limit))
+
+    @staticmethod
+    def cost(prompt_length: int) -> float:
+        """Get the scheduling cost of a prompt.
+
+        Args:
+            prompt_length (int): Characters in the prompt.
+
+        Returns:
+            float: 1 for an empty prompt, plus 1 per SHORT_PROMPT_CHARS.
+        """
+        return 1 + prompt_length / SHORT_PROMPT_CHARS
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        channel_id: int,
+        user_id: int,
+        prompt_length: int,
+    ) -> AsyncIterator[AiSlot]:
+        """Wait for a turn to call the AI API.
+
+        Args:
+            channel_id (int): Channel the prompt was sent in.
+            user_id (int): User who sent it.
+            prompt_length (int): Characters in the prompt.
+
+        Yields:
+            AiSlot: The running request.
+
+        Raises:
+            QueueFullError: If MAX_QUEUE requests are already waiting.
+        """
+        await self._acquire(channel_id, user_id, prompt_length)
+        request: AiSlot = AiSlot()
+        start: float = time.monotonic()
+        try:
+            yield request
+        except Exception:
+            request.failed()
+            raise
+        finally:
+            self._release(time.monotonic() - start, ok=request.ok)
+
+    async def _acquire(self, channel_id: int, user_id: int, prompt_length: int) -> None:
+        """Take a running slot, queueing for one if needed.
+
+        Args:
+            channel_id (int): Channel the prompt was sent in.
+            user_id (int): User who sent it.
+            prompt_length (int): Characters in the prompt.
+
+        Raises:
+            QueueFullError: If the queue is full.
+        """
+        if self.running < self.capacity and not self.queued:
+            self.running += 1
+            self.wait_stats.record(0.0)
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            msg: str = f"AI queue is full ({self.queued} waiting)."
+            raise QueueFullError(msg)
+
+        start: float = max(
+            self._virtual,
+            self._channel_tags.get(channel_id, 0.0),
+            self._user_tags.get(user_id, 0.0),
+        )
+        finish: float = start + self.cost(prompt_length)
+        self._channel_tags[channel_id] = finish
+        self._user_tags[user_id] = finish
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (finish, next(self._seq), future))
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+
+        queued_at: float = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # Still in the heap, _dispatch() skips it.
+                self.queued -= 1
+            else:
+                # Granted a slot just as the caller gave up, pass it on.
+                self.running -= 1
+                self._dispatch()
+            raise
+        self.wait_stats.record(time.monotonic() - queued_at)
+
+    def _release(self, latency: float, *, ok: bool) -> None:
+        """Free a slot, adapt the limit and start the next request.
+
+        Args:
+            latency (float): Seconds the request held the slot.
+            ok (bool): Whether the upstream call succeeded.
+        """
+        saturated: bool = self.running >= self.capacity
+        self.running -= 1
+        self.completed += 1
+        if ok and latency <= self.target_latency:
+            if saturated or self.queued:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        else:
+            self.failures += not ok
+            now: float = time.monotonic()
+            if now - self._last_decrease >= self.target_latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                reason: str = "failed" if not ok else f"took {latency:.1f}s"
+                logger.warning(f"AI request {reason}, concurrency lowered to {self.capacity}.")
+        self._dispatch()
+        if self.completed % STATS_LOG_EVERY == 0:
+            logger.info(f"AI scheduler: {self.summary()}.")
+
+    def _dispatch(self) -> None:
+        """Start queued requests while there is capacity."""
+        while self.running < self.capacity and self._heap:
+            finish: float
+            future: asyncio.Future[None]
+            finish, _, future = heapq.heappop(self._heap)
+            if future.cancelled():
+                continue
+            self.queued -= 1
+            self.running += 1
+            self._virtual = max(self._virtual, finish)
+            future.set_result(None)
+        if not self._heap:
+            # Tags only order waiting requests, with none left they can all go.
+            self._channel_tags.clear()
+            self._user_tags.clear()
+
+    def summary(self) -> str:
+        """Describe the scheduler in one line.
+
+        Returns:
+            str: e.g. ``2 queued (max 9), 3/4 running, wait p50 0 ms p95 1800 ms, ...``.
+        """
+        return (
+            f"{self.queued} queued (max {self.max_queued}), "
+            f"{self.running}/{self.capacity} running, "
+            f"wait p50 {self.wait_stats.percentile(50) * 1000:.0f} ms "
+            f"p95 {self.wait_stats.percentile(95) * 1000:.0f} ms, "
+            f"{self.completed} done, {self.failures} failed, {self.rejected} rejected"
+        )
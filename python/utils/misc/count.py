@@ -3,6 +3,9 @@
 import sqlite3
 from pathlib import Path
 
+from database import connect, run_write
+from migrations import COUNT_MIGRATIONS, migrate
+
 
 def ensure_count_db(db_path: Path) -> None:
     """Create count.db with a default count of 0 if it doesn't exist.
@@ -10,21 +13,12 @@ def ensure_count_db(db_path: Path) -> None:
     Args:
         db_path (Path): Path to the SQLite database file.
     """
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(db_path) as conn:
+    migrate(db_path, COUNT_MIGRATIONS)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS count (
-                id    INTEGER PRIMARY KEY,
-                count INTEGER NOT NULL
-            )
-        """,
-        )
         cursor.execute("SELECT COUNT(*) FROM count")
         if cursor.fetchone()[0] == 0:
             cursor.execute("INSERT INTO count (id, count) VALUES (1, 0)")
-        conn.commit()
 
 
 def increment_count(db_path: Path) -> int:
@@ -36,10 +30,21 @@ def increment_count(db_path: Path) -> int:
     Returns:
         int: The updated count value.
     """
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute("UPDATE count SET count = count + 1 WHERE id = 1")
         cursor.execute("SELECT count FROM count WHERE id = 1")
         new_count: int = cursor.fetchone()[0]
-        conn.commit()
     return new_count
+
+
+async def increment_count_async(db_path: Path) -> int:
+    """Awaitable increment_count.
+
+    Args:
+        db_path (Path): Path to the SQLite database file.
+
+    Returns:
+        int: The updated count value.
+    """
+    return await run_write(db_path, increment_count, db_path)
@@ -3,6 +3,9 @@
 import sqlite3
 from pathlib import Path
 
+from database import connect, run_read, run_write
+from migrations import INSPIRATION_MIGRATIONS, migrate
+
 DEFAULT_QUOTES: list[str] = [
     "The only way to do great work is to love what you do.",
     "In the middle of every difficulty lies opportunity.",
@@ -20,24 +23,15 @@ def ensure_inspiration_db(db_path: Path) -> None:
     Args:
         db_path (Path): Path to the SQLite database file.
     """
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(db_path) as conn:
+    migrate(db_path, INSPIRATION_MIGRATIONS)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS messages (
-                messageID INTEGER PRIMARY KEY AUTOINCREMENT,
-                message   TEXT NOT NULL
-            )
-        """,
-        )
         cursor.execute("SELECT COUNT(*) FROM messages")
         if cursor.fetchone()[0] == 0:
             cursor.executemany(
                 "INSERT INTO messages (message) VALUES (?)",
                 [(q,) for q in DEFAULT_QUOTES],
             )
-        conn.commit()
 
 
 def add_quote(db_path: Path, quote: str) -> None:
@@ -48,7 +42,7 @@ def add_quote(db_path: Path, quote: str) -> None:
         quote (str): Quote to add.
     """
     ensure_inspiration_db(db_path)
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.execute(
             "SELECT IFNULL(MAX(messageID), 0) + 1 FROM messages",
         )
@@ -57,7 +51,16 @@ def add_quote(db_path: Path, quote: str) -> None:
             "INSERT INTO messages (messageID, message) VALUES (?, ?)",
             (next_id, quote),
         )
-        conn.commit()
+
+
+async def add_quote_async(db_path: Path, quote: str) -> None:
+    """Awaitable add_quote.
+
+    Args:
+        db_path (Path): SQLite database path.
+        quote (str): Quote to add.
+    """
+    await run_write(db_path, add_quote, db_path, quote)
 
 
 def validate_quote(quote: str) -> tuple[bool, str]:
@@ -107,8 +110,20 @@ def get_random_quote(db_path: Path) -> str | None:
     Returns:
         str | None: A random quote string, or None if the table is empty.
     """
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute("SELECT message FROM messages ORDER BY RANDOM() LIMIT 1")
         row: tuple[str] | None = cursor.fetchone()
     return row[0] if row else None
+
+
+async def get_random_quote_async(db_path: Path) -> str | None:
+    """Awaitable get_random_quote.
+
+    Args:
+        db_path (Path): Path to the SQLite database file.
+
+    Returns:
+        str | None: A random quote string, or None if the table is empty.
+    """
+    return await run_read(get_random_quote, db_path)
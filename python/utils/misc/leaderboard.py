@@ -1,26 +1,31 @@
 """Leaderboard utilities."""
 
+import json
 import sqlite3
+from collections.abc import Iterable
 from pathlib import Path
 
+from database import connect, run_read
 from discord import Color, Embed
-from utils.money.stocks import USERS_DB_PATH as STOCKS_DB_PATH
-from utils.money.stocks import get_user_stocks
-from utils.numbers import format_number
+from user import RANKINGS
+from utils.numbers import format_money, format_number
 
 USERS_DB_PATH: Path = Path("data/users.db")
+RANK_CATEGORIES: tuple[str, ...] = ("balance", "networth", "prestige", "level")
 
 
-def get_balance_leaderboard(db_path: Path) -> list[tuple[str, float]]:
+def get_balance_leaderboard(db_path: Path) -> list[tuple[str, int]]:
     """Get top 10 users by balance.
 
     Args:
         db_path (Path): Path to users.db.
 
     Returns:
-        list[tuple[str, float]]: List of (username, balance).
+        list[tuple[str, int]]: List of (username, balance).
     """
-    with sqlite3.connect(db_path) as conn:
+    if RANKINGS.covers(db_path):
+        return RANKINGS.top("money", 10)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute(
             "SELECT name, money FROM users ORDER BY money DESC LIMIT 10",
@@ -28,6 +33,20 @@ def get_balance_leaderboard(db_path: Path) -> list[tuple[str, float]]:
         return cursor.fetchall()
 
 
+async def get_balance_leaderboard_async(db_path: Path) -> list[tuple[str, int]]:
+    """Awaitable get_balance_leaderboard.
+
+    Args:
+        db_path (Path): Path to users.db.
+
+    Returns:
+        list[tuple[str, int]]: List of (username, balance).
+    """
+    if RANKINGS.covers(db_path):
+        return RANKINGS.top("money", 10)
+    return await run_read(get_balance_leaderboard, db_path)
+
+
 def get_prestige_leaderboard(db_path: Path) -> list[tuple[str, int]]:
     """Get top 10 users by prestige.
 
@@ -37,7 +56,9 @@ def get_prestige_leaderboard(db_path: Path) -> list[tuple[str, int]]:
     Returns:
         list[tuple[str, int]]: List of (username, prestige).
     """
-    with sqlite3.connect(db_path) as conn:
+    if RANKINGS.covers(db_path):
+        return RANKINGS.top("prestige", 10)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute(
             "SELECT name, prestige FROM users ORDER BY prestige DESC LIMIT 10",
@@ -45,7 +66,21 @@ def get_prestige_leaderboard(db_path: Path) -> list[tuple[str, int]]:
         return cursor.fetchall()
 
 
-def get_networth_leaderboard(db_path: Path, limit: int = 10) -> list[tuple[str, float]]:
+async def get_prestige_leaderboard_async(db_path: Path) -> list[tuple[str, int]]:
+    """Awaitable get_prestige_leaderboard.
+
+    Args:
+        db_path (Path): Path to users.db.
+
+    Returns:
+        list[tuple[str, int]]: List of (username, prestige).
+    """
+    if RANKINGS.covers(db_path):
+        return RANKINGS.top("prestige", 10)
+    return await run_read(get_prestige_leaderboard, db_path)
+
+
+def get_networth_leaderboard(db_path: Path, limit: int = 10) -> list[tuple[str, int]]:
     """Get top users by net worth (balance + stock value).
 
     Args:
@@ -53,21 +88,36 @@ def get_networth_leaderboard(db_path: Path, limit: int = 10) -> list[tuple[str,
         limit (int): Number of results to return. Defaults to 10.
 
     Returns:
-        list[tuple[str, float]]: List of (username, networth).
+        list[tuple[str, int]]: List of (username, networth).
     """
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
-        cursor.execute("SELECT id, name, money FROM users")
-        rows: list[tuple] = cursor.fetchall()
+        # users.stock_value is kept current by trades and price refreshes, and indexed with
+        # money, so this reads the top of idx_users_net_worth instead of joining holdings.
+        cursor.execute(
+            """
+            SELECT name, money + stock_value FROM users
+            ORDER BY money + stock_value DESC, id LIMIT ?
+            """,
+            (limit,),
+        )
+        return cursor.fetchall()
 
-    results: list[tuple[str, float]] = []
-    for uid, name, money in rows:
-        holdings: list[tuple[str, int, float]] = get_user_stocks(STOCKS_DB_PATH, uid)
-        stock_value: float = sum(value for _, _, value in holdings)
-        results.append((name, money + stock_value))
 
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results[:limit]
+async def get_networth_leaderboard_async(
+    db_path: Path,
+    limit: int = 10,
+) -> list[tuple[str, int]]:
+    """Awaitable get_networth_leaderboard.
+
+    Args:
+        db_path (Path): Path to users.db.
+        limit (int): Number of results to return. Defaults to 10.
+
+    Returns:
+        list[tuple[str, int]]: List of (username, networth).
+    """
+    return await run_read(get_networth_leaderboard, db_path, limit)
 
 
 def get_level_leaderboard(db_path: Path) -> list[tuple[str, int]]:
@@ -79,7 +129,9 @@ def get_level_leaderboard(db_path: Path) -> list[tuple[str, int]]:
     Returns:
         list[tuple[str, int]]: List of (username, level).
     """
-    with sqlite3.connect(db_path) as conn:
+    if RANKINGS.covers(db_path):
+        return RANKINGS.top("level", 10)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute(
             "SELECT name, level FROM users ORDER BY level DESC LIMIT 10",
@@ -87,35 +139,63 @@ def get_level_leaderboard(db_path: Path) -> list[tuple[str, int]]:
         return cursor.fetchall()
 
 
-def build_leaderboard_embed(category: str) -> Embed:
-    """Build a leaderboard embed for the given category.
+async def get_level_leaderboard_async(db_path: Path) -> list[tuple[str, int]]:
+    """Awaitable get_level_leaderboard.
+
+    Args:
+        db_path (Path): Path to users.db.
+
+    Returns:
+        list[tuple[str, int]]: List of (username, level).
+    """
+    if RANKINGS.covers(db_path):
+        return RANKINGS.top("level", 10)
+    return await run_read(get_level_leaderboard, db_path)
+
+
+def get_leaderboard_rows(category: str) -> list[tuple[str, int]]:
+    """Get the top 10 of a category.
 
     Args:
         category (str): One of 'balance', 'networth', 'prestige', 'level'.
 
+    Returns:
+        list[tuple[str, int]]: List of (username, value), highest first.
+    """
+    if category == "balance":
+        return get_balance_leaderboard(USERS_DB_PATH)
+    if category == "networth":
+        return get_networth_leaderboard(USERS_DB_PATH)
+    if category == "prestige":
+        return get_prestige_leaderboard(USERS_DB_PATH)
+    return get_level_leaderboard(USERS_DB_PATH)
+
+
+def render_leaderboard_embed(category: str, rows: list[tuple[str, int]]) -> Embed:
+    """Build a leaderboard embed from a category's top rows.
+
+    Args:
+        category (str): One of 'balance', 'networth', 'prestige', 'level'.
+        rows (list[tuple[str, int]]): From get_leaderboard_rows.
+
     Returns:
         Embed: The leaderboard embed.
     """
     if category == "balance":
-        rows: list[tuple[str, float]] = get_balance_leaderboard(USERS_DB_PATH)
         title: str = "💰 Balance Leaderboard"
         color: Color = Color.green()
         lines: list[str] = [
-            f"`{i + 1}.` **{name}** — ${format_number(val)}"
+            f"`{i + 1}.` **{name}** — ${format_money(val)}"
             for i, (name, val) in enumerate(rows)
         ]
     elif category == "networth":
-        rows = get_networth_leaderboard(USERS_DB_PATH)
         title = "📊 Net Worth Leaderboard"
         color = Color.gold()
         lines = [
-            f"`{i + 1}.` **{name}** — ${format_number(val)}"
+            f"`{i + 1}.` **{name}** — ${format_money(val)}"
             for i, (name, val) in enumerate(rows)
         ]
     elif category == "prestige":
-        rows = get_prestige_leaderboard(
-            USERS_DB_PATH,
-        )  # pyright: ignore[reportAssignmentType]
         title = "⭐ Prestige Leaderboard"
         color = Color.og_blurple()
         lines = [
@@ -123,9 +203,6 @@ def build_leaderboard_embed(category: str) -> Embed:
             for i, (name, val) in enumerate(rows)
         ]
     else:  # level
-        rows = get_level_leaderboard(
-            USERS_DB_PATH,
-        )  # pyright: ignore[reportAssignmentType]
         title = "📈 Level Leaderboard"
         color = Color.blue()
         lines = [
@@ -140,6 +217,30 @@ def build_leaderboard_embed(category: str) -> Embed:
     )
 
 
+def build_leaderboard_embed(category: str) -> Embed:
+    """Build a leaderboard embed for the given category.
+
+    Args:
+        category (str): One of 'balance', 'networth', 'prestige', 'level'.
+
+    Returns:
+        Embed: The leaderboard embed.
+    """
+    return render_leaderboard_embed(category, get_leaderboard_rows(category))
+
+
+async def build_leaderboard_embed_async(category: str) -> Embed:
+    """Awaitable build_leaderboard_embed.
+
+    Args:
+        category (str): One of 'balance', 'networth', 'prestige', 'level'.
+
+    Returns:
+        Embed: The leaderboard embed.
+    """
+    return await run_read(build_leaderboard_embed, category)
+
+
 def get_balance_rank(db_path: Path, user_id: int) -> int | None:
     """Get a user's rank by balance.
 
@@ -150,7 +251,9 @@ def get_balance_rank(db_path: Path, user_id: int) -> int | None:
     Returns:
         int | None: Rank (1-indexed), or None if user not found.
     """
-    with sqlite3.connect(db_path) as conn:
+    if RANKINGS.covers(db_path):
+        return RANKINGS.rank("money", user_id)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute(
             """
@@ -163,6 +266,21 @@ def get_balance_rank(db_path: Path, user_id: int) -> int | None:
     return row[0] if row else None
 
 
+async def get_balance_rank_async(db_path: Path, user_id: int) -> int | None:
+    """Awaitable get_balance_rank.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+
+    Returns:
+        int | None: Rank (1-indexed), or None if user not found.
+    """
+    if RANKINGS.covers(db_path):
+        return RANKINGS.rank("money", user_id)
+    return await run_read(get_balance_rank, db_path, user_id)
+
+
 def get_networth_rank(db_path: Path, user_id: int) -> int | None:
     """Get a user's rank by net worth.
 
@@ -173,22 +291,33 @@ def get_networth_rank(db_path: Path, user_id: int) -> int | None:
     Returns:
         int | None: Rank (1-indexed), or None if user not found.
     """
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
-        cursor.execute("SELECT id, name, money FROM users")
-        rows: list[tuple] = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT (
+                SELECT COUNT(*) + 1 FROM users
+                WHERE money + stock_value > u.money + u.stock_value
+            )
+            FROM users u WHERE id = ?
+            """,
+            (user_id,),
+        )
+        row: tuple | None = cursor.fetchone()
+    return row[0] if row else None
+
 
-    results: list[tuple[int, float]] = []
-    for uid, _, money in rows:
-        holdings: list[tuple[str, int, float]] = get_user_stocks(STOCKS_DB_PATH, uid)
-        stock_value: float = sum(value for _, _, value in holdings)
-        results.append((uid, money + stock_value))
+async def get_networth_rank_async(db_path: Path, user_id: int) -> int | None:
+    """Awaitable get_networth_rank.
 
-    results.sort(key=lambda x: x[1], reverse=True)
-    for i, (uid, _) in enumerate(results):
-        if uid == user_id:
-            return i + 1
-    return None
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+
+    Returns:
+        int | None: Rank (1-indexed), or None if user not found.
+    """
+    return await run_read(get_networth_rank, db_path, user_id)
 
 
 def get_prestige_rank(db_path: Path, user_id: int) -> int | None:
@@ -201,7 +330,9 @@ def get_prestige_rank(db_path: Path, user_id: int) -> int | None:
     Returns:
         int | None: Rank (1-indexed), or None if user not found.
     """
-    with sqlite3.connect(db_path) as conn:
+    if RANKINGS.covers(db_path):
+        return RANKINGS.rank("prestige", user_id)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute(
             """
@@ -214,6 +345,21 @@ def get_prestige_rank(db_path: Path, user_id: int) -> int | None:
     return row[0] if row else None
 
 
+async def get_prestige_rank_async(db_path: Path, user_id: int) -> int | None:
+    """Awaitable get_prestige_rank.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+
+    Returns:
+        int | None: Rank (1-indexed), or None if user not found.
+    """
+    if RANKINGS.covers(db_path):
+        return RANKINGS.rank("prestige", user_id)
+    return await run_read(get_prestige_rank, db_path, user_id)
+
+
 def get_level_rank(db_path: Path, user_id: int) -> int | None:
     """Get a user's rank by level.
 
@@ -224,7 +370,9 @@ def get_level_rank(db_path: Path, user_id: int) -> int | None:
     Returns:
         int | None: Rank (1-indexed), or None if user not found.
     """
-    with sqlite3.connect(db_path) as conn:
+    if RANKINGS.covers(db_path):
+        return RANKINGS.rank("level", user_id)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute(
             """
@@ -237,9 +385,62 @@ def get_level_rank(db_path: Path, user_id: int) -> int | None:
     return row[0] if row else None
 
 
+async def get_level_rank_async(db_path: Path, user_id: int) -> int | None:
+    """Awaitable get_level_rank.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+
+    Returns:
+        int | None: Rank (1-indexed), or None if user not found.
+    """
+    if RANKINGS.covers(db_path):
+        return RANKINGS.rank("level", user_id)
+    return await run_read(get_level_rank, db_path, user_id)
+
+
 def get_all_ranks(db_path: Path, user_id: int) -> dict[str, int | None]:
     """Get a user's rank across all leaderboard categories.
 
+    Balance, prestige and level come from RANKINGS when it covers db_path, otherwise all
+    four ranks come from one statement, each counted on its own index.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+
+    Returns:
+        dict[str, int | None]: Ranks keyed by category name.
+    """
+    if RANKINGS.covers(db_path):
+        return {
+            "balance": RANKINGS.rank("money", user_id),
+            "networth": get_networth_rank(db_path, user_id),
+            "prestige": RANKINGS.rank("prestige", user_id),
+            "level": RANKINGS.rank("level", user_id),
+        }
+    with connect(db_path) as conn:
+        row: tuple | None = conn.execute(
+            """
+            SELECT
+                (SELECT COUNT(*) + 1 FROM users WHERE money > u.money),
+                (
+                    SELECT COUNT(*) + 1 FROM users
+                    WHERE money + stock_value > u.money + u.stock_value
+                ),
+                (SELECT COUNT(*) + 1 FROM users WHERE prestige > u.prestige),
+                (SELECT COUNT(*) + 1 FROM users WHERE level > u.level)
+            FROM users u WHERE id = ?
+            """,
+            (user_id,),
+        ).fetchone()
+    return dict(zip(RANK_CATEGORIES, row or (None,) * len(RANK_CATEGORIES), strict=True))
+
+
+async def get_all_ranks_async(db_path: Path, user_id: int) -> dict[str, int | None]:
+    """Awaitable get_all_ranks.
+
     Args:
         db_path (Path): Path to users.db.
         user_id (int): Discord user ID.
@@ -247,9 +448,64 @@ def get_all_ranks(db_path: Path, user_id: int) -> dict[str, int | None]:
     Returns:
         dict[str, int | None]: Ranks keyed by category name.
     """
-    return {
-        "balance": get_balance_rank(db_path, user_id),
-        "networth": get_networth_rank(db_path, user_id),
-        "prestige": get_prestige_rank(db_path, user_id),
-        "level": get_level_rank(db_path, user_id),
+    return await run_read(get_all_ranks, db_path, user_id)
+
+
+def get_ranks_for_users(
+    db_path: Path,
+    user_ids: Iterable[int],
+) -> dict[int, dict[str, int | None]]:
+    """Get many users' ranks across all leaderboard categories at once, e.g. for exports.
+
+    Ranks every user once per category with window functions. That costs about the same for
+    any number of users, and beats calling get_all_ranks per user from around a hundred users
+    up. Ranks come from users.db, so unsaved changes aren't included.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user_ids (Iterable[int]): Discord user IDs.
+
+    Returns:
+        dict[int, dict[str, int | None]]: Ranks keyed by category name, for every requested
+            user. Users not in the database get None everywhere.
+    """
+    ids: list[int] = list(user_ids)
+    with connect(db_path) as conn:
+        rows: list[tuple] = conn.execute(
+            """
+            SELECT * FROM (
+                SELECT
+                    id,
+                    RANK() OVER (ORDER BY money DESC),
+                    RANK() OVER (ORDER BY money + stock_value DESC),
+                    RANK() OVER (ORDER BY prestige DESC),
+                    RANK() OVER (ORDER BY level DESC)
+                FROM users
+            )
+            WHERE id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(ids),),
+        ).fetchall()
+
+    ranks: dict[int, dict[str, int | None]] = {
+        row[0]: dict(zip(RANK_CATEGORIES, row[1:], strict=True)) for row in rows
     }
+    missing: dict[str, int | None] = dict.fromkeys(RANK_CATEGORIES)
+    return {user_id: ranks.get(user_id, missing.copy()) for user_id in ids}
+
+
+async def get_ranks_for_users_async(
+    db_path: Path,
+    user_ids: Iterable[int],
+) -> dict[int, dict[str, int | None]]:
+    """Awaitable get_ranks_for_users.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user_ids (Iterable[int]): Discord user IDs.
+
+    Returns:
+        dict[int, dict[str, int | None]]: Ranks keyed by category name, for every requested
+            user. Users not in the database get None everywhere.
+    """
+    return await run_read(get_ranks_for_users, db_path, list(user_ids))
@@ -0,0 +1,152 @@
+"""Cache of rendered leaderboard embeds, dropped only by changes that could show on them."""
+
+import os
+import time
+
+from database import run_read
+from discord import Embed
+from log import logger
+from user import RANKINGS
+from utils.misc.leaderboard import get_leaderboard_rows, render_leaderboard_embed
+
+CACHE_TTL: float = float(os.getenv("LEADERBOARD_CACHE_TTL") or 30)  # Seconds, 0 disables.
+TOP_N: int = 10  # Rows shown per leaderboard.
+CATEGORIES: tuple[str, ...] = ("balance", "networth", "prestige", "level")
+
+# Leaderboard categories a users column shows up in. Net worth includes the balance.
+CATEGORIES_BY_COLUMN: dict[str, tuple[str, ...]] = {
+    "money": ("balance", "networth"),
+    "prestige": ("prestige",),
+    "level": ("level",),
+}
+
+
+class CachedLeaderboard:
+    """A rendered leaderboard and what it takes to change it."""
+
+    __slots__ = ("built_at", "cutoff", "data", "names")
+
+    def __init__(self, data: dict, rows: list[tuple[str, int]]) -> None:
+        """Initialize from a rendered embed and the rows it shows.
+
+        Args:
+            data (dict): Embed.to_dict() of the leaderboard.
+            rows (list[tuple[str, int]]): (username, value), highest first.
+        """
+        self.built_at: float = time.monotonic()
+        self.data: dict = data
+        self.names: frozenset[str] = frozenset(name for name, _ in rows)
+        # Lowest value shown, None while the board isn't full and anyone could join it.
+        self.cutoff: int | None = rows[-1][1] if len(rows) >= TOP_N else None
+
+    def affected_by(self, name: str, old: object, new: object) -> bool:
+        """Check whether a user's change could show on this leaderboard.
+
+        Args:
+            name (str): The user's name.
+            old (object): Value before the change, None for a new user.
+            new (object): Value after the change.
+
+        Returns:
+            bool: True if the user is on it, or reaches the 10th place value.
+        """
+        if name in self.names or self.cutoff is None:
+            return True
+        return any(isinstance(value, int) and value >= self.cutoff for value in (old, new))
+
+
+class LeaderboardCache:
+    """Leaderboard embeds per category, kept for up to a TTL.
+
+    Every change RANKINGS sees drops the categories it could show on: one involving a user
+    on the board, or a value reaching the current 10th place. Price refreshes and prestiges
+    drop boards explicitly through invalidate(). Net worth also moves with stock values,
+    which RANKINGS doesn't see, so a user climbing into its top 10 on stock alone shows up
+    within the TTL.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            ttl (float): Seconds an embed is reused, 0 disables caching. Defaults to CACHE_TTL.
+        """
+        self.ttl: float = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: dict[str, CachedLeaderboard] = {}
+        # Bumped on invalidation, so a rebuild that raced one isn't stored.
+        self._generations: dict[str, int] = {}
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache.
+
+        Returns:
+            float: Between 0 and 1.
+        """
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    async def get(self, category: str) -> Embed:
+        """Get a category's leaderboard embed, rebuilding it if needed.
+
+        Args:
+            category (str): One of 'balance', 'networth', 'prestige', 'level'.
+
+        Returns:
+            Embed: A new Embed object, safe for the caller to change.
+        """
+        entry: CachedLeaderboard | None = self._entries.get(category)
+        if entry is not None and time.monotonic() - entry.built_at < self.ttl:
+            self.hits += 1
+            return Embed.from_dict(entry.data)
+
+        self.misses += 1
+        generation: int = self._generations.get(category, 0)
+        start: float = time.perf_counter()
+        rows: list[tuple[str, int]] = await run_read(get_leaderboard_rows, category)
+        embed: Embed = render_leaderboard_embed(category, rows)
+        elapsed_ms: float = (time.perf_counter() - start) * 1000
+
+        if self.ttl > 0 and self._generations.get(category, 0) == generation:
+            self._entries[category] = CachedLeaderboard(embed.to_dict(), rows)
+        logger.info(
+            f"Rebuilt the {category} leaderboard in {elapsed_ms:.1f} ms, "
+            f"cache hit rate {self.hit_rate:.0%} ({self.hits}/{self.hits + self.misses}).",
+        )
+        return embed
+
+    def invalidate(self, *categories: str) -> None:
+        """Drop cached leaderboards.
+
+        Args:
+            *categories (str): Categories to drop, every one if none are given.
+        """
+        for category in categories or CATEGORIES:
+            self._entries.pop(category, None)
+            self._generations[category] = self._generations.get(category, 0) + 1
+
+    def note_change(self, name: str, column: str, old: object, new: object) -> None:
+        """Drop the leaderboards a user's change could show on. Registered with RANKINGS.
+
+        Args:
+            name (str): The user's name before the change.
+            column (str): Changed users column.
+            old (object): Value before the change, None for a new user.
+            new (object): Value after the change.
+        """
+        if column == "name":
+            for category, entry in list(self._entries.items()):
+                if name in entry.names:
+                    self.invalidate(category)
+            return
+        for category in CATEGORIES_BY_COLUMN.get(column, ()):
+            entry: CachedLeaderboard | None = self._entries.get(category)
+            # With nothing cached, still bump the generation in case a rebuild is running.
+            if entry is None or entry.affected_by(name, old, new):
+                self.invalidate(category)
+
+
+LEADERBOARD_CACHE: LeaderboardCache = LeaderboardCache()
+RANKINGS.watch(LEADERBOARD_CACHE.note_change)
@@ -2,7 +2,7 @@
 
 from discord import Embed, Interaction, Message, SelectOption
 from discord.ui import View, select
-from utils.misc.leaderboard import build_leaderboard_embed
+from utils.misc.leaderboard_cache import LEADERBOARD_CACHE
 
 
 class LeaderboardView(View):
@@ -41,5 +41,5 @@ class LeaderboardView(View):
         for option in select.options:
             option.default = option.value == category
 
-        embed: Embed = build_leaderboard_embed(category)
+        embed: Embed = await LEADERBOARD_CACHE.get(category)
         await interaction.response.edit_message(embed=embed, view=self)
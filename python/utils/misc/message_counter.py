@@ -0,0 +1,106 @@
+"""Buffered message counting for on_message."""
+
+import asyncio
+
+from log import logger
+from user import User
+
+FLUSH_INTERVAL: int = 5
+
+
+class MessageCounter:
+    """Buffers message counts so most messages never touch a User object.
+
+    A user is only materialized when their buffered count could reach their next level
+    threshold. Everything else is a couple of dict operations, and flush() moves the
+    buffered counts onto the cached users every few seconds so autosave picks them up.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the counter."""
+        self._pending: dict[int, int] = {}
+        self._headroom: dict[int, int] = {}
+
+    def add(self, user_id: int) -> bool:
+        """Count one message.
+
+        Args:
+            user_id (int): Discord user ID.
+
+        Returns:
+            bool: True if the user has to be settled now, either because we don't know
+                how far they are from a level up or because they may have reached it.
+        """
+        pending: int = self._pending.get(user_id, 0) + 1
+        self._pending[user_id] = pending
+        headroom: int | None = self._headroom.get(user_id)
+        return headroom is None or pending >= headroom
+
+    def apply_pending(self, user: User) -> None:
+        """Move a user's buffered messages onto the user.
+
+        Args:
+            user (User): User to update.
+        """
+        pending: int = self._pending.pop(user.id, 0)
+        if pending:
+            user.message_count += pending
+            user.touch()
+            # Headroom counts from the old message_count, and the buffer now restarts at 0.
+            headroom: int | None = self._headroom.get(user.id)
+            if headroom is not None:
+                self._headroom[user.id] = headroom - pending
+
+    def settle(self, user: User) -> bool:
+        """Apply buffered messages, level the user up if able and recompute headroom.
+
+        Args:
+            user (User): User to settle.
+
+        Returns:
+            bool: True if the user leveled up.
+        """
+        self.apply_pending(user)
+        leveled_up: bool = user.level_up_if_able()
+        self._headroom[user.id] = user.next_level_threshold - user.message_count
+        return leveled_up
+
+    def flush(self) -> int:
+        """Apply every buffered count and forget all headroom.
+
+        Forgetting headroom keeps the maps bounded to recently active users, and picks up
+        any level or message count changes made elsewhere (e.g. admin commands).
+
+        Returns:
+            int: Number of users updated.
+        """
+        pending: dict[int, int] = self._pending
+        self._pending = {}
+        self._headroom = {}
+        for user_id, count in pending.items():
+            # Every buffered user was settled at least once, so they already exist.
+            user: User = User.create_if_not_exists(user_id=user_id, username="")
+            user.message_count += count
+            user.touch()
+        return len(pending)
+
+    def __len__(self) -> int:
+        """Number of users with buffered messages.
+
+        Returns:
+            int: Buffered user count.
+        """
+        return len(self._pending)
+
+
+async def flush_periodically(counter: MessageCounter) -> None:
+    """Flush buffered message counts every FLUSH_INTERVAL seconds.
+
+    Args:
+        counter (MessageCounter): Counter to flush.
+    """
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        flushed: int = counter.flush()
+        if flushed:
+            logger.debug(f"Flushed buffered message counts for {flushed} users.")
@@ -0,0 +1,150 @@
+"""Canned replies to words in messages.
+
+Triggers live in a JSON file: a list of ``{"trigger": ..., "response": ...}`` objects in
+priority order. When a message contains several triggers the earliest one wins, so e.g.
+"wackdiff" has to come before "wack". An entry with ``"enabled": false`` is kept in the file
+but never matches. The file is reloaded when it changes, so replies can be edited without
+restarting the bot.
+
+Triggers are compiled once per load into a tuple in priority order, and matching is one
+substring check per trigger. For a few dozen short triggers CPython's substring search beats
+a combined regex or a pure-Python automaton at every message length, see
+benchmarks/bench_triggers.py.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from log import logger
+
+TRIGGERS_PATH: Path = Path(os.getenv("TRIGGERS_PATH") or Path(__file__).parent / "triggers.json")
+RELOAD_INTERVAL: float = 5.0  # Seconds between checks of the file's modification time.
+
+Trigger = tuple[str, str]  # (lowercase trigger, response)
+
+
+def compile_triggers(entries: list[dict[str, Any]]) -> tuple[Trigger, ...]:
+    """Turn trigger file entries into the tuple used for matching.
+
+    Disabled entries are skipped, and so are triggers that can never win because they
+    contain an earlier trigger (any message with them has the earlier one too).
+
+    Args:
+        entries (list[dict[str, Any]]): Entries in priority order.
+
+    Returns:
+        tuple[Trigger, ...]: (trigger, response) pairs in priority order.
+
+    Raises:
+        ValueError: If an entry has no trigger or response.
+    """
+    triggers: list[Trigger] = []
+    for entry in entries:
+        if not entry.get("enabled", True):
+            continue
+
+        trigger: Any = entry.get("trigger")
+        response: Any = entry.get("response")
+        if not isinstance(trigger, str) or not trigger or not isinstance(response, str):
+            msg: str = f"Invalid trigger entry: {entry!r}"
+            raise ValueError(msg)
+
+        trigger = trigger.lower()
+        shadowing: Trigger | None = next((t for t in triggers if t[0] in trigger), None)
+        if shadowing is not None:
+            logger.debug(f"Trigger {trigger!r} can never match, {shadowing[0]!r} comes first.")
+            continue
+        triggers.append((trigger, response))
+    return tuple(triggers)
+
+
+def load_triggers(path: Path) -> tuple[Trigger, ...]:
+    """Read and compile a trigger file.
+
+    Args:
+        path (Path): JSON trigger file.
+
+    Returns:
+        tuple[Trigger, ...]: (trigger, response) pairs in priority order.
+
+    Raises:
+        ValueError: If the file isn't a list of valid entries.
+    """
+    entries: Any = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(entries, list):
+        msg: str = f"{path} must contain a list of triggers."
+        raise ValueError(msg)  # noqa: TRY004 -- Surfaced like any other bad file.
+    return compile_triggers(entries)
+
+
+class TriggerMatcher:
+    """Finds the highest priority trigger in a message, reloading its file when it changes."""
+
+    __slots__ = ("_checked_at", "_mtime_ns", "path", "triggers")
+
+    def __init__(self, path: Path = TRIGGERS_PATH) -> None:
+        """Load the triggers.
+
+        Args:
+            path (Path): JSON trigger file. Defaults to TRIGGERS_PATH.
+        """
+        self.path: Path = path
+        self.triggers: tuple[Trigger, ...] = ()
+        self._mtime_ns: int | None = None
+        self._checked_at: float = time.monotonic()
+        self.reload()
+
+    def reload(self) -> bool:
+        """Load the trigger file, keeping the current triggers if it is missing or invalid.
+
+        Returns:
+            bool: True if the file was loaded.
+        """
+        try:
+            mtime_ns: int = self.path.stat().st_mtime_ns
+            triggers: tuple[Trigger, ...] = load_triggers(self.path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load triggers from {self.path}: {e}")
+            return False
+
+        self.triggers = triggers
+        self._mtime_ns = mtime_ns
+        logger.info(f"Loaded {len(triggers)} triggers from {self.path}.")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Reload the trigger file if it changed, checking at most every RELOAD_INTERVAL.
+
+        Returns:
+            bool: True if the file was reloaded.
+        """
+        now: float = time.monotonic()
+        if now - self._checked_at < RELOAD_INTERVAL:
+            return False
+        self._checked_at = now
+
+        try:
+            mtime_ns: int = self.path.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime_ns == self._mtime_ns:
+            return False
+        return self.reload()
+
+    def match(self, content: str) -> Trigger | None:
+        """Find the trigger a message should be answered with.
+
+        Args:
+            content (str): Lowercased message content.
+
+        Returns:
+            Trigger | None: Highest priority (trigger, response) in the message, if any.
+        """
+        self.reload_if_changed()
+        for trigger in self.triggers:
+            if trigger[0] in content:
+                return trigger
+        return None
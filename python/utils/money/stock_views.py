@@ -1,9 +1,10 @@
 """Discord UI views for stock buy/sell interactions."""
 
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 
 from discord import ButtonStyle, Color, Embed, Interaction, Message
 from discord.ui import Button, Modal, TextInput, View, button
+from utils.numbers import format_money
 
 
 class AmountModal(Modal, title="Enter Amount"):
@@ -58,8 +59,8 @@ class ConfirmView(View):
         action: str,
         stock_name: str,
         quantity: int,
-        total: float,
-        execute_fn: Callable[[int], tuple[bool, str]],
+        total: int,
+        execute_fn: Callable[[int], Awaitable[tuple[bool, str]]],
     ) -> None:
         """Initialize the confirm view.
 
@@ -67,15 +68,15 @@ class ConfirmView(View):
             action (str): "Buy" or "Sell".
             stock_name (str): Name of the stock.
             quantity (int): Number of shares.
-            total (float): Total cost or value.
-            execute_fn (Callable[[int], tuple[bool, str]]): Function to call on confirm.
+            total (int): Total cost or value in cents.
+            execute_fn (Callable[[int], Awaitable[tuple[bool, str]]]): Function to call on confirm.
         """
         super().__init__(timeout=30)
         self.action: str = action
         self.stock_name: str = stock_name
         self.quantity: int = quantity
-        self.total: float = total
-        self.execute_fn: Callable[[int], tuple[bool, str]] = execute_fn
+        self.total: int = total
+        self.execute_fn: Callable[[int], Awaitable[tuple[bool, str]]] = execute_fn
         self.message: Message | None = None
 
     async def on_timeout(self) -> None:
@@ -86,14 +87,14 @@ class ConfirmView(View):
             await self.message.edit(view=self)
 
     @staticmethod
-    def build_embed(action: str, stock_name: str, quantity: int, total: float) -> Embed:
+    def build_embed(action: str, stock_name: str, quantity: int, total: int) -> Embed:
         """Build the confirmation embed.
 
         Args:
             action (str): "Buy" or "Sell".
             stock_name (str): Stock name.
             quantity (int): Shares.
-            total (float): Total cost or value.
+            total (int): Total cost or value in cents.
 
         Returns:
             Embed: Confirmation embed.
@@ -103,7 +104,7 @@ class ConfirmView(View):
             title=f"Confirm {action}",
             color=color,
             description=(
-                f"{action} **{quantity}x {stock_name}** for **${total:,.2f}**?\n\n"
+                f"{action} **{quantity}x {stock_name}** for **${format_money(total)}**?\n\n"
                 "*This will expire in 30 seconds.*"
             ),
         )
@@ -119,7 +120,7 @@ class ConfirmView(View):
         self.stop()
         success: bool
         message: str
-        success, message = self.execute_fn(self.quantity)
+        success, message = await self.execute_fn(self.quantity)
         color: Color = Color.green() if success else Color.red()
         embed: Embed = Embed(
             title=(
@@ -158,26 +159,26 @@ class BuyView(View):
         self,
         user_id: int,
         stock_name: str,
-        price: float,
-        balance: float,
-        execute_fn: Callable[[int], tuple[bool, str]],
+        price: int,
+        balance: int,
+        execute_fn: Callable[[int], Awaitable[tuple[bool, str]]],
     ) -> None:
         """Initialize the buy view.
 
         Args:
             user_id (int): Discord user ID.
             stock_name (str): Name of the stock.
-            price (float): Current stock price.
-            balance (float): User's current balance.
-            execute_fn (Callable[[int], tuple[bool, str]]): Function to execute the buy.
+            price (int): Current stock price in cents.
+            balance (int): User's current balance in cents.
+            execute_fn (Callable[[int], Awaitable[tuple[bool, str]]]): Function to execute the buy.
         """
         super().__init__(timeout=60)
         self.user_id: int = user_id
         self.stock_name: str = stock_name
-        self.price: float = price
-        self.balance: float = balance
-        self.execute_fn: Callable[[int], tuple[bool, str]] = execute_fn
-        self.max_shares: int = int(balance // price)
+        self.price: int = price
+        self.balance: int = balance
+        self.execute_fn: Callable[[int], Awaitable[tuple[bool, str]]] = execute_fn
+        self.max_shares: int = balance // price
         self.message: Message | None = None
 
     async def interaction_check(self, interaction: Interaction) -> bool:
@@ -218,7 +219,7 @@ class BuyView(View):
             )
             return
 
-        total: float = quantity * self.price
+        total: int = quantity * self.price
         confirm_view = ConfirmView(
             action="Buy",
             stock_name=self.stock_name,
@@ -233,16 +234,16 @@ class BuyView(View):
     @staticmethod
     def build_embed(
         stock_name: str,
-        price: float,
-        balance: float,
+        price: int,
+        balance: int,
         max_shares: int,
     ) -> Embed:
         """Build the buy selection embed.
 
         Args:
             stock_name (str): Stock name.
-            price (float): Current price.
-            balance (float): User balance.
+            price (int): Current price in cents.
+            balance (int): User balance in cents.
             max_shares (int): Max affordable shares.
 
         Returns:
@@ -252,8 +253,8 @@ class BuyView(View):
             title=f"Buy {stock_name}",
             color=Color.green(),
             description=(
-                f"**Price:** ${price:,.2f} per share\n"
-                f"**Balance:** ${balance:,.2f}\n"
+                f"**Price:** ${format_money(price)} per share\n"
+                f"**Balance:** ${format_money(balance)}\n"
                 f"**Max you can buy:** {max_shares} shares\n\n"
                 "Select an amount below."
             ),
@@ -310,25 +311,25 @@ class SellView(View):
         self,
         user_id: int,
         stock_name: str,
-        price: float,
+        price: int,
         owned: int,
-        execute_fn: Callable[[int], tuple[bool, str]],
+        execute_fn: Callable[[int], Awaitable[tuple[bool, str]]],
     ) -> None:
         """Initialize the sell view.
 
         Args:
             user_id (int): Discord user ID.
             stock_name (str): Name of the stock.
-            price (float): Current stock price.
+            price (int): Current stock price in cents.
             owned (int): Number of shares owned.
-            execute_fn (Callable[[int], tuple[bool, str]]): Function to execute the sell.
+            execute_fn (Callable[[int], Awaitable[tuple[bool, str]]]): Function to execute the sell.
         """
         super().__init__(timeout=60)
         self.user_id: int = user_id
         self.stock_name: str = stock_name
-        self.price: float = price
+        self.price: int = price
         self.owned: int = owned
-        self.execute_fn: Callable[[int], tuple[bool, str]] = execute_fn
+        self.execute_fn: Callable[[int], Awaitable[tuple[bool, str]]] = execute_fn
         self.message: Message | None = None
 
     async def interaction_check(self, interaction: Interaction) -> bool:
@@ -369,7 +370,7 @@ class SellView(View):
             )
             return
 
-        total: float = quantity * self.price
+        total: int = quantity * self.price
         confirm_view = ConfirmView(
             action="Sell",
             stock_name=self.stock_name,
@@ -382,12 +383,12 @@ class SellView(View):
         confirm_view.message = await interaction.original_response()
 
     @staticmethod
-    def build_embed(stock_name: str, price: float, owned: int) -> Embed:
+    def build_embed(stock_name: str, price: int, owned: int) -> Embed:
         """Build the sell selection embed.
 
         Args:
             stock_name (str): Stock name.
-            price (float): Current price.
+            price (int): Current price in cents.
             owned (int): Shares owned.
 
         Returns:
@@ -397,9 +398,9 @@ class SellView(View):
             title=f"Sell {stock_name}",
             color=Color.red(),
             description=(
-                f"**Price:** ${price:,.2f} per share\n"
+                f"**Price:** ${format_money(price)} per share\n"
                 f"**You own:** {owned} shares\n"
-                f"**Total value:** ${owned * price:,.2f}\n\n"
+                f"**Total value:** ${format_money(owned * price)}\n\n"
                 "Select an amount below."
             ),
         )
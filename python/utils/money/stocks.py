@@ -1,13 +1,25 @@
 """Stock market utilities."""
 
+import asyncio
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 import yfinance as yf
+from database import connect, run_read, run_write
 from log import logger
+from migrations import USERS_INDEXES, USERS_MIGRATIONS, migrate
 from user import User
+from utils.money.transactions import (
+    Balances,
+    Deltas,
+    apply_deltas,
+    record_ledger,
+    run_transaction,
+    transact,
+)
+from utils.numbers import CENTS_PER_DOLLAR, format_money
 
 USERS_DB_PATH: Path = Path("data/users.db")
 WEEKDAY: int = 4  # 0 - 4 for Monday - Friday
@@ -24,47 +36,43 @@ STOCK_MAP: dict[str, str | None] = {
     "Subaru": "BTC-USD",
 }
 
-DEFAULT_PRICES: dict[str, float] = {
-    "Dizznem": 10.00,
-    "Karma": 5.00,
-    "So6": 7.50,
-    "BigH": 15.00,
-    "Luffy": 8.00,
-    "Naruto": 6.00,
-    "Ichigo": 9.00,
-    "Goku": 12.00,
-    "Subaru": 20.00,
+# In cents.
+DEFAULT_PRICES: dict[str, int] = {
+    "Dizznem": 10_00,
+    "Karma": 5_00,
+    "So6": 7_50,
+    "BigH": 15_00,
+    "Luffy": 8_00,
+    "Naruto": 6_00,
+    "Ichigo": 9_00,
+    "Goku": 12_00,
+    "Subaru": 20_00,
 }
 
 
+# What users.stock_value should be, recomputed from holdings at current prices.
+HOLDINGS_VALUE_SQL: str = """
+    IFNULL(
+        (
+            SELECT SUM(us.quantity * sp.price)
+            FROM user_stocks us
+            JOIN stock_prices sp ON us.stock_name = sp.name
+            WHERE us.user_id = users.id AND us.quantity > 0
+        ),
+        0
+    )
+"""
+
+
 def ensure_stocks_tables(db_path: Path) -> None:
-    """Create stock_prices and user_stocks tables if they don't exist.
+    """Migrate users.db and seed default stock prices.
 
     Args:
         db_path (Path): Path to users.db.
     """
-    with sqlite3.connect(db_path) as conn:
+    migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS stock_prices (
-                name         TEXT PRIMARY KEY,
-                price        REAL NOT NULL,
-                open_price   REAL NOT NULL,
-                last_updated TEXT NOT NULL
-            )
-            """,
-        )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS user_stocks (
-                user_id    INTEGER NOT NULL,
-                stock_name TEXT NOT NULL,
-                quantity   INTEGER NOT NULL DEFAULT 0,
-                PRIMARY KEY (user_id, stock_name)
-            )
-            """,
-        )
         for name, price in DEFAULT_PRICES.items():
             cursor.execute(
                 """
@@ -73,7 +81,6 @@ def ensure_stocks_tables(db_path: Path) -> None:
                 """,
                 (name, price, price, datetime.now(timezone.utc).isoformat()),
             )
-        conn.commit()
 
 
 def is_market_open() -> bool:
@@ -90,54 +97,115 @@ def is_market_open() -> bool:
     return market_open <= now <= market_close
 
 
-def refresh_prices(db_path: Path) -> None:
+def fetch_prices() -> list[tuple[str, int, int]]:
     """Fetch latest prices from Yahoo Finance for mapped stocks.
 
+    Returns:
+        list[tuple[str, int, int]]: List of (name, price, open_price) in cents for every
+            stock that could be fetched.
+    """
+    prices: list[tuple[str, int, int]] = []
+    for name, ticker in STOCK_MAP.items():
+        if ticker is None:
+            continue
+        try:
+            data: yf.Ticker = yf.Ticker(ticker)
+            info: Any = data.fast_info
+            prices.append(
+                (
+                    name,
+                    round(float(info.last_price) * CENTS_PER_DOLLAR),
+                    round(float(info.open) * CENTS_PER_DOLLAR),
+                ),
+            )
+        except (ValueError, AttributeError) as exc:
+            logger.exception(
+                f"Failed to fetch price for {name} ({ticker})",
+                exc_info=exc,
+            )
+    return prices
+
+
+def update_prices(db_path: Path, prices: list[tuple[str, int, int]]) -> None:
+    """Store fetched prices and revalue the holders of every stock whose price changed.
+
     Args:
         db_path (Path): Path to users.db.
+        prices (list[tuple[str, int, int]]): List of (name, price, open_price) in cents.
     """
-    with sqlite3.connect(db_path) as conn:
-        cursor: sqlite3.Cursor = conn.cursor()
-        for name, ticker in STOCK_MAP.items():
-            if ticker is None:
-                continue
-            try:
-                data: yf.Ticker = yf.Ticker(ticker)
-                info: Any = data.fast_info
-                price: float = float(info.last_price)
-                open_price: float = float(info.open)
-                cursor.execute(
-                    """
-                    UPDATE stock_prices
-                    SET price = ?, open_price = ?, last_updated = ?
-                    WHERE name = ?
-                    """,
-                    (price, open_price, datetime.now(timezone.utc).isoformat(), name),
-                )
-            except (ValueError, AttributeError) as exc:
-                logger.exception(
-                    f"Failed to fetch price for {name} ({ticker})",
-                    exc_info=exc,
-                )
-        conn.commit()
-
-
-def get_all_prices(db_path: Path) -> list[tuple[str, float, float]]:
+    now: str = datetime.now(timezone.utc).isoformat()
+    with connect(db_path) as conn:
+        old_prices: dict[str, int] = dict(conn.execute("SELECT name, price FROM stock_prices"))
+        conn.executemany(
+            """
+            UPDATE stock_prices
+            SET price = ?, open_price = ?, last_updated = ?
+            WHERE name = ?
+            """,
+            [(price, open_price, now, name) for name, price, open_price in prices],
+        )
+        # One UPDATE per changed stock, touching only its holders.
+        conn.executemany(
+            """
+            UPDATE users SET stock_value = stock_value + ? * us.quantity
+            FROM user_stocks us
+            WHERE us.user_id = users.id AND us.stock_name = ? AND us.quantity > 0
+            """,
+            [
+                (price - old_prices[name], name)
+                for name, price, _ in prices
+                if name in old_prices and price != old_prices[name]
+            ],
+        )
+
+
+def refresh_prices(db_path: Path) -> None:
+    """Fetch latest prices from Yahoo Finance and store them.
+
+    Args:
+        db_path (Path): Path to users.db.
+    """
+    update_prices(db_path, fetch_prices())
+
+
+async def refresh_prices_async(db_path: Path) -> None:
+    """Awaitable refresh_prices, the write is only queued once every price is fetched.
+
+    Args:
+        db_path (Path): Path to users.db.
+    """
+    prices: list[tuple[str, int, int]] = await asyncio.to_thread(fetch_prices)
+    await run_write(db_path, update_prices, db_path, prices)
+
+
+def get_all_prices(db_path: Path) -> list[tuple[str, int, int]]:
     """Get all stock names, current prices, and open prices.
 
     Args:
         db_path (Path): Path to users.db.
 
     Returns:
-        list[tuple[str, float, float]]: List of (name, price, open_price).
+        list[tuple[str, int, int]]: List of (name, price, open_price) in cents.
     """
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute("SELECT name, price, open_price FROM stock_prices")
         return cursor.fetchall()
 
 
-def get_price(db_path: Path, stock_name: str) -> float | None:
+async def get_all_prices_async(db_path: Path) -> list[tuple[str, int, int]]:
+    """Awaitable get_all_prices.
+
+    Args:
+        db_path (Path): Path to users.db.
+
+    Returns:
+        list[tuple[str, int, int]]: List of (name, price, open_price) in cents.
+    """
+    return await run_read(get_all_prices, db_path)
+
+
+def get_price(db_path: Path, stock_name: str) -> int | None:
     """Get the current price of a stock.
 
     Args:
@@ -145,16 +213,29 @@ def get_price(db_path: Path, stock_name: str) -> float | None:
         stock_name (str): Name of the stock.
 
     Returns:
-        float | None: Current price, or None if stock doesn't exist.
+        int | None: Current price in cents, or None if stock doesn't exist.
     """
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute("SELECT price FROM stock_prices WHERE name = ?", (stock_name,))
         row: tuple = cursor.fetchone()
     return row[0] if row else None
 
 
-def get_user_balance(user_id: int, username: str) -> float:
+async def get_price_async(db_path: Path, stock_name: str) -> int | None:
+    """Awaitable get_price.
+
+    Args:
+        db_path (Path): Path to users.db.
+        stock_name (str): Name of the stock.
+
+    Returns:
+        int | None: Current price in cents, or None if stock doesn't exist.
+    """
+    return await run_read(get_price, db_path, stock_name)
+
+
+def get_user_balance(user_id: int, username: str) -> int:
     """Get a user's current money balance via the User cache.
 
     Args:
@@ -162,13 +243,27 @@ def get_user_balance(user_id: int, username: str) -> float:
         username (str): Discord username.
 
     Returns:
-        float: User's current balance.
+        int: User's current balance in cents.
     """
     user: User = User.create_if_not_exists(user_id=user_id, username=username)
     return user.money
 
 
-def get_user_stocks(db_path: Path, user_id: int) -> list[tuple[str, int, float]]:
+async def get_user_balance_async(user_id: int, username: str) -> int:
+    """Get a user's current money balance without blocking the event loop.
+
+    Args:
+        user_id (int): Discord user ID.
+        username (str): Discord username.
+
+    Returns:
+        int: User's current balance in cents.
+    """
+    user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+    return user.money
+
+
+def get_user_stocks(db_path: Path, user_id: int) -> list[tuple[str, int, int]]:
     """Get all stocks owned by a user with current value.
 
     Args:
@@ -176,9 +271,9 @@ def get_user_stocks(db_path: Path, user_id: int) -> list[tuple[str, int, float]]
         user_id (int): Discord user ID.
 
     Returns:
-        list[tuple[str, int, float]]: List of (stock_name, quantity, total_value).
+        list[tuple[str, int, int]]: (stock_name, quantity, total_value), values in cents.
     """
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cursor: sqlite3.Cursor = conn.cursor()
         cursor.execute(
             """
@@ -193,6 +288,104 @@ def get_user_stocks(db_path: Path, user_id: int) -> list[tuple[str, int, float]]
     return [(name, qty, qty * price) for name, qty, price in rows]
 
 
+async def get_user_stocks_async(db_path: Path, user_id: int) -> list[tuple[str, int, int]]:
+    """Awaitable get_user_stocks.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+
+    Returns:
+        list[tuple[str, int, int]]: (stock_name, quantity, total_value), values in cents.
+    """
+    return await run_read(get_user_stocks, db_path, user_id)
+
+
+def get_net_worth(user: User, db_path: Path) -> int:
+    """Calculate total net worth from balance and stock value.
+
+    Args:
+        user (User): User object.
+        db_path (Path): Path to users.db.
+
+    Returns:
+        int: Total networth in cents.
+    """
+    stock_value: int = sum(value for _, _, value in get_user_stocks(db_path, user.id))
+    return user.money + stock_value
+
+
+async def get_net_worth_async(user: User, db_path: Path) -> int:
+    """Awaitable get_net_worth.
+
+    Args:
+        user (User): User object.
+        db_path (Path): Path to users.db.
+
+    Returns:
+        int: Total networth in cents.
+    """
+    holdings: list[tuple[str, int, int]] = await get_user_stocks_async(db_path, user.id)
+    return user.money + sum(value for _, _, value in holdings)
+
+
+def _buy_stock(
+    conn: sqlite3.Connection,
+    balances: Balances,
+    user_id: int,
+    stock_name: str,
+    quantity: int,
+) -> tuple[tuple[bool, str], Deltas]:
+    """Transaction body for buying stocks.
+
+    Args:
+        conn (sqlite3.Connection): Connection inside the transaction.
+        balances (Balances): Locked balances.
+        user_id (int): Discord user ID.
+        stock_name (str): Name of the stock to buy.
+        quantity (int): Number of shares to buy.
+
+    Returns:
+        tuple[tuple[bool, str], Deltas]: (success, message) and balance changes.
+    """
+    cursor: sqlite3.Cursor = conn.cursor()
+    cursor.execute("SELECT price FROM stock_prices WHERE name = ?", (stock_name,))
+    row: tuple = cursor.fetchone()
+    if row is None:
+        return (False, f"Stock `{stock_name}` does not exist."), {}
+
+    price: int = row[0]
+    total_cost: int = price * quantity
+    balance: int = balances[user_id]
+
+    if balance < total_cost:
+        return (
+            False,
+            (
+                f"Insufficient funds. You need **${format_money(total_cost)}** but have "
+                f"**${format_money(balance)}**."
+            ),
+        ), {}
+
+    cursor.execute(
+        """
+        INSERT INTO user_stocks (user_id, stock_name, quantity)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_id, stock_name) DO UPDATE SET quantity = quantity + ?
+        """,
+        (user_id, stock_name, quantity, quantity),
+    )
+    cursor.execute(
+        "UPDATE users SET stock_value = stock_value + ? WHERE id = ?",
+        (total_cost, user_id),
+    )
+    record_ledger(conn, user_id, None, total_cost, "buy_stock", f"{quantity}x {stock_name}")
+
+    return (True, f"Bought **{quantity}x {stock_name}** for **${format_money(total_cost)}**."), {
+        user_id: -total_cost,
+    }
+
+
 def buy_stock(
     db_path: Path,
     user_id: int,
@@ -202,6 +395,8 @@ def buy_stock(
 ) -> tuple[bool, str]:
     """Buy stocks for a user, deducting from their money balance.
 
+    Doesn't take the user's transaction lock, coroutines should use buy_stock_async.
+
     Args:
         db_path (Path): Path to users.db.
         user_id (int): Discord user ID.
@@ -213,36 +408,92 @@ def buy_stock(
         tuple[bool, str]: (success, message)
     """
     user: User = User.create_if_not_exists(user_id=user_id, username=username)
+    result: tuple[bool, str]
+    deltas: Deltas
+    result, deltas = run_transaction(
+        db_path,
+        _buy_stock,
+        {user_id: user.money},
+        user_id,
+        stock_name,
+        quantity,
+    )
+    apply_deltas([user], deltas)
+    return result
+
+
+async def buy_stock_async(
+    db_path: Path,
+    user_id: int,
+    username: str,
+    stock_name: str,
+    quantity: int,
+) -> tuple[bool, str]:
+    """Buy stocks for a user as an atomic transaction.
 
-    with sqlite3.connect(db_path) as conn:
-        cursor: sqlite3.Cursor = conn.cursor()
-        cursor.execute("SELECT price FROM stock_prices WHERE name = ?", (stock_name,))
-        row: tuple = cursor.fetchone()
-        if row is None:
-            return False, f"Stock `{stock_name}` does not exist."
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+        username (str): Discord username.
+        stock_name (str): Name of the stock to buy.
+        quantity (int): Number of shares to buy.
 
-        price: float = row[0]
-        total_cost: float = price * quantity
+    Returns:
+        tuple[bool, str]: (success, message)
+    """
+    user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+    return await transact(db_path, [user], _buy_stock, user_id, stock_name, quantity)
 
-        if user.money < total_cost:
-            return (
-                False,
-                f"Insufficient funds. You need **${total_cost:,.2f}** but have **${user.money:,.2f}**.",  # noqa: E501
-            )
 
-        user.money -= total_cost
+def _sell_stock(
+    conn: sqlite3.Connection,
+    balances: Balances,  # noqa: ARG001 -- Selling can't fail for lack of money.
+    user_id: int,
+    stock_name: str,
+    quantity: int,
+) -> tuple[tuple[bool, str], Deltas]:
+    """Transaction body for selling stocks.
 
-        cursor.execute(
-            """
-            INSERT INTO user_stocks (user_id, stock_name, quantity)
-            VALUES (?, ?, ?)
-            ON CONFLICT(user_id, stock_name) DO UPDATE SET quantity = quantity + ?
-            """,
-            (user_id, stock_name, quantity, quantity),
-        )
-        conn.commit()
+    Args:
+        conn (sqlite3.Connection): Connection inside the transaction.
+        balances (Balances): Locked balances.
+        user_id (int): Discord user ID.
+        stock_name (str): Name of the stock to sell.
+        quantity (int): Number of shares to sell.
 
-    return True, f"Bought **{quantity}x {stock_name}** for **${total_cost:,.2f}**."
+    Returns:
+        tuple[tuple[bool, str], Deltas]: (success, message) and balance changes.
+    """
+    cursor: sqlite3.Cursor = conn.cursor()
+    cursor.execute(
+        "SELECT quantity FROM user_stocks WHERE user_id = ? AND stock_name = ?",
+        (user_id, stock_name),
+    )
+    row: tuple = cursor.fetchone()
+    if row is None or row[0] < quantity:
+        owned: int = row[0] if row else 0
+        return (False, f"You only own **{owned}x {stock_name}**."), {}
+
+    cursor.execute("SELECT price FROM stock_prices WHERE name = ?", (stock_name,))
+    price: int = cursor.fetchone()[0]
+    total_value: int = price * quantity
+
+    cursor.execute(
+        """
+        UPDATE user_stocks SET quantity = quantity - ?
+        WHERE user_id = ? AND stock_name = ?
+        """,
+        (quantity, user_id, stock_name),
+    )
+    cursor.execute(
+        "UPDATE users SET stock_value = stock_value - ? WHERE id = ?",
+        (total_value, user_id),
+    )
+    record_ledger(conn, None, user_id, total_value, "sell_stock", f"{quantity}x {stock_name}")
+
+    return (True, f"Sold **{quantity}x {stock_name}** for **${format_money(total_value)}**."), {
+        user_id: total_value,
+    }
 
 
 def sell_stock(
@@ -254,6 +505,8 @@ def sell_stock(
 ) -> tuple[bool, str]:
     """Sell stocks for a user, adding to their money balance.
 
+    Doesn't take the user's transaction lock, coroutines should use sell_stock_async.
+
     Args:
         db_path (Path): Path to users.db.
         user_id (int): Discord user ID.
@@ -265,31 +518,105 @@ def sell_stock(
         tuple[bool, str]: (success, message)
     """
     user: User = User.create_if_not_exists(user_id=user_id, username=username)
+    result: tuple[bool, str]
+    deltas: Deltas
+    result, deltas = run_transaction(
+        db_path,
+        _sell_stock,
+        {user_id: user.money},
+        user_id,
+        stock_name,
+        quantity,
+    )
+    apply_deltas([user], deltas)
+    return result
+
+
+async def sell_stock_async(
+    db_path: Path,
+    user_id: int,
+    username: str,
+    stock_name: str,
+    quantity: int,
+) -> tuple[bool, str]:
+    """Sell stocks for a user as an atomic transaction.
 
-    with sqlite3.connect(db_path) as conn:
-        cursor: sqlite3.Cursor = conn.cursor()
-        cursor.execute(
-            "SELECT quantity FROM user_stocks WHERE user_id = ? AND stock_name = ?",
-            (user_id, stock_name),
-        )
-        row: tuple = cursor.fetchone()
-        if row is None or row[0] < quantity:
-            owned: int = row[0] if row else 0
-            return False, f"You only own **{owned}x {stock_name}**."
+    Args:
+        db_path (Path): Path to users.db.
+        user_id (int): Discord user ID.
+        username (str): Discord username.
+        stock_name (str): Name of the stock to sell.
+        quantity (int): Number of shares to sell.
 
-        cursor.execute("SELECT price FROM stock_prices WHERE name = ?", (stock_name,))
-        price: float = cursor.fetchone()[0]
-        total_value: float = price * quantity
+    Returns:
+        tuple[bool, str]: (success, message)
+    """
+    user: User = await User.create_if_not_exists_async(user_id=user_id, username=username)
+    return await transact(db_path, [user], _sell_stock, user_id, stock_name, quantity)
 
-        user.money += total_value
 
-        cursor.execute(
-            """
-            UPDATE user_stocks SET quantity = quantity - ?
-            WHERE user_id = ? AND stock_name = ?
-            """,
-            (quantity, user_id, stock_name),
+def find_stock_value_drift(db_path: Path) -> list[tuple[int, int, int]]:
+    """Recompute every user's stock value from their holdings and compare it to the stored one.
+
+    Args:
+        db_path (Path): Path to users.db.
+
+    Returns:
+        list[tuple[int, int, int]]: (user_id, stored, actual) for every mismatch, in cents.
+    """
+    with connect(db_path) as conn:
+        return conn.execute(
+            f"""
+            SELECT id, stock_value, actual FROM (
+                SELECT id, stock_value, {HOLDINGS_VALUE_SQL} AS actual FROM users
+            )
+            WHERE stock_value != actual
+            ORDER BY id
+            """,  # noqa: S608
+        ).fetchall()
+
+
+async def find_stock_value_drift_async(db_path: Path) -> list[tuple[int, int, int]]:
+    """Awaitable find_stock_value_drift.
+
+    Args:
+        db_path (Path): Path to users.db.
+
+    Returns:
+        list[tuple[int, int, int]]: (user_id, stored, actual) for every mismatch, in cents.
+    """
+    return await run_read(find_stock_value_drift, db_path)
+
+
+def repair_stock_values(db_path: Path) -> int:
+    """Overwrite every drifted stock value with the one recomputed from holdings.
+
+    Args:
+        db_path (Path): Path to users.db.
+
+    Returns:
+        int: Users repaired.
+    """
+    with connect(db_path) as conn:
+        cursor: sqlite3.Cursor = conn.execute(
+            f"""
+            UPDATE users SET stock_value = {HOLDINGS_VALUE_SQL}
+            WHERE stock_value != {HOLDINGS_VALUE_SQL}
+            """,  # noqa: S608
         )
-        conn.commit()
+        repaired: int = cursor.rowcount
+    if repaired:
+        logger.warning(f"Repaired the stock value of {repaired} users in {db_path}.")
+    return repaired
+
 
-    return True, f"Sold **{quantity}x {stock_name}** for **${total_value:,.2f}**."
+async def repair_stock_values_async(db_path: Path) -> int:
+    """Awaitable repair_stock_values, run on the writer so no trade lands in between.
+
+    Args:
+        db_path (Path): Path to users.db.
+
+    Returns:
+        int: Users repaired.
+    """
+    return await run_write(db_path, repair_stock_values, db_path)
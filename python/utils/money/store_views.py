@@ -1,6 +1,5 @@
 """Discord UI views for the store."""
 
-import sqlite3
 from collections.abc import Awaitable, Callable
 
 from discord import (
@@ -15,9 +14,11 @@ from discord import (
 from discord.ext.commands import Bot
 from discord.ui import Button, Modal, TextInput, View, button
 from user import User
-from utils.misc.inspiration import INSPIRATION_DB_PATH, add_quote, validate_quote
+from utils.misc.inspiration import INSPIRATION_DB_PATH, add_quote_async, validate_quote
+from utils.misc.leaderboard_cache import LEADERBOARD_CACHE
 from utils.money.stocks import USERS_DB_PATH
-from utils.numbers import format_number
+from utils.money.transactions import prestige, spend
+from utils.numbers import CENTS_PER_DOLLAR, format_money
 
 
 class TextModal(Modal):
@@ -60,11 +61,12 @@ class StoreView(View):
     CUCKDIFF_ID: int = 284502028896698369
     KARMA_ID: int = 222002830964162561
     DIZZNEM_ID: int = 1229590915610574893
+    PRESTIGE_COST: int = 100_000_000 * CENTS_PER_DOLLAR
 
     def __init__(
         self,
         user_id: int,
-        balance: float,
+        balance: int,
         prestige: int,
         bot: Bot,
     ) -> None:
@@ -72,13 +74,13 @@ class StoreView(View):
 
         Args:
             user_id (int): Discord user ID.
-            balance (float): User's current balance.
+            balance (int): User's current balance in cents.
             prestige (int): User's current prestige count.
             bot: DizznemBot instance.
         """
         super().__init__(timeout=60)
         self.user_id: int = user_id
-        self.balance: float = balance
+        self.balance: int = balance
         self.prestige: int = prestige
         self.bot: Bot = bot
         self.message: Message | None = None
@@ -108,11 +110,11 @@ class StoreView(View):
             await self.message.edit(view=self)
 
     @staticmethod
-    def build_embed(balance: float, prestige: int) -> Embed:
+    def build_embed(balance: int, prestige: int) -> Embed:
         """Build the store embed.
 
         Args:
-            balance (float): User's balance.
+            balance (int): User's balance in cents.
             prestige (int): User's prestige.
 
         Returns:
@@ -122,7 +124,7 @@ class StoreView(View):
         embed = Embed(title="🛒 Store", color=Color.og_blurple())
         embed.add_field(
             name="💰 Your Balance",
-            value=f"**${format_number(balance)}**",
+            value=f"**${format_money(balance)}**",
             inline=False,
         )
         embed.add_field(
@@ -162,26 +164,32 @@ class StoreView(View):
         )
         return embed
 
-    def _check_balance(self, cost: float) -> bool:
+    def _check_balance(self, cost: int) -> bool:
         """Check if the user can afford an item.
 
         Args:
-            cost (float): Item cost.
+            cost (int): Item cost in cents.
 
         Returns:
             bool: True if affordable.
         """
         return self.balance >= cost
 
-    async def _deduct(self, cost: float) -> None:
-        """Deduct cost from user balance via User cache.
+    async def _deduct(self, cost: int, item: str) -> bool:
+        """Deduct cost from user balance as an atomic transaction.
 
         Args:
-            cost (float): Amount to deduct.
+            cost (int): Amount to deduct in cents.
+            item (str): What was bought, recorded in the ledger.
+
+        Returns:
+            bool: False if the user can no longer afford it.
         """
-        user: User = User.create_if_not_exists(user_id=self.user_id, username="")
-        user.money -= cost
-        self.balance -= cost
+        user: User = await User.create_if_not_exists_async(user_id=self.user_id, username="")
+        if not await spend(USERS_DB_PATH, user, cost, "store", item):
+            return False
+        self.balance = user.money
+        return True
 
     async def _insufficient_funds(self, interaction: Interaction) -> None:
         """Send insufficient funds message.
@@ -206,12 +214,14 @@ class StoreView(View):
             interaction (Interaction): The interaction.
             _ (Button): Unused button reference.
         """
-        cost: float = 10_000
+        cost: int = 10_000 * CENTS_PER_DOLLAR
         if not self._check_balance(cost):
             await self._insufficient_funds(interaction)
             return
 
-        await self._deduct(cost)
+        if not await self._deduct(cost, "ping_cuckdiff"):
+            await self._insufficient_funds(interaction)
+            return
         ping_count: int = (self.prestige + 1) * 5
         await interaction.response.send_message(
             embed=Embed(
@@ -233,12 +243,14 @@ class StoreView(View):
             interaction (Interaction): The interaction.
             _ (Button): Unused button reference.
         """
-        cost: float = 50_000
+        cost: int = 50_000 * CENTS_PER_DOLLAR
         if not self._check_balance(cost):
             await self._insufficient_funds(interaction)
             return
 
-        await self._deduct(cost)
+        if not await self._deduct(cost, "ask_spark"):
+            await self._insufficient_funds(interaction)
+            return
         await interaction.response.send_message(
             embed=Embed(
                 title="✨ Purchase Successful",
@@ -258,13 +270,15 @@ class StoreView(View):
             interaction (Interaction): The interaction.
             _ (Button): Unused button reference.
         """
-        cost: float = 100_000
+        cost: int = 100_000 * CENTS_PER_DOLLAR
         if not self._check_balance(cost):
             await self._insufficient_funds(interaction)
             return
 
         async def on_submit(inter: Interaction, text: str) -> None:
-            await self._deduct(cost)
+            if not await self._deduct(cost, "add_quote"):
+                await self._insufficient_funds(inter)
+                return
             is_valid: bool
             error: str
             is_valid, error = validate_quote(text)
@@ -279,7 +293,7 @@ class StoreView(View):
                 )
                 return
 
-            add_quote(INSPIRATION_DB_PATH, text)
+            await add_quote_async(INSPIRATION_DB_PATH, text)
             await inter.response.send_message(
                 embed=Embed(
                     title="💬 Purchase Successful",
@@ -299,12 +313,14 @@ class StoreView(View):
             interaction (Interaction): The interaction.
             _ (Button): Unused button reference.
         """
-        cost: float = 500_000
+        cost: int = 500_000 * CENTS_PER_DOLLAR
         if not self._check_balance(cost):
             await self._insufficient_funds(interaction)
             return
 
-        await self._deduct(cost)
+        if not await self._deduct(cost, "inspo_video"):
+            await self._insufficient_funds(interaction)
+            return
         await interaction.response.send_message(
             embed=Embed(
                 title="🎥 Purchase Successful",
@@ -324,7 +340,7 @@ class StoreView(View):
             interaction (Interaction): The interaction.
             _ (Button): Unused button reference.
         """
-        cost: float = 1_000_000
+        cost: int = 1_000_000 * CENTS_PER_DOLLAR
         if not self._check_balance(cost):
             await self._insufficient_funds(interaction)
             return
@@ -339,7 +355,9 @@ class StoreView(View):
                     ephemeral=True,
                 )
                 return
-            await self._deduct(cost)
+            if not await self._deduct(cost, "send_inspo"):
+                await self._insufficient_funds(inter)
+                return
             await channel.send(
                 embed=Embed(
                     title="✨ Inspirational Message",
@@ -366,7 +384,7 @@ class StoreView(View):
             interaction (Interaction): The interaction.
             _ (Button): Unused button reference.
         """
-        cost: float = 10_000_000
+        cost: int = 10_000_000 * CENTS_PER_DOLLAR
         if not self._check_balance(cost):
             await self._insufficient_funds(interaction)
             return
@@ -381,7 +399,9 @@ class StoreView(View):
                     ephemeral=True,
                 )
                 return
-            await self._deduct(cost)
+            if not await self._deduct(cost, "send_qotd"):
+                await self._insufficient_funds(inter)
+                return
             await channel.send(
                 embed=Embed(
                     title="❓ Question of the Day",
@@ -410,7 +430,7 @@ class StoreView(View):
             interaction (Interaction): The interaction.
             _ (Button): Unused button reference.
         """
-        cost: float = 100_000_000
+        cost: int = self.PRESTIGE_COST
         if not self._check_balance(cost):
             await self._insufficient_funds(interaction)
             return
@@ -472,19 +492,20 @@ class PrestigeConfirmView(View):
             interaction (Interaction): The interaction.
             _ (Button): Unused button reference.
         """
-        user: User = User.create_if_not_exists(user_id=self.user_id, username="")
-        user.money = 0
-        user.prestige += 1
-
-        # Wipe all stock holdings
-        with sqlite3.connect(USERS_DB_PATH) as conn:
-            conn.execute(
-                "DELETE FROM user_stocks WHERE user_id = ?",
-                (self.user_id,),
+        user: User = await User.create_if_not_exists_async(user_id=self.user_id, username="")
+        self.stop()
+        if not await prestige(USERS_DB_PATH, user, StoreView.PRESTIGE_COST):
+            await interaction.response.edit_message(
+                embed=Embed(
+                    title="❌ Insufficient Funds",
+                    color=Color.red(),
+                    description="You no longer have enough money to prestige.",
+                ),
+                view=None,
             )
-            conn.commit()
+            return
+        LEADERBOARD_CACHE.invalidate()
 
-        self.stop()
         await interaction.response.edit_message(
             embed=Embed(
                 title="⭐ Prestiged!",
@@ -0,0 +1,331 @@
+"""Atomic money transactions.
+
+Anything that checks a balance and then changes it goes through here. A transaction holds an
+asyncio lock for every user involved while it runs, so two interactions can't both spend the
+same money. It writes the new balances, any related rows (e.g. user_stocks) and a ledger
+entry in one SQLite transaction on the database writer thread.
+
+The in-memory User only changes once that transaction has committed, and by the delta rather
+than to an absolute value, so unrelated changes made in the meantime (e.g. $daily) are kept.
+Anything else that lowers or overwrites a balance (gambling, trivia penalties, admin commands)
+must hold the same lock, see adjust_balance(), or a transaction could spend money that is
+already gone by the time it commits.
+"""
+
+import asyncio
+import sqlite3
+import time
+import weakref
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, TypeVar
+
+from database import connect, run_write
+from user import User
+
+T = TypeVar("T")
+
+# Amounts are in cents.
+Balances = dict[int, int]
+Deltas = dict[int, int]
+TransactionFn = Callable[..., tuple[T, Deltas]]
+
+# A lock only lives while a transaction holds or waits on it.
+USER_LOCKS: weakref.WeakValueDictionary[int, asyncio.Lock] = weakref.WeakValueDictionary()
+
+
+@asynccontextmanager
+async def lock_users(*user_ids: int) -> AsyncIterator[None]:
+    """Hold the transaction lock of every given user.
+
+    Locks are always taken in ascending ID order, so two transactions over the same users
+    can't deadlock.
+
+    Args:
+        *user_ids (int): Discord user IDs.
+
+    Yields:
+        None: Once every lock is held.
+    """
+    locks: list[asyncio.Lock] = []
+    for user_id in sorted(set(user_ids)):
+        lock: asyncio.Lock | None = USER_LOCKS.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            USER_LOCKS[user_id] = lock
+        locks.append(lock)
+
+    acquired: list[asyncio.Lock] = []
+    try:
+        for lock in locks:
+            await lock.acquire()
+            acquired.append(lock)
+        yield
+    finally:
+        for lock in reversed(acquired):
+            lock.release()
+
+
+def record_ledger(
+    conn: sqlite3.Connection,
+    from_user: int | None,
+    to_user: int | None,
+    amount: int,
+    reason: str,
+    memo: str = "",
+) -> None:
+    """Append a transfer to the ledger.
+
+    Args:
+        conn (sqlite3.Connection): Connection inside the transaction.
+        from_user (int | None): Paying user, or None for the bot (e.g. a stock sale).
+        to_user (int | None): Receiving user, or None for the bot (e.g. a store purchase).
+        amount (int): Amount moved in cents.
+        reason (str): Short machine-readable kind, e.g. ``give`` or ``buy_stock``.
+        memo (str): Free-form detail. Defaults to "".
+    """
+    conn.execute(
+        """
+        INSERT INTO ledger (created_at, from_user, to_user, amount, reason, memo)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (int(time.time()), from_user, to_user, amount, reason, memo),
+    )
+
+
+def run_transaction(
+    db_path: Path,
+    fn: TransactionFn[T],
+    balances: Balances,
+    *args: Any,
+) -> tuple[T, Deltas]:
+    """Run a transaction body and persist the resulting balances, all in one transaction.
+
+    Args:
+        db_path (Path): Path to users.db.
+        fn (TransactionFn[T]): Body, called as ``fn(conn, balances, *args)``. Returns its
+            result and the balance change per user ID.
+        balances (Balances): Balance of every involved user, read under their locks.
+        *args (Any): Extra arguments for fn.
+
+    Returns:
+        tuple[T, Deltas]: fn's result and balance changes.
+    """
+    with connect(db_path) as conn:
+        result: T
+        deltas: Deltas
+        result, deltas = fn(conn, balances, *args)
+        conn.executemany(
+            "UPDATE users SET money = ? WHERE id = ?",
+            [(balances[user_id] + delta, user_id) for user_id, delta in deltas.items() if delta],
+        )
+    return result, deltas
+
+
+def apply_deltas(users: Sequence[User], deltas: Deltas) -> None:
+    """Apply committed balance changes to the cached users.
+
+    Args:
+        users (Sequence[User]): Users involved in the transaction.
+        deltas (Deltas): Balance change per user ID.
+    """
+    for user in users:
+        delta: int = deltas.get(user.id, 0)
+        if delta:
+            user.money += delta
+
+
+async def adjust_balance(user: User, delta: int, minimum: int = 0) -> bool:
+    """Change a balance in memory only, e.g. a gamble or a trivia reward.
+
+    Holds the user's transaction lock, so the change waits for any transaction that already
+    read the balance.
+
+    Args:
+        user (User): User whose balance changes.
+        delta (int): Change in cents.
+        minimum (int): Balance the user must have for the change to happen. Defaults to 0.
+
+    Returns:
+        bool: False if the user's balance is below minimum.
+    """
+    async with lock_users(user.id):
+        if user.money < minimum:
+            return False
+        user.money += delta
+    return True
+
+
+async def transact(db_path: Path, users: Sequence[User], fn: TransactionFn[T], *args: Any) -> T:
+    """Run a transaction body for some users, holding their locks throughout.
+
+    Args:
+        db_path (Path): Path to users.db.
+        users (Sequence[User]): Every user whose balance fn may change.
+        fn (TransactionFn[T]): Body, see run_transaction().
+        *args (Any): Extra arguments for fn.
+
+    Returns:
+        T: fn's result.
+    """
+    async with lock_users(*(user.id for user in users)):
+        balances: Balances = {user.id: user.money for user in users}
+        result: T
+        deltas: Deltas
+        result, deltas = await run_write(db_path, run_transaction, db_path, fn, balances, *args)
+        apply_deltas(users, deltas)
+    return result
+
+
+def _transfer(
+    conn: sqlite3.Connection,
+    balances: Balances,
+    sender_id: int,
+    recipient_id: int,
+    amount: int,
+) -> tuple[bool, Deltas]:
+    """Transaction body for transfer().
+
+    Args:
+        conn (sqlite3.Connection): Connection inside the transaction.
+        balances (Balances): Locked balances.
+        sender_id (int): Paying user.
+        recipient_id (int): Receiving user.
+        amount (int): Amount to move.
+
+    Returns:
+        tuple[bool, Deltas]: Whether the sender could afford it, and balance changes.
+    """
+    # Both deltas would land on one user and create money, transfer() rejects this too.
+    if sender_id == recipient_id or amount <= 0 or balances[sender_id] < amount:
+        return False, {}
+    record_ledger(conn, sender_id, recipient_id, amount, "give")
+    return True, {sender_id: -amount, recipient_id: amount}
+
+
+async def transfer(db_path: Path, sender: User, recipient: User, amount: int) -> bool:
+    """Move money between two users.
+
+    Args:
+        db_path (Path): Path to users.db.
+        sender (User): Paying user.
+        recipient (User): Receiving user.
+        amount (int): Amount to move, must be positive.
+
+    Returns:
+        bool: False if the sender doesn't have enough money.
+
+    Raises:
+        ValueError: If amount isn't positive or sender and recipient are the same user.
+    """
+    if amount <= 0:
+        msg: str = f"Transfer amount must be positive, got {amount}."
+        raise ValueError(msg)
+    if sender.id == recipient.id:
+        msg: str = f"User {sender.id} can't transfer money to themselves."
+        raise ValueError(msg)
+    return await transact(db_path, [sender, recipient], _transfer, sender.id, recipient.id, amount)
+
+
+def _spend(
+    conn: sqlite3.Connection,
+    balances: Balances,
+    user_id: int,
+    amount: int,
+    reason: str,
+    memo: str,
+) -> tuple[bool, Deltas]:
+    """Transaction body for spend().
+
+    Args:
+        conn (sqlite3.Connection): Connection inside the transaction.
+        balances (Balances): Locked balances.
+        user_id (int): Paying user.
+        amount (int): Amount to spend.
+        reason (str): Ledger reason.
+        memo (str): Ledger memo.
+
+    Returns:
+        tuple[bool, Deltas]: Whether the user could afford it, and balance changes.
+    """
+    if balances[user_id] < amount:
+        return False, {}
+    record_ledger(conn, user_id, None, amount, reason, memo)
+    return True, {user_id: -amount}
+
+
+async def spend(db_path: Path, user: User, amount: int, reason: str, memo: str = "") -> bool:
+    """Take money from a user, e.g. for a store purchase.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user (User): Paying user.
+        amount (int): Amount to spend.
+        reason (str): Ledger reason.
+        memo (str): Ledger memo. Defaults to "".
+
+    Returns:
+        bool: False if the user doesn't have enough money.
+    """
+    return await transact(db_path, [user], _spend, user.id, amount, reason, memo)
+
+
+def _prestige(
+    conn: sqlite3.Connection,
+    balances: Balances,
+    user_id: int,
+    cost: int,
+) -> tuple[bool, Deltas]:
+    """Transaction body for prestige().
+
+    Args:
+        conn (sqlite3.Connection): Connection inside the transaction.
+        balances (Balances): Locked balances.
+        user_id (int): Prestiging user.
+        cost (int): Balance required to prestige.
+
+    Returns:
+        tuple[bool, Deltas]: Whether the user could afford it, and balance changes.
+    """
+    balance: int = balances[user_id]
+    if balance < cost:
+        return False, {}
+    conn.execute("DELETE FROM user_stocks WHERE user_id = ?", (user_id,))
+    conn.execute(
+        "UPDATE users SET prestige = prestige + 1, stock_value = 0 WHERE id = ?",
+        (user_id,),
+    )
+    record_ledger(conn, user_id, None, balance, "prestige")
+    return True, {user_id: -balance}
+
+
+async def prestige(db_path: Path, user: User, cost: int) -> bool:
+    """Reset a user's money and stocks and give them a prestige.
+
+    Args:
+        db_path (Path): Path to users.db.
+        user (User): Prestiging user.
+        cost (int): Balance required to prestige.
+
+    Returns:
+        bool: False if the user doesn't have enough money.
+    """
+    async with lock_users(user.id):
+        prestiged: bool
+        deltas: Deltas
+        prestiged, deltas = await run_write(
+            db_path,
+            run_transaction,
+            db_path,
+            _prestige,
+            {user.id: user.money},
+            user.id,
+            cost,
+        )
+        # The prestige was written in the same transaction as the money reset, so apply both
+        # before anyone else can see the user.
+        apply_deltas([user], deltas)
+        if prestiged:
+            user.prestige += 1
+    return prestiged
@@ -1,9 +1,11 @@
 """Number related util."""
 
-from pathlib import Path
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 
-from user import User
-from utils.money.stocks import get_user_stocks
+CENTS_PER_DOLLAR: int = 100
+# Largest balance in cents, a quadrillion dollars. SQLite and the journal store money as signed
+# 64-bit integers, and this leaves room for sums like net worth to stay within that too.
+MAX_MONEY: int = 10**15 * CENTS_PER_DOLLAR
 
 
 def format_number(number: float) -> str:
@@ -19,41 +21,68 @@ def format_number(number: float) -> str:
     return formatted_money.removesuffix(".00")
 
 
-def convert_money_str(money_str: str) -> float:
-    """Convert money string to valid float.
+def format_money(cents: int) -> str:
+    """Format an amount of money held in cents.
+
+    Pure integer formatting, so it is exact at any size and cheaper than going through a
+    float.
+
+    Args:
+        cents (int): Amount in cents.
+
+    Returns:
+        str: Dollars with thousands separators, cents only shown when non-zero.
+    """
+    dollars: int
+    remainder: int
+    dollars, remainder = divmod(abs(cents), CENTS_PER_DOLLAR)
+    sign: str = "-" if cents < 0 else ""
+    if remainder:
+        return f"{sign}{dollars:,}.{remainder:02d}"
+    return f"{sign}{dollars:,}"
+
+
+def convert_money_str(money_str: str) -> int:
+    """Convert a money string to cents.
 
     Args:
-        money_str (str): Money formatted string.
+        money_str (str): Money formatted string, e.g. ``$1,500.75``.
 
     Returns:
-        float: Valid float.
+        int: Amount in cents, rounded half up to the nearest cent.
+
+    Raises:
+        ValueError: If the string isn't a number or is larger than MAX_MONEY either way.
     """
+    msg: str = f"Invalid money value: {money_str}"
     if isinstance(money_str, (int, float)):
-        return money_str
+        money_str = str(money_str)
 
     cleaned: str = money_str.replace("$", "").replace(",", "").strip()
 
     try:
-        value = float(cleaned)
-    except ValueError as e:
-        msg: str = f"Invalid money value: {money_str}"
+        value: Decimal = Decimal(cleaned)
+    except InvalidOperation as e:
         raise ValueError(msg) from e
+    if not value.is_finite():
+        raise ValueError(msg)
 
-    return value
+    cents: int = int((value * CENTS_PER_DOLLAR).to_integral_value(rounding=ROUND_HALF_UP))
+    if abs(cents) > MAX_MONEY:
+        raise ValueError(msg)
+    return cents
 
 
-def get_net_worth(user: User, db_path: Path) -> float:
-    """Calculate total net worth from balance and stock value.
+def clamp_money(cents: int) -> int:
+    """Limit an amount to what can be stored.
 
     Args:
-        user (User): User object.
-        db_path (Path): Path to users.db.
+        cents (int): Amount in cents.
 
     Returns:
-        float: Total networth.
+        int: cents, capped at MAX_MONEY either way.
     """
-    stock_value: float = sum(value for _, _, value in get_user_stocks(db_path, user.id))
-    return user.money + stock_value
+    return max(-MAX_MONEY, min(cents, MAX_MONEY))
 
 
 def format_duration(seconds: float) -> str:
@@ -0,0 +1,253 @@
+"""Tests for utils/misc/ai.py, against a local stub of the DeepSeek API."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from utils import http_client
+from utils.http_client import HttpClient
+from utils.misc import ai
+from utils.misc.ai import StreamedReply, get_ai_response, stream_ai_response
+
+
+def completion(content: str) -> dict[str, Any]:
+    """Build a chat completion body."""
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+class StubDeepSeek:
+    """Local chat completions API answering with queued bodies.
+
+    A queued int is sent as an error status, a float as a delay before answering and a
+    list as a stream of content deltas (a float in it pauses the stream).
+    """
+
+    def __init__(self) -> None:
+        """Start with nothing queued, requests then get a default completion."""
+        self.queued: list[Any] = []
+        self.received: list[dict[str, Any]] = []
+        app: web.Application = web.Application()
+        app.router.add_post("/chat", self._handle)
+        self.server: TestServer = TestServer(app)
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Answer with the next queued body."""
+        self.received.append(await request.json())
+        body: Any = self.queued.pop(0) if self.queued else completion("default")
+        if isinstance(body, list):
+            return await self._stream(request, body)
+        if isinstance(body, float):
+            await asyncio.sleep(body)
+            body = completion("late")
+        if isinstance(body, int):
+            return web.Response(status=body)
+        return web.json_response(body)
+
+    @staticmethod
+    async def _stream(request: web.Request, pieces: list[Any]) -> web.StreamResponse:
+        """Send content deltas as server-sent events, then [DONE]."""
+        response: web.StreamResponse = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream"},
+        )
+        await response.prepare(request)
+        for piece in pieces:
+            if isinstance(piece, float):
+                await asyncio.sleep(piece)
+                continue
+            chunk: dict[str, Any] = {"choices": [{"delta": {"content": piece}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+class FakeMessage:
+    """Sent message recording its edits."""
+
+    def __init__(self, content: str) -> None:
+        """Record the first content."""
+        self.contents: list[str] = [content]
+
+    async def edit(self, content: str) -> None:
+        """Record an edit."""
+        self.contents.append(content)
+
+
+class FakeChannel:
+    """Channel recording what is sent to it."""
+
+    def __init__(self) -> None:
+        """Start with nothing sent."""
+        self.sent: list[FakeMessage] = []
+
+    async def send(self, content: str) -> FakeMessage:
+        """Record a new message."""
+        message: FakeMessage = FakeMessage(content)
+        self.sent.append(message)
+        return message
+
+
+async def collect(client: HttpClient, prompt: str = "hello") -> list[str]:
+    """Gather every streamed piece."""
+    return [piece async for piece in stream_ai_response(client, prompt, "key", [])]
+
+
+@pytest.fixture
+async def api(monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[StubDeepSeek]:
+    """Run the stub API and point ai.py at it."""
+    stub: StubDeepSeek = StubDeepSeek()
+    await stub.server.start_server()
+    monkeypatch.setattr(ai, "API_URL", str(stub.server.make_url("/chat")))
+    monkeypatch.setattr(http_client, "RETRY_BACKOFF", 0)
+    yield stub
+    await stub.server.close()
+
+
+@pytest.fixture
+async def client() -> AsyncIterator[HttpClient]:
+    """Open an HTTP client."""
+    http: HttpClient = HttpClient()
+    await http.start()
+    yield http
+    await http.close()
+
+
+class TestGetAiResponse:
+    """Tests for get_ai_response."""
+
+    async def test_returns_reply_with_context(
+        self,
+        api: StubDeepSeek,
+        client: HttpClient,
+    ) -> None:
+        """Test that the reply is returned and the context is sent before the prompt."""
+        api.queued.append(completion("  hi there  "))
+        context: list[dict] = [{"role": "user", "content": "earlier"}]
+
+        assert await get_ai_response(client, "hello", "key", context) == "hi there"
+        messages: list[dict] = api.received[0]["messages"]
+        assert [m["content"] for m in messages[1:]] == ["earlier", "hello"]
+
+    async def test_retries_overload(self, api: StubDeepSeek, client: HttpClient) -> None:
+        """Test that a 503 from the API is retried transparently."""
+        api.queued.extend([503, completion("recovered")])
+
+        assert await get_ai_response(client, "hello", "key", []) == "recovered"
+
+    async def test_timeout_message(
+        self,
+        api: StubDeepSeek,
+        client: HttpClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a slow API gets the timeout reply."""
+        monkeypatch.setattr(ai, "AI_DEADLINE", 0.1)
+        api.queued.append(1.0)
+
+        assert await get_ai_response(client, "hello", "key", []) == (
+            "The request timed out. Try again later."
+        )
+
+    async def test_error_message(self, api: StubDeepSeek, client: HttpClient) -> None:
+        """Test that a rejected request gets the generic error reply."""
+        api.queued.append(401)
+
+        assert await get_ai_response(client, "hello", "key", []) == (
+            "Something went wrong generating a response."
+        )
+
+    async def test_unexpected_body(self, api: StubDeepSeek, client: HttpClient) -> None:
+        """Test that a body without choices gets the fallback reply."""
+        api.queued.append({"error": "nope"})
+
+        assert await get_ai_response(client, "hello", "key", []) == (
+            "I couldn't generate a response right now. Try again later."
+        )
+
+
+class TestStreamAiResponse:
+    """Tests for stream_ai_response."""
+
+    async def test_yields_pieces(self, api: StubDeepSeek, client: HttpClient) -> None:
+        """Test that deltas are yielded in order, leading whitespace dropped, up to [DONE]."""
+        api.queued.append(["", "  Hi", " there", "!"])
+
+        assert await collect(client) == ["Hi", " there", "!"]
+        assert api.received[0]["stream"] is True
+
+    async def test_error_before_text(self, api: StubDeepSeek, client: HttpClient) -> None:
+        """Test that a rejected stream yields the generic error reply."""
+        api.queued.append(401)
+
+        assert await collect(client) == ["Something went wrong generating a response."]
+
+    async def test_timeout_after_text(
+        self,
+        api: StubDeepSeek,
+        client: HttpClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a stream cut off part way keeps its text and says it was cut off."""
+        monkeypatch.setattr(ai, "AI_STREAM_DEADLINE", 0.3)
+        api.queued.append(["partial", 1.0, "never"])
+
+        assert await collect(client) == ["partial", ai.CUT_OFF_NOTE]
+
+    async def test_empty_stream(self, api: StubDeepSeek, client: HttpClient) -> None:
+        """Test that a stream without text gets the fallback reply."""
+        api.queued.append([])
+
+        assert await collect(client) == [
+            "I couldn't generate a response right now. Try again later.",
+        ]
+
+
+class TestStreamedReply:
+    """Tests for StreamedReply."""
+
+    async def test_edits_are_throttled(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that pieces arriving together cause one send, then finish() shows the rest."""
+        monkeypatch.setattr(ai, "STREAM_EDIT_INTERVAL", 60.0)
+        channel: FakeChannel = FakeChannel()
+        reply: StreamedReply = StreamedReply(channel)  # type: ignore[arg-type]
+
+        for piece in ("Hello", " there", " friend"):
+            await reply.add(piece)
+
+        assert await reply.finish() == "Hello there friend"
+        assert len(channel.sent) == 1
+        assert channel.sent[0].contents == ["Hello", "Hello there friend"]
+
+    async def test_edits_after_interval(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that every piece is shown when the interval has passed."""
+        monkeypatch.setattr(ai, "STREAM_EDIT_INTERVAL", 0.0)
+        channel: FakeChannel = FakeChannel()
+        reply: StreamedReply = StreamedReply(channel)  # type: ignore[arg-type]
+
+        for piece in ("a", "b", "c"):
+            await reply.add(piece)
+        await reply.finish()
+
+        assert channel.sent[0].contents == ["a", "ab", "abc"]
+
+    async def test_long_reply_is_truncated(self) -> None:
+        """Test that the message never goes over Discord's length limit."""
+        channel: FakeChannel = FakeChannel()
+        reply: StreamedReply = StreamedReply(channel)  # type: ignore[arg-type]
+
+        await reply.add("x" * (ai.DISCORD_MESSAGE_LIMIT + 50))
+        text: str = await reply.finish()
+
+        assert len(text) == ai.DISCORD_MESSAGE_LIMIT + 50
+        assert len(channel.sent[0].contents[-1]) == ai.DISCORD_MESSAGE_LIMIT
+
+    async def test_empty_reply(self) -> None:
+        """Test that finishing without text sends the fallback reply."""
+        channel: FakeChannel = FakeChannel()
+
+        assert await StreamedReply(channel).finish() == ai.EMPTY_REPLY  # type: ignore[arg-type]
+        assert channel.sent[0].contents == [ai.EMPTY_REPLY]
@@ -0,0 +1,157 @@
+"""Tests for utils/misc/ai_cache.py."""
+
+import asyncio
+
+import pytest
+from utils.misc.ai import ERROR_REPLY
+from utils.misc.ai_cache import AiReplyCache, normalize_prompt
+
+CONTEXT: list[dict] = [
+    {"role": "user", "content": "hi"},
+    {"role": "assistant", "content": "hello!"},
+]
+
+
+async def ask(replies: AiReplyCache, key: str, reply: str, calls: list[str]) -> str:
+    """Answer a request the way the bot does, counting API calls."""
+    cached: str | None = await replies.get_or_wait(key)
+    if cached is not None:
+        return cached
+    answer: str | None = None
+    try:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        answer = reply
+    finally:
+        replies.resolve(key, answer)
+    return answer
+
+
+class TestKeys:
+    """Tests for cache keys."""
+
+    def test_normalized_prompts_share_a_key(self) -> None:
+        """Test that case, spacing and trailing punctuation don't matter."""
+        assert normalize_prompt("  Who   are YOU?? ") == "who are you"
+        assert AiReplyCache.key("who are you", []) == AiReplyCache.key("Who are you?", [])
+
+    def test_context_is_part_of_the_key(self) -> None:
+        """Test that the same prompt in different conversations gets different keys."""
+        assert AiReplyCache.key("why", CONTEXT) != AiReplyCache.key("why", [])
+        assert AiReplyCache.key("why", CONTEXT) == AiReplyCache.key("why", list(CONTEXT))
+
+
+class TestCaching:
+    """Tests for lookups, expiry and eviction."""
+
+    async def test_hit_after_miss(self) -> None:
+        """Test that a second identical request is answered from the cache."""
+        replies: AiReplyCache = AiReplyCache()
+        calls: list[str] = []
+        key: str = replies.key("who are you", [])
+
+        assert await ask(replies, key, "I'm Dizznem bot", calls) == "I'm Dizznem bot"
+        assert await ask(replies, key, "other", calls) == "I'm Dizznem bot"
+        assert len(calls) == 1
+        assert (replies.hits, replies.misses) == (1, 1)
+        assert replies.hit_rate == pytest.approx(0.5)
+
+    async def test_failures_are_not_cached(self) -> None:
+        """Test that a fallback reply from a failed call isn't reused."""
+        replies: AiReplyCache = AiReplyCache()
+        calls: list[str] = []
+        key: str = replies.key("hello", [])
+
+        await ask(replies, key, ERROR_REPLY, calls)
+        assert await ask(replies, key, "hi!", calls) == "hi!"
+        assert len(calls) == 2  # noqa: PLR2004
+
+    async def test_expiry(self) -> None:
+        """Test that replies older than the TTL are requested again."""
+        replies: AiReplyCache = AiReplyCache(ttl=0.05)
+        calls: list[str] = []
+        key: str = replies.key("hello", [])
+
+        await ask(replies, key, "first", calls)
+        await asyncio.sleep(0.06)
+        assert await ask(replies, key, "second", calls) == "second"
+
+    async def test_lru_eviction(self) -> None:
+        """Test that the least recently used reply is evicted over max_size."""
+        replies: AiReplyCache = AiReplyCache(max_size=2)
+        calls: list[str] = []
+        for prompt in ("a", "b"):
+            await ask(replies, prompt, prompt, calls)
+        await ask(replies, "a", "a", calls)  # a is now the most recently used.
+        await ask(replies, "c", "c", calls)
+
+        assert len(replies) == 2  # noqa: PLR2004
+        await ask(replies, "b", "b", calls)
+        assert calls == ["a", "b", "c", "b"]
+
+    async def test_disabled(self) -> None:
+        """Test that a size of 0 caches nothing."""
+        replies: AiReplyCache = AiReplyCache(max_size=0)
+        calls: list[str] = []
+        for _ in range(2):
+            await ask(replies, "a", "a", calls)
+
+        assert len(calls) == 2  # noqa: PLR2004
+
+    async def test_flush(self) -> None:
+        """Test that flush drops cached replies and keeps in-flight ones out."""
+        replies: AiReplyCache = AiReplyCache()
+        calls: list[str] = []
+        await ask(replies, "a", "a", calls)
+        assert await replies.get_or_wait("b") is None
+
+        assert replies.flush() == 1
+        replies.resolve("b", "stale")
+        await ask(replies, "a", "a", calls)
+        await ask(replies, "b", "b", calls)
+
+        assert calls == ["a", "a", "b"]
+        assert "0 hits" in replies.summary()
+
+
+class TestCoalescing:
+    """Tests for requests in flight at the same time."""
+
+    async def test_identical_requests_share_one_call(self) -> None:
+        """Test that concurrent identical requests make a single API call."""
+        replies: AiReplyCache = AiReplyCache()
+        calls: list[str] = []
+
+        answers: list[str] = await asyncio.gather(
+            *(ask(replies, "same", "answer", calls) for _ in range(5)),
+        )
+
+        assert answers == ["answer"] * 5
+        assert len(calls) == 1
+        assert replies.coalesced == 4  # noqa: PLR2004
+
+    async def test_failures_are_shared_but_not_cached(self) -> None:
+        """Test that waiters get the fallback reply of a failed call, which isn't kept."""
+        replies: AiReplyCache = AiReplyCache()
+        calls: list[str] = []
+
+        answers: list[str] = await asyncio.gather(
+            *(ask(replies, "same", ERROR_REPLY, calls) for _ in range(3)),
+        )
+
+        assert answers == [ERROR_REPLY] * 3
+        assert len(calls) == 1
+        assert len(replies) == 0
+
+    async def test_waiter_takes_over_abandoned_request(self) -> None:
+        """Test that when the first request gives up, a waiter makes the call itself."""
+        replies: AiReplyCache = AiReplyCache()
+        assert await replies.get_or_wait("same") is None
+        waiter: asyncio.Task[str | None] = asyncio.create_task(replies.get_or_wait("same"))
+        await asyncio.sleep(0)
+
+        replies.resolve("same", None)
+
+        assert await waiter is None
+        replies.resolve("same", "answer")
+        assert await replies.get_or_wait("same") == "answer"
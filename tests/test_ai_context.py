@@ -0,0 +1,122 @@
+"""Tests for utils/misc/ai_context.py."""
+
+from utils.expiring_map import ExpiringMap
+from utils.misc import ai_context
+from utils.misc.ai_context import (
+    ChannelContext,
+    ConversationMemory,
+    estimate_tokens,
+    snippet,
+)
+
+
+class TestEstimates:
+    """Tests for token estimates and summary snippets."""
+
+    def test_estimate_tokens(self) -> None:
+        """Test that tokens are a quarter of the characters, rounded up, plus overhead."""
+        assert estimate_tokens("") == 4  # noqa: PLR2004
+        assert estimate_tokens("abcde") == 6  # noqa: PLR2004
+        assert estimate_tokens("x" * 1000) == 254  # noqa: PLR2004
+
+    def test_snippet_first_sentence(self) -> None:
+        """Test that a snippet stops at the first sentence."""
+        assert snippet("What is   up? I was\nwondering.") == "What is up?"
+
+    def test_snippet_long_text(self) -> None:
+        """Test that a snippet without an early sentence end is clipped."""
+        text: str = snippet("word " * 100)
+
+        assert len(text) == ai_context.SUMMARY_SNIPPET
+        assert text.endswith("…")
+
+
+class TestChannelContext:
+    """Tests for one channel's conversation."""
+
+    def test_keeps_turns_within_budget(self) -> None:
+        """Test that only the newest turns that fit the budget are kept in full."""
+        context: ChannelContext = ChannelContext(token_budget=100)
+        for i in range(10):
+            context.add_turn(f"question {i} " + "x" * 60, f"answer {i} " + "y" * 60)
+
+        assert context.tokens <= 100  # noqa: PLR2004
+        assert len(context) == 2  # noqa: PLR2004
+        messages: list[dict] = context.messages()
+        assert messages[-1]["content"].startswith("answer 9")
+        assert messages[-2]["content"].startswith("question 9")
+
+    def test_old_turns_are_summarized(self) -> None:
+        """Test that compacted turns show up in a leading summary message."""
+        context: ChannelContext = ChannelContext(token_budget=30)
+        context.add_turn("What is the best stock? Asking for a friend.", "Buy low.")
+        context.add_turn("And then?", "Sell high.")
+
+        messages: list[dict] = context.messages()
+        assert messages[0]["role"] == "system"
+        assert "User: What is the best stock? You: Buy low." in messages[0]["content"]
+        assert [m["content"] for m in messages[1:]] == ["And then?", "Sell high."]
+
+    def test_summary_is_bounded(self) -> None:
+        """Test that the summary keeps its newest entries within its own budget."""
+        context: ChannelContext = ChannelContext(token_budget=10)
+        for i in range(100):
+            context.add_turn(f"prompt {i}", f"reply {i}")
+
+        assert len(context.summary) <= ai_context.SUMMARY_TOKENS * ai_context.CHARS_PER_TOKEN
+        assert context.summary.startswith("User: ")
+        assert "prompt 98" in context.summary
+
+    def test_newest_turn_always_kept(self) -> None:
+        """Test that a turn over the whole budget is still kept, alone."""
+        context: ChannelContext = ChannelContext(token_budget=10)
+        context.add_turn("short", "reply")
+        context.add_turn("x" * 500, "y" * 500)
+
+        assert len(context) == 1
+        assert context.messages()[-1]["content"] == "y" * 500
+
+    def test_empty(self) -> None:
+        """Test that a new conversation sends no context."""
+        assert ChannelContext().messages() == []
+
+
+class TestConversationMemory:
+    """Tests for the per-channel map."""
+
+    def test_same_channel_same_context(self) -> None:
+        """Test that a channel's turns are kept between lookups."""
+        memory: ConversationMemory = ConversationMemory()
+        memory.get(1).add_turn("hi", "hello")
+
+        assert memory.get(1).messages()[0]["content"] == "hi"
+        assert memory.get(2).messages() == []
+
+    def test_least_recently_used_channel_evicted(self) -> None:
+        """Test that the channel unused the longest goes when over max_channels."""
+        memory: ConversationMemory = ConversationMemory(max_channels=2)
+        memory.get(1)
+        memory.get(2)
+        memory.get(1)
+        memory.get(3)
+
+        assert 1 in memory
+        assert 2 not in memory  # noqa: PLR2004
+        assert len(memory) == 2  # noqa: PLR2004
+        assert memory.evicted == 1
+
+    def test_idle_channels_evicted(self) -> None:
+        """Test that channels idle past the timeout are forgotten on the next lookup."""
+        now: list[float] = [100.0]
+        memory: ConversationMemory = ConversationMemory()
+        memory.channels = ExpiringMap(60, clock=lambda: now[0])
+        memory.get(1).add_turn("hi", "hello")
+        now[0] += 30
+        memory.get(2)
+        now[0] += 40
+
+        memory.get(3)
+
+        assert 1 not in memory
+        assert 2 in memory  # noqa: PLR2004
+        assert memory.evicted == 1
@@ -0,0 +1,195 @@
+"""Tests for utils/misc/ai_scheduler.py."""
+
+import asyncio
+
+import pytest
+from utils.misc.ai_scheduler import AiScheduler, QueueFullError
+
+
+async def hold(
+    scheduler: AiScheduler,
+    order: list[str],
+    name: str,
+    channel_id: int,
+    user_id: int,
+    release: asyncio.Event,
+    prompt_length: int = 10,
+) -> None:
+    """Take a slot, note the start order and keep the slot until released."""
+    async with scheduler.slot(channel_id, user_id, prompt_length):
+        order.append(name)
+        await release.wait()
+
+
+async def settle() -> None:
+    """Let every ready task run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestFairness:
+    """Tests for the order queued requests run in."""
+
+    async def test_busy_channel_does_not_starve_others(self) -> None:
+        """Test that a quiet channel's request goes ahead of a busy channel's backlog."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=1)
+        order: list[str] = []
+        release: asyncio.Event = asyncio.Event()
+        tasks: list[asyncio.Task[None]] = [
+            asyncio.create_task(hold(scheduler, order, f"busy{i}", 1, 10 + i, release))
+            for i in range(4)
+        ]
+        await settle()
+        tasks.append(asyncio.create_task(hold(scheduler, order, "quiet", 2, 99, release)))
+        await settle()
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert order.index("quiet") <= 2  # noqa: PLR2004
+        assert scheduler.wait_stats.percentile(100) > 0
+
+    async def test_user_spread_over_channels(self) -> None:
+        """Test that one user spamming several channels shares with another user."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=1)
+        order: list[str] = []
+        release: asyncio.Event = asyncio.Event()
+        tasks: list[asyncio.Task[None]] = [
+            asyncio.create_task(hold(scheduler, order, f"spam{i}", i, 1, release)) for i in range(4)
+        ]
+        await settle()
+        tasks.append(asyncio.create_task(hold(scheduler, order, "other", 50, 2, release)))
+        await settle()
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert order.index("other") <= 2  # noqa: PLR2004
+
+    async def test_short_prompts_first(self) -> None:
+        """Test that of two requests queued together, the shorter prompt runs first."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=1)
+        order: list[str] = []
+        release: asyncio.Event = asyncio.Event()
+        tasks: list[asyncio.Task[None]] = [
+            asyncio.create_task(hold(scheduler, order, "first", 1, 1, release)),
+        ]
+        await settle()
+        tasks.append(asyncio.create_task(hold(scheduler, order, "long", 2, 2, release, 900)))
+        tasks.append(asyncio.create_task(hold(scheduler, order, "short", 3, 3, release, 5)))
+        await settle()
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert order == ["first", "short", "long"]
+
+
+class TestQueueLimit:
+    """Tests for the queue length limit and cancellation."""
+
+    async def test_rejects_when_full(self) -> None:
+        """Test that requests over the queue limit are rejected without queueing."""
+        scheduler: AiScheduler = AiScheduler(max_queue=2, initial_limit=1)
+        order: list[str] = []
+        release: asyncio.Event = asyncio.Event()
+        tasks: list[asyncio.Task[None]] = [
+            asyncio.create_task(hold(scheduler, order, str(i), i, i, release)) for i in range(3)
+        ]
+        await settle()
+
+        with pytest.raises(QueueFullError):
+            async with scheduler.slot(9, 9, 10):
+                pass
+
+        assert scheduler.queued == 2  # noqa: PLR2004
+        assert scheduler.rejected == 1
+        release.set()
+        await asyncio.gather(*tasks)
+        assert scheduler.queued == 0
+        assert scheduler.running == 0
+
+    async def test_cancelled_waiter_leaves_queue(self) -> None:
+        """Test that a request cancelled while queued frees its place and never runs."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=1)
+        order: list[str] = []
+        release: asyncio.Event = asyncio.Event()
+        running: asyncio.Task[None] = asyncio.create_task(
+            hold(scheduler, order, "running", 1, 1, release),
+        )
+        await settle()
+        waiting: asyncio.Task[None] = asyncio.create_task(
+            hold(scheduler, order, "cancelled", 2, 2, release),
+        )
+        await settle()
+
+        waiting.cancel()
+        await settle()
+        assert scheduler.queued == 0
+
+        release.set()
+        await running
+        assert order == ["running"]
+        assert scheduler.running == 0
+
+
+class TestAdaptiveLimit:
+    """Tests for AIMD concurrency."""
+
+    async def test_grows_under_load(self) -> None:
+        """Test that quick successes with requests waiting raise the limit."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=1, max_limit=4)
+        for _ in range(3):
+            order: list[str] = []
+            release: asyncio.Event = asyncio.Event()
+            tasks: list[asyncio.Task[None]] = [
+                asyncio.create_task(hold(scheduler, order, str(i), i, i, release)) for i in range(6)
+            ]
+            await settle()
+            release.set()
+            await asyncio.gather(*tasks)
+
+        assert scheduler.capacity > 1
+
+    async def test_idle_successes_do_not_grow(self) -> None:
+        """Test that the limit doesn't grow when it isn't being used."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=3)
+        for _ in range(10):
+            async with scheduler.slot(1, 1, 10):
+                pass
+
+        assert scheduler.limit == 3  # noqa: PLR2004
+
+    async def test_failure_halves_once_per_window(self) -> None:
+        """Test that failures halve the limit, but a burst of them only once."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=8, target_latency=60)
+        for _ in range(3):
+            async with scheduler.slot(1, 1, 10) as slot:
+                slot.failed()
+
+        assert scheduler.limit == 4  # noqa: PLR2004
+        assert scheduler.failures == 3  # noqa: PLR2004
+
+    async def test_exception_counts_as_failure(self) -> None:
+        """Test that an error raised inside the slot lowers the limit and frees the slot."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=4, min_limit=1)
+
+        with pytest.raises(ValueError, match="boom"):
+            async with scheduler.slot(1, 1, 10):
+                raise ValueError("boom")  # noqa: EM101
+
+        assert scheduler.limit == 2  # noqa: PLR2004
+        assert scheduler.running == 0
+
+    async def test_never_below_minimum(self) -> None:
+        """Test that the limit stops at min_limit."""
+        scheduler: AiScheduler = AiScheduler(initial_limit=1, min_limit=1, target_latency=0)
+        for _ in range(3):
+            async with scheduler.slot(1, 1, 10) as slot:
+                slot.failed()
+
+        assert scheduler.capacity == 1
+
+    def test_summary(self) -> None:
+        """Test that the summary shows depth, concurrency and waits."""
+        assert AiScheduler(initial_limit=3).summary().startswith("0 queued (max 0), 0/3 running")
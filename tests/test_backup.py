@@ -0,0 +1,175 @@
+"""Tests for backup.py."""
+
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import backup
+import pytest
+from backup import (
+    BackupProgress,
+    backup_database,
+    backup_database_async,
+    list_snapshots,
+    prune_snapshots,
+    snapshot_path,
+)
+from database import connect, run_write
+from migrations import USERS_MIGRATIONS, migrate
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Path:
+    """Create a migrated users.db with enough rows to span many pages."""
+    db_path: Path = tmp_path / "users.db"
+    migrate(db_path, USERS_MIGRATIONS)
+    with connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO users (id, name, money) VALUES (?, ?, ?)",
+            [(user_id, f"user{user_id}" * 10, user_id * 100) for user_id in range(1, 5_001)],
+        )
+    return db_path
+
+
+def user_count(db_path: Path) -> int:
+    """Count the rows in a database's users table."""
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+class TestBackupDatabase:
+    """Tests for backup_database."""
+
+    def test_snapshot_matches_source(self, db: Path, tmp_path: Path) -> None:
+        """Test that the snapshot holds every row and passes an integrity check."""
+        progress: BackupProgress = backup_database(db, tmp_path / "backups")
+
+        assert progress.path.exists()
+        assert user_count(progress.path) == 5_000  # noqa: PLR2004
+        with sqlite3.connect(progress.path) as conn:
+            assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        assert list((tmp_path / "backups").glob("*.tmp")) == []
+
+    def test_copies_in_steps(
+        self,
+        db: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that pages are copied over several steps with progress reported each time."""
+        monkeypatch.setattr(backup, "PAGES_PER_STEP", 4)
+        seen: list[int] = []
+
+        progress: BackupProgress = backup_database(
+            db,
+            tmp_path / "backups",
+            on_progress=lambda p: seen.append(p.copied_pages),
+        )
+
+        assert len(seen) > 1
+        assert seen == sorted(seen)
+        assert progress.percent == 100  # noqa: PLR2004
+
+    def test_retention(self, db: Path, tmp_path: Path) -> None:
+        """Test that only the newest snapshots are kept."""
+        backup_dir: Path = tmp_path / "backups"
+        backup_dir.mkdir()
+        for day in range(1, 6):
+            old: Path = snapshot_path(backup_dir, db, datetime(2024, 1, day, tzinfo=timezone.utc))
+            old.write_bytes(b"")
+
+        progress: BackupProgress = backup_database(db, backup_dir, retention=3)
+
+        snapshots: list[Path] = list_snapshots(backup_dir, db)
+        assert len(snapshots) == 3  # noqa: PLR2004
+        assert snapshots[-1] == progress.path
+        assert snapshots[0].name == "users-20240104-000000-000000.db"
+
+    async def test_writes_continue_during_backup(
+        self,
+        db: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that the writer commits while a slow backup is in progress."""
+        monkeypatch.setattr(backup, "PAGES_PER_STEP", 1)
+        monkeypatch.setattr(backup, "STEP_SLEEP", 0.01)
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        started: asyncio.Event = asyncio.Event()
+
+        def insert(user_id: int) -> None:
+            with connect(db) as conn:
+                conn.execute("INSERT INTO users (id, name) VALUES (?, 'late')", (user_id,))
+
+        running: asyncio.Task[BackupProgress] = asyncio.create_task(
+            backup_database_async(
+                db,
+                tmp_path / "backups",
+                on_progress=lambda _: loop.call_soon_threadsafe(started.set),
+            ),
+        )
+        await asyncio.wait_for(started.wait(), timeout=5)
+        await asyncio.wait_for(run_write(db, insert, 10_001), timeout=1)
+        progress: BackupProgress = await running
+
+        assert user_count(db) == 5_001  # noqa: PLR2004
+        assert user_count(progress.path) in {5_000, 5_001}
+
+    def test_finishes_in_one_step_after_restarts(
+        self,
+        db: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a backup restarted by constant writes still completes."""
+        monkeypatch.setattr(backup, "PAGES_PER_STEP", 1)
+        monkeypatch.setattr(backup, "MAX_RESTARTS", 2)
+        next_id: list[int] = [10_001]
+
+        def write_between_steps(_: BackupProgress) -> None:
+            with sqlite3.connect(db) as conn:
+                conn.execute("INSERT INTO users (id, name) VALUES (?, 'late')", (next_id[0],))
+            next_id[0] += 1
+
+        progress: BackupProgress = backup_database(
+            db,
+            tmp_path / "backups",
+            on_progress=write_between_steps,
+        )
+
+        assert progress.restarts > 2  # noqa: PLR2004
+        assert user_count(progress.path) >= 5_000  # noqa: PLR2004
+        assert list((tmp_path / "backups").glob("*.tmp")) == []
+
+    def test_same_second_backups_are_kept(self, db: Path, tmp_path: Path) -> None:
+        """Test that two backups taken back to back never overwrite each other."""
+        first: BackupProgress = backup_database(db, tmp_path / "backups")
+        second: BackupProgress = backup_database(db, tmp_path / "backups")
+
+        assert first.path != second.path
+        assert list_snapshots(tmp_path / "backups", db) == [first.path, second.path]
+
+
+class TestSnapshotPath:
+    """Tests for snapshot_path."""
+
+    def test_skips_existing_snapshot(self, tmp_path: Path) -> None:
+        """Test that a clashing timestamp moves forward instead of reusing the name."""
+        db_path: Path = tmp_path / "users.db"
+        now: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        snapshot_path(tmp_path, db_path, now).write_bytes(b"")
+
+        assert snapshot_path(tmp_path, db_path, now).name == "users-20240101-000000-000001.db"
+
+
+class TestPruneSnapshots:
+    """Tests for prune_snapshots."""
+
+    def test_ignores_other_files(self, tmp_path: Path) -> None:
+        """Test that unrelated files in the backup directory are never deleted."""
+        db_path: Path = tmp_path / "users.db"
+        (tmp_path / "count-20240101-000000.db").write_bytes(b"")
+        (tmp_path / "users-20240101-000000.db.tmp").write_bytes(b"")
+
+        assert prune_snapshots(tmp_path, db_path, 0) == []
@@ -4,7 +4,7 @@ import sqlite3
 from pathlib import Path
 
 import pytest
-from utils.misc.count import ensure_count_db, increment_count
+from utils.misc.count import ensure_count_db, increment_count, increment_count_async
 
 
 @pytest.fixture
@@ -64,3 +64,8 @@ class TestIncrementCount:
         result: int = increment_count(db)
         assert isinstance(result, int)
         assert result > 0
+
+    async def test_async_variant(self, db: Path) -> None:
+        """Test that increment_count_async goes through the writer and returns the count."""
+        increment_count(db)
+        assert await increment_count_async(db) == 2  # noqa: PLR2004
@@ -0,0 +1,194 @@
+"""Tests for database.py."""
+
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+
+import database
+import pytest
+from database import close_connections, connect, get_connection, run_read, run_write, shutdown
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Path:
+    """Return a path for a temporary database."""
+    return tmp_path / "test.db"
+
+
+class TestGetConnection:
+    """Tests for get_connection."""
+
+    def test_reuses_connection_on_same_thread(self, db: Path) -> None:
+        """Test that the same thread gets the same connection back."""
+        assert get_connection(db) is get_connection(db)
+
+    def test_separate_connection_per_thread(self, db: Path) -> None:
+        """Test that other threads get their own connection."""
+        main_conn: sqlite3.Connection = get_connection(db)
+        other: list[sqlite3.Connection] = []
+        thread = threading.Thread(target=lambda: other.append(get_connection(db)))
+        thread.start()
+        thread.join()
+        assert other[0] is not main_conn
+
+    def test_enables_wal(self, db: Path) -> None:
+        """Test that connections use WAL journaling."""
+        mode: str = get_connection(db).execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_new_connection_after_close(self, db: Path) -> None:
+        """Test that closing the pool opens a fresh connection next time."""
+        before: sqlite3.Connection = get_connection(db)
+        close_connections()
+        assert get_connection(db) is not before
+
+    def test_closes_other_threads_connections(self, db: Path) -> None:
+        """Test that close_connections also closes connections opened by other threads."""
+        other: list[sqlite3.Connection] = []
+        thread = threading.Thread(target=lambda: other.append(get_connection(db)))
+        thread.start()
+        thread.join()
+
+        close_connections()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            other[0].execute("SELECT 1")
+
+
+class TestConnect:
+    """Tests for the connect context manager."""
+
+    def test_commits_on_success(self, db: Path) -> None:
+        """Test that changes are visible to other connections after the block."""
+        with connect(db) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.execute("INSERT INTO t VALUES (1)")
+
+        with sqlite3.connect(db) as other:
+            assert other.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+    def test_rolls_back_on_error(self, db: Path) -> None:
+        """Test that changes are discarded when the block raises."""
+        with connect(db) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+
+        with pytest.raises(RuntimeError), connect(db) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError
+
+        with connect(db) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    def test_nested_error_only_undoes_inner_block(self, db: Path) -> None:
+        """Test that a nested block is a savepoint inside the outer transaction."""
+        with connect(db) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+
+        with connect(db) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            with pytest.raises(RuntimeError), connect(db) as inner:
+                inner.execute("INSERT INTO t VALUES (2)")
+                raise RuntimeError
+            with connect(db) as inner:
+                inner.execute("INSERT INTO t VALUES (3)")
+
+            # Nothing is committed until the outer block exits.
+            with sqlite3.connect(db) as other:
+                assert other.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+        with sqlite3.connect(db) as other:
+            assert [row[0] for row in other.execute("SELECT x FROM t ORDER BY x")] == [1, 3]
+
+
+def insert(db_path: Path, value: int) -> int:
+    """Insert a value into t and return it."""
+    with connect(db_path) as conn:
+        conn.execute("INSERT INTO t VALUES (?)", (value,))
+    return value
+
+
+def fail(db_path: Path) -> None:
+    """Insert a row, then fail."""
+    with connect(db_path) as conn:
+        conn.execute("INSERT INTO t VALUES (-1)")
+    raise ValueError
+
+
+class TestFacade:
+    """Tests for run_read, run_write and the writer thread."""
+
+    @pytest.fixture
+    def table(self, db: Path) -> Path:
+        """Create table t in the temporary database."""
+        with connect(db) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+        return db
+
+    async def test_run_read_off_loop_thread(self, table: Path) -> None:
+        """Test that reads run on a pool thread and return their result."""
+
+        def read(db_path: Path) -> tuple[int, str]:
+            with connect(db_path) as conn:
+                count: int = conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+            return count, threading.current_thread().name
+
+        count, thread_name = await run_read(read, table)
+        assert count == 0
+        assert thread_name.startswith("db-read")
+
+    async def test_run_write_returns_after_commit(self, table: Path) -> None:
+        """Test that a write is visible to other connections once awaited."""
+        assert await run_write(table, insert, table, 7) == 7  # noqa: PLR2004
+        with sqlite3.connect(table) as other:
+            assert other.execute("SELECT x FROM t").fetchall() == [(7,)]
+
+    async def test_concurrent_writes_share_commits(
+        self,
+        table: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that writes queued together are committed in fewer transactions."""
+        groups: list[int] = []
+        commit_group = database.DatabaseWriter._commit_group  # noqa: SLF001
+
+        def counting(db_path: Path, jobs: list) -> None:
+            groups.append(len(jobs))
+            commit_group(db_path, jobs)
+
+        monkeypatch.setattr(database.DatabaseWriter, "_commit_group", staticmethod(counting))
+
+        results: list[int] = await asyncio.gather(
+            *(run_write(table, insert, table, i) for i in range(200)),
+        )
+
+        assert results == list(range(200))
+        assert sum(groups) == 200  # noqa: PLR2004
+        assert len(groups) < 200  # noqa: PLR2004
+        with sqlite3.connect(table) as other:
+            assert other.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 200  # noqa: PLR2004
+
+    async def test_failed_write_does_not_undo_its_group(self, table: Path) -> None:
+        """Test that one failing write only rolls back its own changes."""
+        results: list = await asyncio.gather(
+            run_write(table, insert, table, 1),
+            run_write(table, fail, table),
+            run_write(table, insert, table, 2),
+            return_exceptions=True,
+        )
+
+        assert results[0] == 1
+        assert isinstance(results[1], ValueError)
+        assert results[2] == 2  # noqa: PLR2004
+        with sqlite3.connect(table) as other:
+            assert [row[0] for row in other.execute("SELECT x FROM t ORDER BY x")] == [1, 2]
+
+    async def test_shutdown_finishes_queued_writes(self, table: Path) -> None:
+        """Test that shutdown waits for every queued write."""
+        pending: list[asyncio.Future] = [
+            asyncio.ensure_future(run_write(table, insert, table, i)) for i in range(20)
+        ]
+        await asyncio.sleep(0)
+        await asyncio.to_thread(shutdown)
+
+        assert [await future for future in pending] == list(range(20))
@@ -0,0 +1,100 @@
+"""Tests for utils/expiring_map.py."""
+
+from utils.expiring_map import ExpiringMap
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Start at an arbitrary time."""
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+def make(ttl: float = 10, max_size: int | None = None) -> tuple[ExpiringMap, FakeClock]:
+    """Build a map on a fake clock."""
+    clock: FakeClock = FakeClock()
+    return ExpiringMap(ttl, max_size=max_size, clock=clock), clock
+
+
+class TestExpiry:
+    """Tests for entries expiring."""
+
+    def test_lives_for_ttl(self) -> None:
+        """Test that an entry is readable until its TTL passes."""
+        entries, clock = make(ttl=10)
+        entries.set("a", 1)
+        clock.now += 9.9
+
+        assert entries.get("a") == 1
+        clock.now += 0.1
+        assert entries.get("a") is None
+        assert entries.get("a", 5) == 5  # noqa: PLR2004
+        assert entries.expired == 1
+
+    def test_set_restarts_ttl(self) -> None:
+        """Test that setting a key again extends its life, and get() doesn't."""
+        entries, clock = make(ttl=10)
+        entries.set("a", 1)
+        clock.now += 8
+        entries.get("a")
+        entries.set("b", 2)
+        clock.now += 8
+        entries.set("b", 3)
+        clock.now += 3
+
+        assert "a" not in entries
+        assert entries.get("b") == 3  # noqa: PLR2004
+
+    def test_only_expired_front_is_dropped(self) -> None:
+        """Test that expiry stops at the first live entry."""
+        entries, clock = make(ttl=10)
+        for i in range(5):
+            entries.set(i, i)
+            clock.now += 1
+        clock.now += 6
+
+        assert entries.expire() == 2  # noqa: PLR2004
+        assert len(entries) == 3  # noqa: PLR2004
+        assert 2 in entries  # noqa: PLR2004
+
+    def test_pop_and_clear(self) -> None:
+        """Test removing entries by hand."""
+        entries, _ = make()
+        entries.set("a", 1)
+        entries.set("b", 2)
+
+        assert entries.pop("a") == 1
+        assert entries.pop("a") is None
+        entries.clear()
+        assert len(entries) == 0
+
+
+class TestSizeLimit:
+    """Tests for max_size and metrics."""
+
+    def test_evicts_least_recently_set(self) -> None:
+        """Test that the entry set longest ago goes when over max_size."""
+        entries, _ = make(max_size=2)
+        entries.set("a", 1)
+        entries.set("b", 2)
+        entries.set("a", 3)
+        entries.set("c", 4)
+
+        assert "b" not in entries
+        assert entries.get("a") == 3  # noqa: PLR2004
+        assert entries.evicted == 1
+
+    def test_summary(self) -> None:
+        """Test that the summary reports size, peak, expired and evicted entries."""
+        entries, clock = make(ttl=10, max_size=3)
+        for i in range(4):
+            entries.set(i, i)
+        clock.now += 11
+        entries.set("new", 0)
+
+        assert entries.summary() == "1 entries (peak 3), 3 expired, 1 evicted"
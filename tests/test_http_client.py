@@ -0,0 +1,225 @@
+"""Tests for utils/http_client.py, against a local stub server."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from utils import http_client
+from utils.http_client import HttpClient, HttpError, LatencyStats
+
+
+class StubApi:
+    """Local API whose responses are scripted per request."""
+
+    def __init__(self) -> None:
+        """Start with no scripted responses, every request then gets ``{"ok": true}``."""
+        self.script: list[tuple[str, Any]] = []
+        self.requests: int = 0
+        self.ports: set[int] = set()
+        self.server: TestServer = TestServer(self._app())
+
+    def _app(self) -> web.Application:
+        """Build the stub application."""
+        app: web.Application = web.Application()
+        app.router.add_post("/", self._handle)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Answer with the next scripted action."""
+        self.requests += 1
+        self.ports.add(request.transport.get_extra_info("peername")[1])  # type: ignore[union-attr]
+        action: str
+        value: Any
+        action, value = self.script.pop(0) if self.script else ("json", {"ok": True})
+        if action == "sleep":
+            await asyncio.sleep(value)
+            return web.json_response({"ok": True})
+        if action == "status":
+            return web.Response(status=value, text="stub error")
+        if action == "drop":
+            request.transport.close()  # type: ignore[union-attr]
+            return web.Response()
+        if action == "sse":
+            return await self._stream(request, value)
+        return web.json_response(value)
+
+    @staticmethod
+    async def _stream(request: web.Request, events: list[Any]) -> web.StreamResponse:
+        """Send each event as ``data:``, pausing for floats."""
+        response: web.StreamResponse = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream"},
+        )
+        await response.prepare(request)
+        for event in events:
+            if isinstance(event, float):
+                await asyncio.sleep(event)
+                continue
+            await response.write(f"data: {event}\n\n".encode())
+        await response.write_eof()
+        return response
+
+    @property
+    def url(self) -> str:
+        """URL to post to."""
+        return str(self.server.make_url("/"))
+
+
+@pytest.fixture
+async def api() -> AsyncIterator[StubApi]:
+    """Run the stub API for one test."""
+    stub: StubApi = StubApi()
+    await stub.server.start_server()
+    yield stub
+    await stub.server.close()
+
+
+@pytest.fixture
+async def client(monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[HttpClient]:
+    """Open a client that retries without waiting."""
+    monkeypatch.setattr(http_client, "RETRY_BACKOFF", 0)
+    http: HttpClient = HttpClient()
+    await http.start()
+    yield http
+    await http.close()
+
+
+class TestPostJson:
+    """Tests for HttpClient.post_json."""
+
+    async def test_returns_json(self, api: StubApi, client: HttpClient) -> None:
+        """Test that the parsed body is returned and the call is timed."""
+        api.script.append(("json", {"answer": 42}))
+
+        assert await client.post_json(api.url, {"q": 1}) == {"answer": 42}
+        assert client.stats.requests == 1
+        assert client.stats.percentile(50) > 0
+
+    async def test_connections_are_reused(self, api: StubApi, client: HttpClient) -> None:
+        """Test that sequential calls share one kept-alive connection."""
+        for _ in range(5):
+            await client.post_json(api.url, {})
+
+        assert api.requests == 5  # noqa: PLR2004
+        assert len(api.ports) == 1
+
+    async def test_retries_server_errors(self, api: StubApi, client: HttpClient) -> None:
+        """Test that overload statuses are retried until a success."""
+        api.script.extend([("status", 503), ("status", 429), ("json", {"ok": True})])
+
+        assert await client.post_json(api.url, {}) == {"ok": True}
+        assert client.stats.retries == 2  # noqa: PLR2004
+        assert client.stats.errors == 0
+
+    async def test_retries_dropped_connections(self, api: StubApi, client: HttpClient) -> None:
+        """Test that a connection closed mid-request is retried."""
+        api.script.extend([("drop", None), ("json", {"ok": True})])
+
+        assert await client.post_json(api.url, {}) == {"ok": True}
+        assert client.stats.retries == 1
+
+    async def test_client_errors_are_not_retried(self, api: StubApi, client: HttpClient) -> None:
+        """Test that a request the API rejects is not sent again."""
+        api.script.append(("status", 401))
+
+        with pytest.raises(HttpError) as raised:
+            await client.post_json(api.url, {})
+
+        assert raised.value.status == 401  # noqa: PLR2004
+        assert api.requests == 1
+        assert client.stats.errors == 1
+
+    async def test_gives_up_after_retries(self, api: StubApi, client: HttpClient) -> None:
+        """Test that a persistently failing API raises once retries run out."""
+        api.script.extend([("status", 500)] * 3)
+
+        with pytest.raises(HttpError):
+            await client.post_json(api.url, {}, retries=2)
+
+        assert api.requests == 3  # noqa: PLR2004
+
+    async def test_deadline_covers_slow_responses(self, api: StubApi, client: HttpClient) -> None:
+        """Test that a slow API is abandoned at the deadline."""
+        api.script.append(("sleep", 1))
+
+        with pytest.raises(TimeoutError):
+            await client.post_json(api.url, {}, deadline=0.1)
+
+        assert client.stats.errors == 1
+
+    async def test_requires_start(self) -> None:
+        """Test that using the client before start() fails clearly."""
+        with pytest.raises(RuntimeError, match="start"):
+            await HttpClient().post_json("http://localhost", {})
+
+    async def test_unreachable_host(self, client: HttpClient) -> None:
+        """Test that a host refusing connections raises a client error after retries."""
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await client.post_json("http://127.0.0.1:9", {}, retries=1)
+
+        assert client.stats.retries == 1
+
+
+class TestStreamEvents:
+    """Tests for HttpClient.stream_events."""
+
+    async def test_yields_event_data(self, api: StubApi, client: HttpClient) -> None:
+        """Test that the data of each event is yielded in order and the call is timed."""
+        api.script.append(("sse", ["one", "two", "[DONE]"]))
+
+        assert [data async for data in client.stream_events(api.url, {})] == [
+            "one",
+            "two",
+            "[DONE]",
+        ]
+        assert client.stats.requests == 1
+        assert client.stats.percentile(50) > 0
+
+    async def test_retries_before_streaming(self, api: StubApi, client: HttpClient) -> None:
+        """Test that an overload status when opening the stream is retried."""
+        api.script.extend([("status", 503), ("sse", ["ok"])])
+
+        assert [data async for data in client.stream_events(api.url, {})] == ["ok"]
+        assert client.stats.retries == 1
+
+    async def test_client_errors_are_raised(self, api: StubApi, client: HttpClient) -> None:
+        """Test that a rejected stream raises without being retried."""
+        api.script.append(("status", 401))
+
+        with pytest.raises(HttpError):
+            [data async for data in client.stream_events(api.url, {})]
+
+        assert api.requests == 1
+        assert client.stats.errors == 1
+
+    async def test_idle_timeout(self, api: StubApi, client: HttpClient) -> None:
+        """Test that a stream that stops sending is abandoned."""
+        api.script.append(("sse", ["first", 1.0, "late"]))
+        stream: AsyncIterator[str] = client.stream_events(api.url, {}, idle_timeout=0.1)
+
+        assert await anext(stream) == "first"
+        with pytest.raises(TimeoutError):
+            await anext(stream)
+
+        assert client.stats.errors == 1
+
+
+class TestLatencyStats:
+    """Tests for LatencyStats."""
+
+    def test_percentiles(self) -> None:
+        """Test that percentiles come from the recorded samples."""
+        stats: LatencyStats = LatencyStats()
+        for ms in range(1, 101):
+            stats.record(ms / 1000)
+
+        assert stats.percentile(50) == pytest.approx(0.051)
+        assert stats.percentile(95) == pytest.approx(0.096)
+        assert "p95 96 ms" in stats.summary()
+
+    def test_empty(self) -> None:
+        """Test that empty stats report zero instead of failing."""
+        assert LatencyStats().percentile(95) == 0
@@ -0,0 +1,132 @@
+"""Tests for journal.py."""
+
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from journal import LEGACY_MAGIC, LEGACY_RECORD, MAGIC, RECORD, Journal
+from migrations import USERS_MIGRATIONS, migrate
+from user import User
+
+
+@pytest.fixture
+def db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Create a temporary users database with one user."""
+    db_path: Path = tmp_path / "users.db"
+    monkeypatch.setattr("user.DB_PATH", db_path)
+    monkeypatch.setattr("user.USER_CACHE", {})
+
+    migrate(db_path, USERS_MIGRATIONS)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO users (id, name) VALUES (1, 'karma')")
+    return db_path
+
+
+@pytest.fixture
+def journal(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Journal]:
+    """Return an open journal that the User class writes to."""
+    journal: Journal = Journal(tmp_path / "users.journal")
+    journal.open()
+    monkeypatch.setattr("user.JOURNAL", journal)
+    yield journal
+    journal.close()
+
+
+def read_user(db: Path) -> tuple:
+    """Read the test user's numeric columns.
+
+    Args:
+        db (Path): Path to users.db.
+
+    Returns:
+        tuple: (money, prestige, level, message_count)
+    """
+    with sqlite3.connect(db) as conn:
+        return conn.execute(
+            "SELECT money, prestige, level, message_count FROM users WHERE id = 1",
+        ).fetchone()
+
+
+class TestRecord:
+    """Tests for recording changes."""
+
+    def test_closed_journal_ignores_records(self, tmp_path: Path) -> None:
+        """Test that nothing is written before open()."""
+        journal: Journal = Journal(tmp_path / "users.journal")
+        journal.record(1, "money", 500)
+        assert not journal.path.exists()
+
+    def test_user_changes_are_journaled(self, db: Path, journal: Journal) -> None:  # noqa: ARG002
+        """Test that changing a User field appends a record."""
+        user: User = User.create_if_not_exists(user_id=1, username="karma")
+        user.money += 5_000
+        user.message_count += 1
+        data: bytes = journal.path.read_bytes()
+        assert data.startswith(MAGIC)
+        assert len(data) == len(MAGIC) + 2 * RECORD.size
+
+
+class TestReplay:
+    """Tests for replaying the journal on startup."""
+
+    def test_replay_applies_latest_values(self, db: Path, journal: Journal) -> None:
+        """Test that replay leaves users.db with the newest value of each field."""
+        journal.record(1, "money", 1_000)
+        journal.record(1, "money", 2_550)
+        journal.record(1, "message_count", 7)
+        journal.close()
+
+        assert journal.replay(db) == 3  # noqa: PLR2004
+        assert read_user(db) == (2_550, 0, 0, 7)
+
+    def test_replay_deletes_segments(self, db: Path, journal: Journal) -> None:
+        """Test that segments are removed once replayed."""
+        journal.record(1, "level", 3)
+        journal.rotate()
+        journal.record(1, "level", 4)
+        journal.close()
+
+        journal.replay(db)
+        assert read_user(db)[2] == 4  # noqa: PLR2004
+        assert list(journal.path.parent.glob("users.journal*")) == []
+
+    def test_ignores_torn_record(self, db: Path, journal: Journal) -> None:
+        """Test that a partially written final record is skipped."""
+        journal.record(1, "prestige", 2)
+        journal.close()
+        with journal.path.open("ab") as f:
+            f.write(RECORD.pack(1, 1, 9)[:5])
+
+        assert journal.replay(db) == 1
+        assert read_user(db)[1] == 2  # noqa: PLR2004
+
+    def test_replays_legacy_dollar_segments(self, db: Path, journal: Journal) -> None:
+        """Test that segments from before money was in cents are converted on replay."""
+        journal.close()
+        journal.path.write_bytes(
+            LEGACY_MAGIC + LEGACY_RECORD.pack(1, 0, 12.34) + LEGACY_RECORD.pack(1, 3, 9.0),
+        )
+
+        assert journal.replay(db) == 2  # noqa: PLR2004
+        assert read_user(db) == (1_234, 0, 0, 9)
+
+
+class TestRotation:
+    """Tests for segment rotation around autosave."""
+
+    def test_rotate_without_records_is_noop(self, journal: Journal) -> None:
+        """Test that an empty active segment isn't sealed."""
+        assert journal.rotate() is None
+
+    def test_discard_keeps_newer_records(self, db: Path, journal: Journal) -> None:
+        """Test that records after the rotation survive discard."""
+        journal.record(1, "money", 100)
+        sealed: int | None = journal.rotate()
+        journal.record(1, "money", 200)
+        assert sealed is not None
+        journal.discard_through(sealed)
+        journal.close()
+
+        journal.replay(db)
+        assert read_user(db)[0] == 200  # noqa: PLR2004
@@ -0,0 +1,252 @@
+"""Tests for utils/misc/leaderboard.py."""
+
+import random
+import sqlite3
+from pathlib import Path
+
+import pytest
+from user import User
+from utils.misc.leaderboard import (
+    RANK_CATEGORIES,
+    get_all_ranks,
+    get_balance_leaderboard,
+    get_balance_rank,
+    get_level_leaderboard,
+    get_level_rank,
+    get_networth_leaderboard,
+    get_networth_rank,
+    get_prestige_leaderboard,
+    get_prestige_rank,
+    get_ranks_for_users,
+)
+from utils.money.stocks import ensure_stocks_tables, get_user_stocks, repair_stock_values
+from utils.rank_index import Rankings
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Path:
+    """Set up a users.db with stock prices and three users.
+
+    Users 1 and 2 have the same balance, but only user 2 holds stock. User 3 holds a
+    zero-quantity row, which must not count.
+    """
+    db_path: Path = tmp_path / "users.db"
+    ensure_stocks_tables(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM stock_prices")
+        conn.executemany(
+            "INSERT INTO stock_prices (name, price, open_price, last_updated) VALUES (?, ?, ?, '')",
+            [("AAA", 10_00, 10_00), ("BBB", 250_00, 250_00)],
+        )
+        conn.executemany(
+            "INSERT INTO users (id, name, money) VALUES (?, ?, ?)",
+            [(1, "alice", 500_00), (2, "bob", 500_00), (3, "carol", 800_00)],
+        )
+        conn.executemany(
+            "INSERT INTO user_stocks (user_id, stock_name, quantity) VALUES (?, ?, ?)",
+            [(2, "AAA", 3), (2, "BBB", 2), (3, "BBB", 0)],
+        )
+    # Holdings were inserted directly, so bring stock_value in line as a trade would.
+    repair_stock_values(db_path)
+    return db_path
+
+
+class TestNetworthLeaderboard:
+    """Tests for get_networth_leaderboard."""
+
+    def test_balance_plus_holdings(self, db: Path) -> None:
+        """Test that net worth adds every holding at its current price."""
+        assert get_networth_leaderboard(db) == [
+            ("bob", 500_00 + 3 * 10_00 + 2 * 250_00),
+            ("carol", 800_00),
+            ("alice", 500_00),
+        ]
+
+    def test_limit(self, db: Path) -> None:
+        """Test that only the requested number of users is returned."""
+        assert [name for name, _ in get_networth_leaderboard(db, limit=1)] == ["bob"]
+
+    def test_holdings_of_unpriced_stock_are_ignored(self, db: Path) -> None:
+        """Test that a holding without a price row adds nothing, as before."""
+        with sqlite3.connect(db) as conn:
+            conn.execute("INSERT INTO user_stocks VALUES (1, 'GONE', 100)")
+        repair_stock_values(db)
+
+        assert ("alice", 500_00) in get_networth_leaderboard(db)
+
+
+class TestNetworthRank:
+    """Tests for get_networth_rank."""
+
+    def test_ranks(self, db: Path) -> None:
+        """Test each user's rank."""
+        assert [get_networth_rank(db, user_id) for user_id in (1, 2, 3)] == [3, 1, 2]
+
+    def test_ties_share_a_rank(self, db: Path) -> None:
+        """Test that users with the same net worth share a rank, like the other categories."""
+        with sqlite3.connect(db) as conn:
+            conn.execute("UPDATE users SET money = ? WHERE id = 3", (500_00,))
+            conn.execute("DELETE FROM user_stocks WHERE user_id = 2")
+        repair_stock_values(db)
+
+        assert [get_networth_rank(db, user_id) for user_id in (1, 2, 3)] == [1, 1, 1]
+
+    def test_reads_use_index(self, db: Path) -> None:
+        """Test that the leaderboard and rank read idx_users_net_worth instead of holdings."""
+        with sqlite3.connect(db) as conn:
+            plans: list[str] = [
+                " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}"))
+                for query in (
+                    (
+                        "SELECT name, money + stock_value FROM users "
+                        "ORDER BY money + stock_value DESC, id LIMIT 10"
+                    ),
+                    (
+                        "SELECT (SELECT COUNT(*) + 1 FROM users "
+                        "WHERE money + stock_value > u.money + u.stock_value) "
+                        "FROM users u WHERE id = 1"
+                    ),
+                )
+            ]
+        assert all("idx_users_net_worth" in plan for plan in plans)
+        assert not any("user_stocks" in plan for plan in plans)
+
+    def test_unknown_user(self, db: Path) -> None:
+        """Test that a user not in the database has no rank."""
+        assert get_networth_rank(db, 404) is None
+
+    def test_matches_per_user_holdings(self, db: Path) -> None:
+        """Test that the query agrees with summing get_user_stocks for every user."""
+        rng: random.Random = random.Random(1)
+        with sqlite3.connect(db) as conn:
+            conn.executemany(
+                "INSERT INTO users (id, name, money) VALUES (?, ?, ?)",
+                [(i, f"user{i}", rng.randint(0, 10_000_00)) for i in range(10, 60)],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO user_stocks VALUES (?, ?, ?)",
+                [
+                    (rng.randint(10, 59), rng.choice(("AAA", "BBB")), rng.randint(0, 50))
+                    for _ in range(80)
+                ],
+            )
+            users: list[tuple[int, str, int]] = conn.execute(
+                "SELECT id, name, money FROM users",
+            ).fetchall()
+        repair_stock_values(db)
+
+        expected: list[tuple[str, int]] = sorted(
+            (
+                (name, money + sum(value for _, _, value in get_user_stocks(db, user_id)))
+                for user_id, name, money in users
+            ),
+            key=lambda row: row[1],
+            reverse=True,
+        )
+        assert [worth for _, worth in get_networth_leaderboard(db, limit=100)] == [
+            worth for _, worth in expected
+        ]
+
+
+class TestAllRanks:
+    """Tests for get_all_ranks and get_ranks_for_users."""
+
+    @pytest.fixture
+    def ranked(self, db: Path) -> Path:
+        """Give the fixture users prestiges and levels, with a tie in each."""
+        with sqlite3.connect(db) as conn:
+            conn.executemany(
+                "UPDATE users SET prestige = ?, level = ? WHERE id = ?",
+                [(1, 10, 1), (1, 30, 2), (0, 10, 3)],
+            )
+        return db
+
+    def test_matches_single_category_ranks(self, ranked: Path) -> None:
+        """Test that the combined query agrees with the per-category functions."""
+        for user_id in (1, 2, 3):
+            assert get_all_ranks(ranked, user_id) == {
+                "balance": get_balance_rank(ranked, user_id),
+                "networth": get_networth_rank(ranked, user_id),
+                "prestige": get_prestige_rank(ranked, user_id),
+                "level": get_level_rank(ranked, user_id),
+            }
+        assert get_all_ranks(ranked, 1) == {"balance": 2, "networth": 3, "prestige": 1, "level": 2}
+
+    def test_unknown_user(self, ranked: Path) -> None:
+        """Test that a user not in the database has no rank anywhere."""
+        assert get_all_ranks(ranked, 404) == dict.fromkeys(RANK_CATEGORIES)
+
+    def test_batch_matches_single(self, ranked: Path) -> None:
+        """Test that the batch variant returns the same ranks for every requested user."""
+        ranks: dict[int, dict[str, int | None]] = get_ranks_for_users(ranked, [3, 1, 404])
+
+        assert list(ranks) == [3, 1, 404]
+        assert ranks[1] == get_all_ranks(ranked, 1)
+        assert ranks[3] == get_all_ranks(ranked, 3)
+        assert ranks[404] == get_all_ranks(ranked, 404)
+        assert get_ranks_for_users(ranked, []) == {}
+
+
+class TestInMemoryRanks:
+    """Tests for answering balance, prestige and level ranks from RANKINGS."""
+
+    @pytest.fixture
+    def rankings(self, db: Path, monkeypatch: pytest.MonkeyPatch) -> Rankings:
+        """Load fresh rankings from the test database and route User changes to them."""
+        monkeypatch.setattr("user.DB_PATH", db)
+        monkeypatch.setattr("user.USER_CACHE", {})
+        rankings: Rankings = Rankings(("money", "prestige", "level"))
+        monkeypatch.setattr("user.RANKINGS", rankings)
+        monkeypatch.setattr("utils.misc.leaderboard.RANKINGS", rankings)
+        rankings.load(db)
+        return rankings
+
+    def test_follows_user_changes(self, db: Path, rankings: Rankings) -> None:
+        """Test that ranks move as soon as a User field changes, before any save."""
+        alice: User = User.create_if_not_exists(1, "alice")
+        alice.money += 400_00
+        alice.prestige = 2
+        dave: User = User.create_if_not_exists(4, "dave")
+        dave.level = 5
+
+        assert rankings.rank("money", 1) == 1
+        assert get_balance_rank(db, 1) == 1
+        assert get_balance_leaderboard(db)[0] == ("alice", 900_00)
+        assert get_prestige_rank(db, 1) == 1
+        assert get_level_leaderboard(db)[0] == ("dave", 5)
+        assert get_level_rank(db, 4) == 1
+        # Net worth is read from users.db, which doesn't have alice's new balance until saved.
+        assert get_all_ranks(db, 1) == {"balance": 1, "networth": 3, "prestige": 1, "level": 2}
+
+    def test_matches_sql_after_saving(
+        self,
+        db: Path,
+        rankings: Rankings,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that memory and SQL agree once every change is saved."""
+        rng: random.Random = random.Random(3)
+        users: list[User] = [User.create_if_not_exists(i, f"user{i}") for i in range(1, 40)]
+        for _ in range(300):
+            user: User = rng.choice(users)
+            user.money += rng.randint(-100_00, 100_00)
+            user.level = rng.randint(0, 5)
+        for user in users:
+            user.save()
+
+        categories: list = [
+            (get_balance_rank, get_balance_leaderboard),
+            (get_prestige_rank, get_prestige_leaderboard),
+            (get_level_rank, get_level_leaderboard),
+        ]
+        from_memory: list = [
+            ([rank(db, user.id) for user in users], [value for _, value in top(db)])
+            for rank, top in categories
+        ]
+        monkeypatch.setattr(rankings, "db_path", None)
+        from_sql: list = [
+            ([rank(db, user.id) for user in users], [value for _, value in top(db)])
+            for rank, top in categories
+        ]
+
+        assert from_memory == from_sql
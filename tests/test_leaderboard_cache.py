@@ -0,0 +1,172 @@
+"""Tests for utils/misc/leaderboard_cache.py."""
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from utils.misc.leaderboard_cache import LeaderboardCache
+from utils.rank_index import Rankings
+
+if TYPE_CHECKING:
+    from discord import Embed
+
+TOP: list[tuple[str, int]] = [(f"user{i}", 1_000 - i * 10) for i in range(10)]  # Cutoff 910.
+
+
+class FakeRows:
+    """Stand-in for get_leaderboard_rows that records every build."""
+
+    def __init__(self) -> None:
+        """Start with a full balance board and a level board of one."""
+        self.boards: dict[str, list[tuple[str, int]]] = {
+            "balance": list(TOP),
+            "level": [("solo", 3)],
+        }
+        self.builds: list[str] = []
+
+    def __call__(self, category: str) -> list[tuple[str, int]]:
+        """Get a board's rows."""
+        self.builds.append(category)
+        return list(self.boards[category])
+
+
+@pytest.fixture
+def rows(monkeypatch: pytest.MonkeyPatch) -> FakeRows:
+    """Serve leaderboard rows from memory instead of users.db."""
+    fake: FakeRows = FakeRows()
+    monkeypatch.setattr("utils.misc.leaderboard_cache.get_leaderboard_rows", fake)
+    return fake
+
+
+class TestGet:
+    """Tests for reading through the cache."""
+
+    async def test_reuses_embed(self, rows: FakeRows) -> None:
+        """Test that the second lookup is a hit that returns an equal, separate embed."""
+        cache: LeaderboardCache = LeaderboardCache(ttl=60)
+
+        first: Embed = await cache.get("balance")
+        second: Embed = await cache.get("balance")
+
+        assert rows.builds == ["balance"]
+        assert second is not first
+        assert second.to_dict() == first.to_dict()
+        assert "user0" in (second.description or "")
+        assert cache.hit_rate == 0.5  # noqa: PLR2004
+
+    async def test_ttl(self, rows: FakeRows) -> None:
+        """Test that entries expire, and a TTL of 0 disables caching."""
+        cache: LeaderboardCache = LeaderboardCache(ttl=0.05)
+        await cache.get("balance")
+        await asyncio.sleep(0.06)
+        await cache.get("balance")
+
+        disabled: LeaderboardCache = LeaderboardCache(ttl=0)
+        await disabled.get("balance")
+        await disabled.get("balance")
+
+        assert rows.builds == ["balance"] * 4
+
+    async def test_invalidation_during_rebuild_is_not_stored(
+        self,
+        rows: FakeRows,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a board invalidated while it was being rebuilt is rebuilt again."""
+        cache: LeaderboardCache = LeaderboardCache(ttl=60)
+
+        async def racing_read(fn: FakeRows, category: str) -> list[tuple[str, int]]:
+            if not fn.builds:
+                cache.invalidate(category)
+            return fn(category)
+
+        monkeypatch.setattr("utils.misc.leaderboard_cache.run_read", racing_read)
+        await cache.get("balance")
+        await cache.get("balance")
+        await cache.get("balance")
+
+        assert rows.builds == ["balance", "balance"]
+
+
+class TestInvalidation:
+    """Tests for dropping boards on changes that could show on them."""
+
+    async def test_changes_below_cutoff_keep_board(self, rows: FakeRows) -> None:
+        """Test that users changing below 10th place don't drop the board."""
+        cache: LeaderboardCache = LeaderboardCache(ttl=60)
+        await cache.get("balance")
+
+        cache.note_change("nobody", "money", 100, 909)
+        cache.note_change("nobody", "prestige", 0, 5_000)
+        await cache.get("balance")
+
+        assert rows.builds == ["balance"]
+
+    @pytest.mark.parametrize(
+        ("name", "column", "old", "new"),
+        [
+            ("nobody", "money", 100, 910),  # Reaches 10th place.
+            ("user3", "money", 970, 960),  # Listed user moves.
+            ("user9", "name", "user9", "renamed"),  # Listed user renamed.
+            ("newbie", "money", None, 2_000),  # New user straight into the top.
+        ],
+    )
+    async def test_relevant_changes_drop_board(
+        self,
+        rows: FakeRows,
+        name: str,
+        column: str,
+        old: object,
+        new: object,
+    ) -> None:
+        """Test each kind of change that has to drop the board."""
+        cache: LeaderboardCache = LeaderboardCache(ttl=60)
+        await cache.get("balance")
+
+        cache.note_change(name, column, old, new)
+        await cache.get("balance")
+
+        assert rows.builds == ["balance", "balance"]
+
+    async def test_board_that_is_not_full_drops_on_any_change(self, rows: FakeRows) -> None:
+        """Test that any change can show on a board with fewer than 10 users."""
+        cache: LeaderboardCache = LeaderboardCache(ttl=60)
+        await cache.get("level")
+
+        cache.note_change("nobody", "level", 0, 1)
+        await cache.get("level")
+
+        assert rows.builds == ["level", "level"]
+
+    async def test_explicit_invalidation(self, rows: FakeRows) -> None:
+        """Test that invalidate() with no categories drops every board."""
+        cache: LeaderboardCache = LeaderboardCache(ttl=60)
+        await cache.get("balance")
+        await cache.get("level")
+
+        cache.invalidate()
+        await cache.get("balance")
+        await cache.get("level")
+
+        assert rows.builds == ["balance", "level", "balance", "level"]
+
+    async def test_follows_rankings(self, rows: FakeRows, tmp_path: Path) -> None:
+        """Test that changes reach the cache through Rankings listeners."""
+        db_path: Path = tmp_path / "users.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, money INTEGER)")
+            conn.execute("INSERT INTO users VALUES (1, 'nobody', 0)")
+        rankings: Rankings = Rankings(["money"])
+        rankings.load(db_path)
+        cache: LeaderboardCache = LeaderboardCache(ttl=60)
+        rankings.watch(cache.note_change)
+        await cache.get("balance")
+
+        rankings.update(1, "money", 5)
+        await cache.get("balance")
+        rankings.update(1, "money", 5_000)
+        await cache.get("balance")
+
+        assert rows.builds == ["balance", "balance"]
@@ -0,0 +1,71 @@
+"""Tests for utils/leveling.py."""
+
+from utils.leveling import (
+    LEVEL_TABLE_SIZE,
+    LEVEL_THRESHOLDS,
+    level_for_messages,
+    messages_for_level,
+)
+
+
+def slow_level_for_messages(message_count: int) -> int:
+    """Level up one step at a time, the way the bot used to.
+
+    Args:
+        message_count (int): Total messages sent.
+
+    Returns:
+        int: Level reached.
+    """
+    level: int = 0
+    while message_count >= messages_for_level(level):
+        level += 1
+    return level
+
+
+class TestMessagesForLevel:
+    """Tests for messages_for_level."""
+
+    def test_level_zero(self) -> None:
+        """Test that level 0 needs 100 messages to level up."""
+        assert messages_for_level(0) == 100  # noqa: PLR2004
+
+    def test_level_one(self) -> None:
+        """Test that level 1 needs 152 messages to level up."""
+        assert messages_for_level(1) == 152  # noqa: PLR2004
+
+    def test_table_matches_formula(self) -> None:
+        """Test that the precomputed table matches the formula."""
+        for level in range(LEVEL_TABLE_SIZE):
+            assert LEVEL_THRESHOLDS[level] == 2 * (level**2) + (50 * level) + 100
+
+    def test_beyond_table(self) -> None:
+        """Test that levels past the table still use the formula."""
+        level: int = LEVEL_TABLE_SIZE + 5
+        assert messages_for_level(level) == 2 * (level**2) + (50 * level) + 100
+
+
+class TestLevelForMessages:
+    """Tests for level_for_messages."""
+
+    def test_below_first_threshold(self) -> None:
+        """Test that fewer than 100 messages is level 0."""
+        assert level_for_messages(99) == 0
+
+    def test_exact_thresholds(self) -> None:
+        """Test that reaching a threshold exactly gives the next level."""
+        for level in range(50):
+            assert level_for_messages(messages_for_level(level)) == level + 1
+            assert level_for_messages(messages_for_level(level) - 1) == level
+
+    def test_matches_step_by_step(self) -> None:
+        """Test that the closed form agrees with leveling one step at a time."""
+        for message_count in range(0, 50_000, 7):
+            assert level_for_messages(message_count) == slow_level_for_messages(
+                message_count,
+            )
+
+    def test_huge_count(self) -> None:
+        """Test that very large counts land between the right thresholds."""
+        level: int = level_for_messages(10**12)
+        assert messages_for_level(level - 1) <= 10**12 < messages_for_level(level)
@@ -0,0 +1,128 @@
+"""Tests for utils/misc/message_counter.py."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+from user import User
+from utils.leveling import messages_for_level
+from utils.misc.message_counter import MessageCounter
+
+
+@pytest.fixture
+def db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Create a temporary users database with an empty cache."""
+    db_path: Path = tmp_path / "users.db"
+    monkeypatch.setattr("user.DB_PATH", db_path)
+    monkeypatch.setattr("user.USER_CACHE", {})
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                money INTEGER DEFAULT 0,
+                prestige INTEGER DEFAULT 0,
+                level INTEGER DEFAULT 0,
+                message_count INTEGER DEFAULT 0,
+                last_seen INTEGER DEFAULT 0
+            )
+            """,
+        )
+    return db_path
+
+
+@pytest.fixture
+def counter() -> MessageCounter:
+    """Return an empty message counter."""
+    return MessageCounter()
+
+
+def send(counter: MessageCounter, user_id: int, count: int) -> int:
+    """Simulate on_message for a number of messages.
+
+    Args:
+        counter (MessageCounter): Counter under test.
+        user_id (int): Discord user ID.
+        count (int): Number of messages.
+
+    Returns:
+        int: Number of level ups.
+    """
+    level_ups: int = 0
+    for _ in range(count):
+        if counter.add(user_id):
+            user: User = User.create_if_not_exists(user_id=user_id, username="karma")
+            level_ups += counter.settle(user)
+    return level_ups
+
+
+class TestAdd:
+    """Tests for counting messages."""
+
+    def test_first_message_needs_settling(self, counter: MessageCounter) -> None:
+        """Test that an unknown user has to be settled."""
+        assert counter.add(1)
+
+    def test_buffers_until_threshold(self, db: Path, counter: MessageCounter) -> None:  # noqa: ARG002
+        """Test that messages below the next threshold stay buffered."""
+        send(counter, 1, 1)
+        user: User = User.create_if_not_exists(user_id=1, username="karma")
+        for _ in range(messages_for_level(0) - 2):
+            assert not counter.add(1)
+        assert user.message_count == 1
+        assert counter.add(1)
+
+
+class TestSettle:
+    """Tests for level ups through the counter."""
+
+    def test_levels_up_on_threshold_message(self, db: Path, counter: MessageCounter) -> None:  # noqa: ARG002
+        """Test that the level up happens on exactly the threshold message."""
+        assert send(counter, 1, messages_for_level(0) - 1) == 0
+        assert send(counter, 1, 1) == 1
+        user: User = User.create_if_not_exists(user_id=1, username="karma")
+        assert user.level == 1
+        assert user.message_count == messages_for_level(0)
+
+    def test_apply_pending_updates_count(self, db: Path, counter: MessageCounter) -> None:  # noqa: ARG002
+        """Test that pending messages can be applied for display."""
+        send(counter, 1, 10)
+        user: User = User.create_if_not_exists(user_id=1, username="karma")
+        counter.apply_pending(user)
+        assert user.message_count == 10  # noqa: PLR2004
+
+    def test_level_up_not_missed_after_apply_pending(
+        self,
+        db: Path,  # noqa: ARG002
+        counter: MessageCounter,
+    ) -> None:
+        """Test that applying pending messages (e.g. for $profile) keeps headroom accurate."""
+        threshold: int = messages_for_level(0)
+        send(counter, 1, threshold - 2)
+        user: User = User.create_if_not_exists(user_id=1, username="karma")
+        counter.apply_pending(user)
+
+        assert send(counter, 1, 1) == 0
+        assert send(counter, 1, 1) == 1
+        assert user.level == 1
+
+
+class TestFlush:
+    """Tests for flushing buffered counts."""
+
+    def test_flush_moves_counts_onto_users(self, db: Path, counter: MessageCounter) -> None:  # noqa: ARG002
+        """Test that flushing applies every buffered count."""
+        send(counter, 1, 5)
+        send(counter, 2, 3)
+        assert counter.flush() == 2  # noqa: PLR2004
+        assert User.create_if_not_exists(user_id=1, username="").message_count == 5  # noqa: PLR2004
+        assert User.create_if_not_exists(user_id=2, username="").message_count == 3  # noqa: PLR2004
+        assert len(counter) == 0
+
+    def test_flush_forgets_headroom(self, db: Path, counter: MessageCounter) -> None:  # noqa: ARG002
+        """Test that the next message after a flush settles the user again."""
+        send(counter, 1, 2)
+        counter.flush()
+        assert counter.add(1)
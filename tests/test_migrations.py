@@ -0,0 +1,231 @@
+"""Tests for migrations.py."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+from migrations import (
+    USERS_INDEXES,
+    USERS_MIGRATIONS,
+    Migration,
+    add_column,
+    migrate,
+)
+
+
+def table_columns(db_path: Path, table: str) -> list[str]:
+    """Get the column names of a table."""
+    with sqlite3.connect(db_path) as conn:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def index_names(db_path: Path) -> set[str]:
+    """Get the names of every explicitly created index."""
+    with sqlite3.connect(db_path) as conn:
+        return {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL",
+            )
+        }
+
+
+def versions(db_path: Path) -> list[int]:
+    """Get the recorded schema versions."""
+    with sqlite3.connect(db_path) as conn:
+        return [
+            row[0] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")
+        ]
+
+
+class TestMigrate:
+    """Tests for applying migrations."""
+
+    def test_fresh_database(self, tmp_path: Path) -> None:
+        """Test that every migration is applied and recorded on a new database."""
+        db_path: Path = tmp_path / "users.db"
+        applied: int = migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+
+        assert applied == len(USERS_MIGRATIONS)
+        assert versions(db_path) == [migration.version for migration in USERS_MIGRATIONS]
+        assert "last_seen" in table_columns(db_path, "users")
+        assert table_columns(db_path, "user_stocks") == ["user_id", "stock_name", "quantity"]
+
+    def test_idempotent(self, tmp_path: Path) -> None:
+        """Test that running migrations again applies nothing."""
+        db_path: Path = tmp_path / "users.db"
+        migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+        assert migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES) == 0
+
+    def test_upgrades_untracked_database(self, tmp_path: Path) -> None:
+        """Test that a database made before migrations existed is upgraded in place."""
+        db_path: Path = tmp_path / "users.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE users (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    money REAL DEFAULT 0,
+                    prestige INTEGER DEFAULT 0,
+                    level INTEGER DEFAULT 0,
+                    message_count INTEGER DEFAULT 0
+                )
+                """,
+            )
+            conn.execute("INSERT INTO users (id, name, money) VALUES (1, 'karma', 42)")
+
+        migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+
+        with sqlite3.connect(db_path) as conn:
+            row: tuple = conn.execute("SELECT name, money, last_seen FROM users").fetchone()
+        assert row == ("karma", 4_200, 0)
+
+    def test_converts_money_to_cents(self, tmp_path: Path) -> None:
+        """Test that REAL dollar amounts become exact integer cents."""
+        db_path: Path = tmp_path / "users.db"
+        migrate(db_path, [m for m in USERS_MIGRATIONS if m.version < 5])  # noqa: PLR2004
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("INSERT INTO users (id, name, money) VALUES (1, 'karma', 1500.75)")
+            conn.execute("INSERT INTO users (id, name, money) VALUES (2, 'cuck', 0.1 + 0.2)")
+            conn.execute(
+                "INSERT INTO stock_prices VALUES ('Dizznem', 10.5, 10.0, '2024-01-01')",
+            )
+            conn.execute(
+                "INSERT INTO ledger (created_at, amount, reason) VALUES (0, 99.99, 'give')",
+            )
+
+        migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT id, money FROM users ORDER BY id").fetchall() == [
+                (1, 150_075),
+                (2, 30),
+            ]
+            assert conn.execute("SELECT price, open_price FROM stock_prices").fetchone() == (
+                1_050,
+                1_000,
+            )
+            assert conn.execute("SELECT amount FROM ledger").fetchone() == (9_999,)
+            assert conn.execute("SELECT typeof(money) FROM users LIMIT 1").fetchone() == (
+                "integer",
+            )
+        assert set(USERS_INDEXES) <= index_names(db_path)
+
+    def test_backfills_stock_value(self, tmp_path: Path) -> None:
+        """Test that stock_value starts out as each user's holdings at current prices."""
+        db_path: Path = tmp_path / "users.db"
+        migrate(db_path, [m for m in USERS_MIGRATIONS if m.version < 6])  # noqa: PLR2004
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany(
+                "INSERT INTO users (id, name, money) VALUES (?, ?, 0)",
+                [(1, "karma"), (2, "cuck")],
+            )
+            conn.executemany(
+                "INSERT INTO stock_prices VALUES (?, ?, ?, '')",
+                [("Dizznem", 10_00, 10_00), ("Karma", 5_00, 5_00)],
+            )
+            conn.executemany(
+                "INSERT INTO user_stocks VALUES (?, ?, ?)",
+                [(1, "Dizznem", 3), (1, "Karma", 2), (2, "Karma", 0)],
+            )
+
+        migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT id, stock_value FROM users ORDER BY id").fetchall() == [
+                (1, 3 * 10_00 + 2 * 5_00),
+                (2, 0),
+            ]
+
+    def test_applies_only_pending(self, tmp_path: Path) -> None:
+        """Test that only migrations newer than the recorded ones run."""
+        db_path: Path = tmp_path / "test.db"
+        migrate(db_path, [Migration(1, "create t", "CREATE TABLE t (a INTEGER)")])
+
+        applied: int = migrate(
+            db_path,
+            [
+                Migration(1, "create t", "CREATE TABLE t (a INTEGER)"),
+                Migration(2, "add b", add_column("t", "b", "TEXT")),
+            ],
+        )
+
+        assert applied == 1
+        assert table_columns(db_path, "t") == ["a", "b"]
+
+    def test_failure_rolls_back_everything(self, tmp_path: Path) -> None:
+        """Test that a failing migration leaves the database untouched."""
+        db_path: Path = tmp_path / "test.db"
+        migrations: list[Migration] = [
+            Migration(1, "create t", "CREATE TABLE t (a INTEGER)"),
+            Migration(2, "broken", "CREATE TABLE t (a INTEGER)"),
+        ]
+
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(db_path, migrations, {"idx_t_a": "t(a)"})
+
+        with sqlite3.connect(db_path) as conn:
+            tables: set[str] = {
+                row[0]
+                for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+        assert "t" not in tables
+        assert "schema_migrations" not in tables
+
+
+class TestIndexes:
+    """Tests for declarative index management."""
+
+    def test_creates_declared_indexes(self, tmp_path: Path) -> None:
+        """Test that every declared index exists after migrating."""
+        db_path: Path = tmp_path / "users.db"
+        migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+        assert set(USERS_INDEXES) <= index_names(db_path)
+
+    def test_leaderboard_uses_index(self, tmp_path: Path) -> None:
+        """Test that the balance leaderboard no longer scans the whole table."""
+        db_path: Path = tmp_path / "users.db"
+        migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+
+        with sqlite3.connect(db_path) as conn:
+            plan: str = " ".join(
+                row[-1]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT name, money FROM users ORDER BY money DESC LIMIT 10",
+                )
+            )
+        assert "idx_users_money" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_drops_undeclared_managed_indexes(self, tmp_path: Path) -> None:
+        """Test that managed indexes removed from the declaration are dropped."""
+        db_path: Path = tmp_path / "test.db"
+        migrations: list[Migration] = [Migration(1, "create t", "CREATE TABLE t (a, b)")]
+        migrate(db_path, migrations, {"idx_t_a": "t(a)"})
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE INDEX manual_t_b ON t(b)")
+
+        migrate(db_path, migrations, {})
+
+        assert index_names(db_path) == {"manual_t_b"}
+
+    def test_none_leaves_indexes_alone(self, tmp_path: Path) -> None:
+        """Test that migrating without declared indexes doesn't drop managed ones."""
+        db_path: Path = tmp_path / "users.db"
+        migrate(db_path, USERS_MIGRATIONS, USERS_INDEXES)
+
+        migrate(db_path, USERS_MIGRATIONS)
+
+        assert set(USERS_INDEXES) <= index_names(db_path)
+
+    def test_rebuilds_changed_definition(self, tmp_path: Path) -> None:
+        """Test that an index is rebuilt when its columns change."""
+        db_path: Path = tmp_path / "test.db"
+        migrations: list[Migration] = [Migration(1, "create t", "CREATE TABLE t (a, b)")]
+        migrate(db_path, migrations, {"idx_t": "t(a)"})
+        migrate(db_path, migrations, {"idx_t": "t(a, b)"})
+
+        with sqlite3.connect(db_path) as conn:
+            columns: list[str] = [row[2] for row in conn.execute("PRAGMA index_info(idx_t)")]
+        assert columns == ["a", "b"]
@@ -1,7 +1,14 @@
 """Tests for utils/numbers.py."""
 
 import pytest
-from utils.numbers import convert_money_str, format_duration, format_number
+from utils.numbers import (
+    MAX_MONEY,
+    clamp_money,
+    convert_money_str,
+    format_duration,
+    format_money,
+    format_number,
+)
 
 
 class TestFormatNumber:
@@ -36,36 +43,36 @@ class TestConvertMoneyStr:
     """Tests for convert_money_str function."""
 
     def test_plain_integer_string(self) -> None:
-        """Test that plain integer strings are converted correctly."""
-        assert convert_money_str("1000") == 1000.0  # noqa: PLR2004
+        """Test that plain integer strings are converted to cents."""
+        assert convert_money_str("1000") == 100_000  # noqa: PLR2004
 
     def test_plain_float_string(self) -> None:
-        """Test that plain float strings are converted correctly."""
-        assert convert_money_str("9.99") == 9.99  # noqa: PLR2004
+        """Test that decimal strings are converted to exact cents."""
+        assert convert_money_str("9.99") == 999  # noqa: PLR2004
 
     def test_dollar_sign_stripped(self) -> None:
         """Test that dollar signs are stripped correctly."""
-        assert convert_money_str("$500") == 500.0  # noqa: PLR2004
+        assert convert_money_str("$500") == 50_000  # noqa: PLR2004
 
     def test_commas_stripped(self) -> None:
         """Test that commas are stripped correctly."""
-        assert convert_money_str("1,000,000") == 1_000_000.0  # noqa: PLR2004
+        assert convert_money_str("1,000,000") == 100_000_000  # noqa: PLR2004
 
     def test_dollar_sign_and_commas(self) -> None:
         """Test that both dollar signs and commas are stripped correctly."""
-        assert convert_money_str("$1,500.75") == 1500.75  # noqa: PLR2004
+        assert convert_money_str("$1,500.75") == 150_075  # noqa: PLR2004
 
     def test_whitespace_stripped(self) -> None:
         """Test that whitespace is stripped correctly."""
-        assert convert_money_str("  100  ") == 100.0  # noqa: PLR2004
+        assert convert_money_str("  100  ") == 10_000  # noqa: PLR2004
 
     def test_int_passthrough(self) -> None:
         """Test that integers are passed through correctly."""
-        assert convert_money_str(500) == 500  # type: ignore[arg-type]  # noqa: PLR2004
+        assert convert_money_str(500) == 50_000  # type: ignore[arg-type]  # noqa: PLR2004
 
     def test_float_passthrough(self) -> None:
         """Test that floats are passed through correctly."""
-        assert convert_money_str(3.14) == 3.14  # type: ignore[arg-type]  # noqa: PLR2004
+        assert convert_money_str(3.14) == 314  # type: ignore[arg-type]  # noqa: PLR2004
 
     def test_invalid_string_raises(self) -> None:
         """Test that invalid strings raise a ValueError."""
@@ -77,6 +84,61 @@ class TestConvertMoneyStr:
         with pytest.raises(ValueError):  # noqa: PT011
             convert_money_str("")
 
+    def test_fractional_cents_round_half_up(self) -> None:
+        """Test that amounts below a cent are rounded half up."""
+        assert convert_money_str("0.005") == 1
+        assert convert_money_str("0.004") == 0
+
+    def test_non_finite_raises(self) -> None:
+        """Test that infinity and NaN are rejected."""
+        for value in ("inf", "nan"):
+            with pytest.raises(ValueError):  # noqa: PT011
+                convert_money_str(value)
+
+    def test_out_of_range_raises(self) -> None:
+        """Test that amounts too large to store are rejected rather than overflowing later."""
+        for value in ("1e20", "-1e20", str(2**63), 1e20):
+            with pytest.raises(ValueError, match="Invalid money value"):
+                convert_money_str(value)  # type: ignore[arg-type]
+
+    def test_max_money_accepted(self) -> None:
+        """Test that the largest storable amount still converts."""
+        assert convert_money_str(str(MAX_MONEY // 100)) == MAX_MONEY
+
+
+class TestClampMoney:
+    """Tests for clamp_money function."""
+
+    def test_in_range_unchanged(self) -> None:
+        """Test that ordinary amounts pass through."""
+        assert clamp_money(-500) == -500  # noqa: PLR2004
+
+    def test_caps_both_ways(self) -> None:
+        """Test that amounts past MAX_MONEY are capped to it."""
+        assert clamp_money(MAX_MONEY * 10) == MAX_MONEY
+        assert clamp_money(-MAX_MONEY * 10) == -MAX_MONEY
+
+
+class TestFormatMoney:
+    """Tests for format_money function."""
+
+    def test_whole_dollars(self) -> None:
+        """Test that whole dollar amounts drop the cents."""
+        assert format_money(1_000_000_00) == "1,000,000"
+
+    def test_cents(self) -> None:
+        """Test that non-zero cents are shown with two digits."""
+        assert format_money(150_075) == "1,500.75"
+        assert format_money(5) == "0.05"
+
+    def test_negative(self) -> None:
+        """Test that negative amounts keep their sign."""
+        assert format_money(-150) == "-1.50"
+
+    def test_exact_for_large_amounts(self) -> None:
+        """Test that amounts beyond float precision are formatted exactly."""
+        assert format_money(12_345_678_901_234_567_89) == "12,345,678,901,234,567.89"
+
 
 class TestFormatDuration:
     """Tests for format_duration function."""
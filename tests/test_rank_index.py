@@ -0,0 +1,97 @@
+"""Tests for utils/rank_index.py."""
+
+import random
+import sqlite3
+from pathlib import Path
+
+from utils.rank_index import RankIndex, Rankings
+
+
+def sql_rank(values: dict[int, int], user_id: int) -> int:
+    """Rank the way the SQL queries do, one plus the number of higher values."""
+    return 1 + sum(1 for value in values.values() if value > values[user_id])
+
+
+class TestRankIndex:
+    """Tests for RankIndex."""
+
+    def test_ranks_and_ties(self) -> None:
+        """Test that ties share a rank and the next rank skips past them."""
+        index: RankIndex = RankIndex()
+        index.build([(1, 50), (2, 80), (3, 50), (4, 10)])
+
+        assert [index.rank(user_id) for user_id in (1, 2, 3, 4)] == [2, 1, 2, 4]
+        assert index.rank(404) is None
+
+    def test_top(self) -> None:
+        """Test that the top list is highest first, ties by user ID."""
+        index: RankIndex = RankIndex()
+        index.build([(3, 50), (1, 50), (2, 80)])
+
+        assert index.top(2) == [(2, 80), (1, 50)]
+        assert index.top(10) == [(2, 80), (1, 50), (3, 50)]
+
+    def test_set_moves_and_adds(self) -> None:
+        """Test that setting a value moves the user, and adds unknown users."""
+        index: RankIndex = RankIndex()
+        index.build([(1, 10), (2, 20)])
+        index.set(1, 30)
+        index.set(3, 25)
+
+        assert index.top(3) == [(1, 30), (3, 25), (2, 20)]
+        assert len(index) == 3  # noqa: PLR2004
+
+    def test_discard(self) -> None:
+        """Test that a discarded user no longer counts towards anyone's rank."""
+        index: RankIndex = RankIndex()
+        index.build([(1, 10), (2, 20)])
+        index.discard(2)
+        index.discard(404)
+
+        assert index.rank(1) == 1
+        assert 2 not in index  # noqa: PLR2004
+
+    def test_matches_counting(self) -> None:
+        """Test ranks against counting after many random changes."""
+        rng: random.Random = random.Random(7)
+        values: dict[int, int] = {user_id: rng.randint(0, 50) for user_id in range(200)}
+        index: RankIndex = RankIndex()
+        index.build(values.items())
+
+        for _ in range(2_000):
+            user_id: int = rng.randrange(200)
+            values[user_id] = rng.randint(-10, 60)
+            index.set(user_id, values[user_id])
+
+        assert all(index.rank(user_id) == sql_rank(values, user_id) for user_id in values)
+        assert [value for _, value in index.top(20)] == sorted(values.values(), reverse=True)[:20]
+
+
+class TestRankings:
+    """Tests for Rankings."""
+
+    def test_load_and_update(self, tmp_path: Path) -> None:
+        """Test loading from users.db, then following changed columns and new users."""
+        db_path: Path = tmp_path / "users.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, money INTEGER)")
+            conn.executemany(
+                "INSERT INTO users VALUES (?, ?, ?)",
+                [(1, "karma", 5_00), (2, "cuck", 9_00)],
+            )
+        rankings: Rankings = Rankings(["money"])
+
+        rankings.update(1, "money", 99_00)
+        assert not rankings.covers(db_path)
+
+        rankings.load(db_path)
+        rankings.update(1, "money", 10_00)
+        rankings.update(2, "name", "so6")
+        rankings.update(404, "money", 1)
+        rankings.add(3, "dizznem", {"money": 7_00})
+        rankings.add(1, "karma", {"money": 0})
+
+        assert rankings.covers(db_path)
+        assert rankings.top("money", 10) == [("karma", 10_00), ("so6", 9_00), ("dizznem", 7_00)]
+        assert rankings.rank("money", 3) == 3  # noqa: PLR2004
+        assert rankings.rank("money", 404) is None
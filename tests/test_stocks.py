@@ -9,12 +9,17 @@ from utils.money.stocks import (
     DEFAULT_PRICES,
     STOCK_MAP,
     buy_stock,
+    buy_stock_async,
     ensure_stocks_tables,
+    find_stock_value_drift,
     get_all_prices,
     get_price,
     get_user_stocks,
+    get_user_stocks_async,
     is_market_open,
+    repair_stock_values,
     sell_stock,
+    update_prices,
 )
 
 if TYPE_CHECKING:
@@ -29,20 +34,6 @@ def db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
     monkeypatch.setattr("user.DB_PATH", db_path)
     monkeypatch.setattr("user.USER_CACHE", {})
 
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                money REAL DEFAULT 0,
-                prestige INTEGER DEFAULT 0,
-                level INTEGER DEFAULT 0,
-                message_count INTEGER DEFAULT 0
-            )
-            """,
-        )
-
     ensure_stocks_tables(db_path)
     return db_path
 
@@ -56,7 +47,7 @@ def funded_user(db: Path) -> tuple[Path, int, str]:
     with sqlite3.connect(db) as conn:
         conn.execute(
             "INSERT INTO users (id, name, money) VALUES (?, ?, ?)",
-            (user_id, username, 100_000.0),
+            (user_id, username, 100_000_00),
         )
 
     return db, user_id, username
@@ -85,7 +76,7 @@ class TestEnsureStocksTables:
 
     def test_seeds_default_prices(self, db: Path) -> None:
         """Test that default stock prices are seeded into the database."""
-        prices: list[tuple[str, float]] = get_all_prices(db)
+        prices: list[tuple[str, int]] = get_all_prices(db)
         names: list[str] = [p[0] for p in prices]
         for stock_name in DEFAULT_PRICES:
             assert stock_name in names
@@ -96,12 +87,12 @@ class TestGetPrice:
 
     def test_returns_price_for_valid_stock(self, db: Path) -> None:
         """Test that get_price returns a valid stock price."""
-        price: float | None = get_price(db, "Dizznem")
+        price: int | None = get_price(db, "Dizznem")
         assert price == DEFAULT_PRICES["Dizznem"]
 
     def test_returns_none_for_invalid_stock(self, db: Path) -> None:
         """Test that get_price returns None for an invalid stock."""
-        price: float | None = get_price(db, "FakeStock")
+        price: int | None = get_price(db, "FakeStock")
         assert price is None
 
 
@@ -110,12 +101,12 @@ class TestGetAllPrices:
 
     def test_returns_all_stocks(self, db: Path) -> None:
         """Test that get_all_prices returns every available stock."""
-        prices: list[tuple[str, float]] = get_all_prices(db)
+        prices: list[tuple[str, int]] = get_all_prices(db)
         assert len(prices) == len(DEFAULT_PRICES)
 
     def test_each_row_has_three_values(self, db: Path) -> None:
         """Test that each returned price row contains three values."""
-        prices: list[tuple[str, float]] = get_all_prices(db)
+        prices: list[tuple[str, int]] = get_all_prices(db)
         for row in prices:
             assert len(row) == 3  # noqa: PLR2004
 
@@ -157,7 +148,7 @@ class TestBuyStock:
         with sqlite3.connect(db) as conn:
             conn.execute(
                 "INSERT INTO users (id, name, money) VALUES (?, ?, ?)",
-                (1, "broke", 0.0),
+                (1, "broke", 0),
             )
         success, msg = buy_stock(db, 1, "broke", "Dizznem", 1)
         assert success is False
@@ -175,11 +166,21 @@ class TestBuyStock:
         from user import USER_CACHE  # noqa: PLC0415
 
         db, user_id, username = funded_user
-        price: float = get_price(db, "Dizznem")  # type: ignore[assignment]
+        price: int = get_price(db, "Dizznem")  # type: ignore[assignment]
         buy_stock(db, user_id, username, "Dizznem", 1)
 
         user: User = USER_CACHE[user_id]
-        assert user.money == pytest.approx(100_000.0 - price)
+        assert user.money == 100_000_00 - price
+
+
+    async def test_async_variant(self, funded_user: tuple) -> None:
+        """Test that buy_stock_async commits through the writer before returning."""
+        db, user_id, username = funded_user
+        success, _ = await buy_stock_async(db, user_id, username, "Dizznem", 2)
+        assert success is True
+        assert await get_user_stocks_async(db, user_id) == [
+            ("Dizznem", 2, DEFAULT_PRICES["Dizznem"] * 2),
+        ]
 
 
 class TestSellStock:
@@ -208,6 +209,66 @@ class TestSellStock:
         assert success is False
 
 
+def stock_value(db: Path, user_id: int) -> int:
+    """Read a user's stored stock value."""
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT stock_value FROM users WHERE id = ?", (user_id,)).fetchone()[0]
+
+
+class TestStockValue:
+    """Tests for keeping users.stock_value in step with holdings."""
+
+    def test_follows_trades(self, funded_user: tuple) -> None:
+        """Test that buying and selling move the stored value by the trade's value."""
+        db, user_id, username = funded_user
+        buy_stock(db, user_id, username, "Dizznem", 5)
+        buy_stock(db, user_id, username, "Karma", 2)
+        assert stock_value(db, user_id) == (
+            5 * DEFAULT_PRICES["Dizznem"] + 2 * DEFAULT_PRICES["Karma"]
+        )
+
+        sell_stock(db, user_id, username, "Dizznem", 5)
+        assert stock_value(db, user_id) == 2 * DEFAULT_PRICES["Karma"]
+
+    def test_failed_trade_changes_nothing(self, funded_user: tuple) -> None:
+        """Test that a rejected sale leaves the stored value alone."""
+        db, user_id, username = funded_user
+        sell_stock(db, user_id, username, "Dizznem", 1)
+        assert stock_value(db, user_id) == 0
+
+    def test_follows_price_changes(self, funded_user: tuple) -> None:
+        """Test that a price refresh revalues holders of changed stocks only."""
+        db, user_id, username = funded_user
+        buy_stock(db, user_id, username, "Dizznem", 4)
+        buy_stock(db, user_id, username, "Karma", 3)
+
+        update_prices(
+            db,
+            [
+                ("Dizznem", DEFAULT_PRICES["Dizznem"] + 2_50, DEFAULT_PRICES["Dizznem"]),
+                ("Karma", DEFAULT_PRICES["Karma"], DEFAULT_PRICES["Karma"]),
+            ],
+        )
+
+        assert stock_value(db, user_id) == (
+            4 * (DEFAULT_PRICES["Dizznem"] + 2_50) + 3 * DEFAULT_PRICES["Karma"]
+        )
+        assert find_stock_value_drift(db) == []
+
+    def test_drift_is_found_and_repaired(self, funded_user: tuple) -> None:
+        """Test that a stored value edited behind the code's back is reported and fixed."""
+        db, user_id, username = funded_user
+        buy_stock(db, user_id, username, "Dizznem", 2)
+        actual: int = 2 * DEFAULT_PRICES["Dizznem"]
+        with sqlite3.connect(db) as conn:
+            conn.execute("UPDATE users SET stock_value = 1 WHERE id = ?", (user_id,))
+
+        assert find_stock_value_drift(db) == [(user_id, 1, actual)]
+        assert repair_stock_values(db) == 1
+        assert stock_value(db, user_id) == actual
+        assert repair_stock_values(db) == 0
+
+
 class TestGetUserStocks:
     """Tests for get_user_stocks."""
 
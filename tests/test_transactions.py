@@ -0,0 +1,270 @@
+"""Tests for utils/money/transactions.py."""
+
+import asyncio
+import random
+import sqlite3
+from pathlib import Path
+
+import pytest
+from user import User
+from utils.money.stocks import (
+    DEFAULT_PRICES,
+    buy_stock_async,
+    ensure_stocks_tables,
+    find_stock_value_drift,
+    sell_stock_async,
+)
+from utils.money.transactions import (
+    USER_LOCKS,
+    adjust_balance,
+    lock_users,
+    prestige,
+    spend,
+    transact,
+    transfer,
+)
+
+STARTING_MONEY: int = 1_000_00
+
+
+@pytest.fixture
+def db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Create a fully migrated users.db with a fresh user cache."""
+    db_path: Path = tmp_path / "users.db"
+    monkeypatch.setattr("user.DB_PATH", db_path)
+    monkeypatch.setattr("user.USER_CACHE", {})
+    ensure_stocks_tables(db_path)
+    return db_path
+
+
+def make_users(count: int) -> list[User]:
+    """Create users with STARTING_MONEY each."""
+    users: list[User] = []
+    for user_id in range(1, count + 1):
+        user: User = User.create_if_not_exists(user_id=user_id, username=f"user{user_id}")
+        user.money = STARTING_MONEY
+        user.save()
+        users.append(user)
+    return users
+
+
+def ledger_rows(db_path: Path) -> list[tuple]:
+    """Get (from_user, to_user, amount, reason) for every ledger entry."""
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            "SELECT from_user, to_user, amount, reason FROM ledger ORDER BY id",
+        ).fetchall()
+
+
+def db_money(db_path: Path) -> dict[int, int]:
+    """Get every user's persisted balance."""
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute("SELECT id, money FROM users").fetchall())
+
+
+class TestLockUsers:
+    """Tests for lock_users."""
+
+    async def test_opposite_order_does_not_deadlock(self) -> None:
+        """Test that locking (a, b) and (b, a) concurrently always finishes."""
+
+        async def hold(*user_ids: int) -> None:
+            async with lock_users(*user_ids):
+                await asyncio.sleep(0)
+
+        await asyncio.wait_for(
+            asyncio.gather(*(hold(1, 2) if i % 2 else hold(2, 1) for i in range(100))),
+            timeout=5,
+        )
+
+    async def test_excludes_overlapping_transactions(self) -> None:
+        """Test that only one holder of a user's lock runs at a time."""
+        active: list[int] = []
+        overlaps: list[int] = []
+
+        async def hold() -> None:
+            async with lock_users(1):
+                active.append(1)
+                overlaps.append(len(active))
+                await asyncio.sleep(0)
+                active.pop()
+
+        await asyncio.gather(*(hold() for _ in range(20)))
+        assert max(overlaps) == 1
+
+    async def test_locks_are_released_and_dropped(self) -> None:
+        """Test that no lock outlives its transaction."""
+        async with lock_users(1, 2):
+            assert set(USER_LOCKS) == {1, 2}
+        assert not USER_LOCKS
+
+
+class TestTransfer:
+    """Tests for transfer."""
+
+    async def test_moves_money_and_records_ledger(self, db: Path) -> None:
+        """Test that a transfer changes both balances in memory and on disk."""
+        sender, recipient = make_users(2)
+
+        assert await transfer(db, sender, recipient, 250_00) is True
+
+        assert sender.money == 750_00  # noqa: PLR2004
+        assert recipient.money == 1_250_00  # noqa: PLR2004
+        assert db_money(db) == {1: 750_00, 2: 1_250_00}
+        assert ledger_rows(db) == [(1, 2, 250_00, "give")]
+
+    async def test_insufficient_funds(self, db: Path) -> None:
+        """Test that a transfer larger than the balance changes nothing."""
+        sender, recipient = make_users(2)
+
+        assert await transfer(db, sender, recipient, 5_000_00) is False
+
+        assert sender.money == STARTING_MONEY
+        assert recipient.money == STARTING_MONEY
+        assert ledger_rows(db) == []
+
+    async def test_concurrent_spends_cannot_double_spend(self, db: Path) -> None:
+        """Test that two purchases racing for the same money can't both succeed."""
+        (user,) = make_users(1)
+
+        results: list[bool] = await asyncio.gather(
+            spend(db, user, 600_00, "store"),
+            spend(db, user, 600_00, "store"),
+        )
+
+        assert sorted(results) == [False, True]
+        assert user.money == 400_00  # noqa: PLR2004
+        assert db_money(db)[1] == 400_00  # noqa: PLR2004
+
+    async def test_rejects_self_transfer(self, db: Path) -> None:
+        """Test that giving money to yourself can't create money."""
+        (user,) = make_users(1)
+
+        with pytest.raises(ValueError, match="themselves"):
+            await transfer(db, user, user, 100_00)
+
+        assert user.money == STARTING_MONEY
+        assert ledger_rows(db) == []
+
+    @pytest.mark.parametrize("amount", [0, -100_00])
+    async def test_rejects_non_positive_amount(self, db: Path, amount: int) -> None:
+        """Test that a zero or negative transfer can't pull money from the recipient."""
+        sender, recipient = make_users(2)
+
+        with pytest.raises(ValueError, match="positive"):
+            await transfer(db, sender, recipient, amount)
+
+        assert recipient.money == STARTING_MONEY
+
+    async def test_failed_body_changes_nothing(self, db: Path) -> None:
+        """Test that an error inside a transaction leaves memory and disk untouched."""
+        (user,) = make_users(1)
+
+        def broken(conn: sqlite3.Connection, balances: dict, user_id: int) -> tuple:
+            conn.execute("DELETE FROM stock_prices")
+            conn.execute("UPDATE users SET money = 0 WHERE id = ?", (user_id,))
+            raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            await transact(db, [user], broken, user.id)
+
+        assert user.money == STARTING_MONEY
+        assert db_money(db)[1] == STARTING_MONEY
+        with sqlite3.connect(db) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM stock_prices").fetchone()[0] == len(
+                DEFAULT_PRICES,
+            )
+
+
+class TestAdjustBalance:
+    """Tests for adjust_balance."""
+
+    async def test_waits_for_running_transaction(self, db: Path) -> None:
+        """Test that a gamble loss can't spend money a running purchase already took."""
+        (user,) = make_users(1)
+
+        results: list[bool] = await asyncio.gather(
+            spend(db, user, STARTING_MONEY, "store"),
+            adjust_balance(user, -STARTING_MONEY, minimum=STARTING_MONEY),
+        )
+
+        assert results == [True, False]
+        assert user.money == 0
+        assert db_money(db)[1] == 0
+
+    async def test_applies_when_affordable(self, db: Path) -> None:  # noqa: ARG002
+        """Test that the change is applied when the balance covers the minimum."""
+        (user,) = make_users(1)
+
+        assert await adjust_balance(user, 50_00, minimum=STARTING_MONEY) is True
+        assert user.money == STARTING_MONEY + 50_00
+
+
+class TestPrestige:
+    """Tests for prestige."""
+
+    async def test_resets_money_and_stocks(self, db: Path) -> None:
+        """Test that prestiging zeroes money, wipes stocks and bumps prestige."""
+        (user,) = make_users(1)
+        await buy_stock_async(db, user.id, user.name, "Dizznem", 3)
+
+        assert await prestige(db, user, 100_00) is True
+
+        assert user.money == 0
+        assert user.prestige == 1
+        assert db_money(db)[1] == 0
+        with sqlite3.connect(db) as conn:
+            assert conn.execute(
+                "SELECT prestige, stock_value FROM users WHERE id = 1",
+            ).fetchone() == (1, 0)
+        with sqlite3.connect(db) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM user_stocks").fetchone()[0] == 0
+
+    async def test_requires_cost(self, db: Path) -> None:
+        """Test that prestige fails below the required balance."""
+        (user,) = make_users(1)
+        assert await prestige(db, user, STARTING_MONEY + 1) is False
+        assert user.prestige == 0
+
+
+class TestStress:
+    """Fire thousands of concurrent transactions and check nothing is created or lost."""
+
+    async def test_totals_are_conserved(self, db: Path) -> None:
+        """Test that money plus stock value is conserved and never goes negative."""
+        users: list[User] = make_users(25)
+        rng: random.Random = random.Random(1234)
+        stocks: list[str] = list(DEFAULT_PRICES)
+
+        operations: list = []
+        for _ in range(3_000):
+            sender, recipient = rng.sample(users, 2)
+            operations.append(transfer(db, sender, recipient, rng.randint(1, 400_00)))
+        for _ in range(1_000):
+            user: User = rng.choice(users)
+            stock: str = rng.choice(stocks)
+            trade = buy_stock_async if rng.random() < 0.6 else sell_stock_async  # noqa: PLR2004
+            operations.append(trade(db, user.id, user.name, stock, rng.randint(1, 10)))
+        rng.shuffle(operations)
+
+        results: list = await asyncio.gather(*operations)
+
+        with sqlite3.connect(db) as conn:
+            holdings: list[tuple[str, int]] = conn.execute(
+                "SELECT stock_name, quantity FROM user_stocks",
+            ).fetchall()
+        stock_value: int = sum(DEFAULT_PRICES[name] * qty for name, qty in holdings)
+        cash: int = sum(user.money for user in users)
+
+        assert cash + stock_value == STARTING_MONEY * len(users)
+        assert all(user.money >= 0 for user in users)
+        assert all(qty >= 0 for _, qty in holdings)
+        assert find_stock_value_drift(db) == []
+
+        persisted: dict[int, int] = db_money(db)
+        for user in users:
+            assert persisted[user.id] == user.money
+
+        succeeded: int = sum(1 for r in results if r is True or (isinstance(r, tuple) and r[0]))
+        assert len(ledger_rows(db)) == succeeded
+        assert not USER_LOCKS
@@ -0,0 +1,133 @@
+"""Tests for utils/misc/triggers.py."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+from utils.misc import triggers
+from utils.misc.triggers import TRIGGERS_PATH, TriggerMatcher, compile_triggers, load_triggers
+
+
+def write_triggers(path: Path, entries: list[dict[str, Any]], mtime_ns: int | None = None) -> None:
+    """Write a trigger file, optionally with an explicit modification time."""
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+    """Create a small trigger file."""
+    trigger_path: Path = tmp_path / "triggers.json"
+    write_triggers(
+        trigger_path,
+        [
+            {"trigger": "wackdiff", "response": "cuckdiff*"},
+            {"trigger": "wack", "response": "cuck*"},
+            {"trigger": "Good Bot", "response": "Thank you!"},
+        ],
+        mtime_ns=1_000_000_000,
+    )
+    return trigger_path
+
+
+class TestMatch:
+    """Tests for TriggerMatcher.match."""
+
+    def test_priority_beats_position(self, path: Path) -> None:
+        """Test that the earliest trigger in the file wins wherever it appears."""
+        matcher: TriggerMatcher = TriggerMatcher(path)
+
+        assert matcher.match("wack then wackdiff") == ("wackdiff", "cuckdiff*")
+        assert matcher.match("just wack") == ("wack", "cuck*")
+
+    def test_triggers_are_lowercased(self, path: Path) -> None:
+        """Test that triggers match lowercased content whatever their case in the file."""
+        assert TriggerMatcher(path).match("good bot") == ("good bot", "Thank you!")
+
+    def test_no_match(self, path: Path) -> None:
+        """Test that a message without triggers gets no reply."""
+        assert TriggerMatcher(path).match("hello there") is None
+
+    def test_shipped_triggers(self) -> None:
+        """Test that the bundled trigger file loads and keeps wackdiff ahead of wack."""
+        matcher: TriggerMatcher = TriggerMatcher(TRIGGERS_PATH)
+
+        assert len(matcher.triggers) > 10  # noqa: PLR2004
+        assert matcher.match("that was a wackdiff") == ("wackdiff", "cuckdiff*")
+
+
+class TestCompileTriggers:
+    """Tests for compile_triggers."""
+
+    def test_skips_disabled(self) -> None:
+        """Test that disabled entries never match."""
+        compiled = compile_triggers(
+            [
+                {"trigger": "gay", "response": "ally", "enabled": False},
+                {"trigger": "a", "response": "b"},
+            ],
+        )
+        assert compiled == (("a", "b"),)
+
+    def test_drops_shadowed_triggers(self) -> None:
+        """Test that a trigger containing an earlier one is dropped, since it can't win."""
+        compiled = compile_triggers(
+            [{"trigger": "wack", "response": "1"}, {"trigger": "wackdiff", "response": "2"}],
+        )
+        assert compiled == (("wack", "1"),)
+
+    @pytest.mark.parametrize(
+        "entry",
+        [{"trigger": "", "response": "x"}, {"trigger": "x"}, {"response": "x"}],
+    )
+    def test_invalid_entry_raises(self, entry: dict[str, Any]) -> None:
+        """Test that entries without a trigger or response are rejected."""
+        with pytest.raises(ValueError, match="Invalid trigger entry"):
+            compile_triggers([entry])
+
+    def test_file_must_be_a_list(self, tmp_path: Path) -> None:
+        """Test that a trigger file holding anything but a list is rejected."""
+        path: Path = tmp_path / "triggers.json"
+        path.write_text('{"trigger": "a"}', encoding="utf-8")
+
+        with pytest.raises(ValueError, match="list of triggers"):
+            load_triggers(path)
+
+
+class TestReload:
+    """Tests for reloading the trigger file."""
+
+    def test_reloads_changed_file(self, path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that edits to the file are picked up without a restart."""
+        monkeypatch.setattr(triggers, "RELOAD_INTERVAL", 0)
+        matcher: TriggerMatcher = TriggerMatcher(path)
+
+        write_triggers(path, [{"trigger": "cook", "response": "We need to cook."}], 2_000_000_000)
+
+        assert matcher.match("let him cook") == ("cook", "We need to cook.")
+        assert matcher.match("wack") is None
+
+    def test_checks_are_throttled(self, path: Path) -> None:
+        """Test that the file isn't checked again within RELOAD_INTERVAL."""
+        matcher: TriggerMatcher = TriggerMatcher(path)
+
+        write_triggers(path, [{"trigger": "cook", "response": "We need to cook."}], 2_000_000_000)
+
+        assert matcher.match("let him cook") is None
+
+    def test_invalid_file_keeps_triggers(
+        self,
+        path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a broken edit keeps the last good triggers."""
+        monkeypatch.setattr(triggers, "RELOAD_INTERVAL", 0)
+        matcher: TriggerMatcher = TriggerMatcher(path)
+
+        path.write_text("[{", encoding="utf-8")
+        os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+
+        assert matcher.match("wack") == ("wack", "cuck*")
@@ -1,11 +1,24 @@
 """Tests for user.py."""
 
+import asyncio
 import sqlite3
 from pathlib import Path
 from typing import Any
 
 import pytest
-from user import User
+import user as user_module
+from user import (
+    ESTIMATED_USER_BYTES,
+    USER_COLUMNS,
+    User,
+    UserCache,
+    autosave,
+    collect_dirty_rows,
+    preload_users,
+    update_sql,
+    write_user_rows,
+)
+from utils.numbers import MAX_MONEY
 
 
 @pytest.fixture
@@ -22,10 +35,11 @@ def db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY,
                 name TEXT NOT NULL,
-                money REAL DEFAULT 0,
+                money INTEGER DEFAULT 0,
                 prestige INTEGER DEFAULT 0,
                 level INTEGER DEFAULT 0,
-                message_count INTEGER DEFAULT 0
+                message_count INTEGER DEFAULT 0,
+                last_seen INTEGER DEFAULT 0
             )
             """,
         )
@@ -48,7 +62,7 @@ class TestUserCreation:
 
     def test_default_money_is_zero(self, user: User) -> None:
         """Test that new users start with zero money."""
-        assert user.money == 0.0
+        assert user.money == 0
 
     def test_default_level_is_zero(self, user: User) -> None:
         """Test that a new user starts at level zero."""
@@ -68,6 +82,51 @@ class TestUserCreation:
         assert user is same_user
 
 
+class TestAsyncUserCreation:
+    """Tests for create_if_not_exists_async."""
+
+    async def test_inserts_through_writer(
+        self,
+        db: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a new user is inserted by the writer thread and persisted."""
+        writes: list[str] = []
+        run_write: Any = user_module.run_write
+
+        async def recording_run_write(db_path: Path, fn: Any, *args: Any) -> Any:
+            writes.append(fn.__name__)
+            return await run_write(db_path, fn, *args)
+
+        monkeypatch.setattr("user.run_write", recording_run_write)
+
+        user: User = await User.create_if_not_exists_async(user_id=7, username="karma")
+
+        assert writes == ["insert_user_row"]
+        assert user.name == "karma"
+        with sqlite3.connect(db) as conn:
+            assert conn.execute("SELECT name FROM users WHERE id = 7").fetchone() == ("karma",)
+
+    async def test_existing_user_is_not_inserted(self, db: Path) -> None:
+        """Test that a user already in the database is loaded as is."""
+        with sqlite3.connect(db) as conn:
+            conn.execute("INSERT INTO users (id, name, money) VALUES (7, 'old', 500)")
+
+        user: User = await User.create_if_not_exists_async(user_id=7, username="new")
+
+        assert user.name == "old"
+        assert user.money == 500  # noqa: PLR2004
+
+    async def test_concurrent_calls_share_one_user(self, db: Path) -> None:  # noqa: ARG002
+        """Test that racing lookups for a new user end up with a single cached object."""
+        users: list[User] = await asyncio.gather(
+            *(User.create_if_not_exists_async(user_id=7, username="karma") for _ in range(5)),
+        )
+
+        assert all(user is users[0] for user in users)
+        assert User.create_if_not_exists(user_id=7, username="karma") is users[0]
+
+
 class TestDirtyTracking:
     """Tests for User dirty tracking behavior."""
 
@@ -97,6 +156,32 @@ class TestDirtyTracking:
         assert not user.dirty
 
 
+class TestPartialSave:
+    """Tests for only writing changed columns."""
+
+    def test_update_sql_only_sets_changed_columns(self) -> None:
+        """Test that the UPDATE statement is limited to the dirty columns."""
+        mask: int = 1 << USER_COLUMNS.index("message_count")
+        assert update_sql(mask) == "UPDATE users SET message_count = ? WHERE id = ?"
+
+    def test_save_leaves_other_columns_alone(self, db: Path, user: User) -> None:
+        """Test that saving one column doesn't overwrite another changed in the db."""
+        with sqlite3.connect(db) as conn:
+            conn.execute("UPDATE users SET prestige = 9 WHERE id = 1")
+        user.message_count += 1
+        user.save()
+
+        with sqlite3.connect(db) as conn:
+            row: Any = conn.execute(
+                "SELECT prestige, message_count FROM users WHERE id = 1",
+            ).fetchone()
+        assert row == (9, 1)
+
+    def test_user_has_no_instance_dict(self, user: User) -> None:
+        """Test that users are slotted."""
+        assert not hasattr(user, "__dict__")
+
+
 class TestLevelUp:
     """Tests for user level-up behavior."""
 
@@ -127,6 +212,20 @@ class TestLevelUp:
         user.level_up_if_able()
         assert user.level == 1
 
+    def test_jumps_multiple_levels(self, user: User) -> None:
+        """Test that a backfilled message count jumps straight to the right level."""
+        # 2*(9^2) + 50*9 + 100 = 712 messages reaches level 10
+        user.message_count = 712
+        assert user.level_up_if_able()
+        assert user.level == 10  # noqa: PLR2004
+
+    def test_never_levels_down(self, user: User) -> None:
+        """Test that a level above the message count is kept."""
+        user.level = 5
+        user.message_count = 0
+        assert not user.level_up_if_able()
+        assert user.level == 5  # noqa: PLR2004
+
     def test_required_messages_formula(self) -> None:
         """Test that the required message formula returns positive values."""
         for level in range(5):
@@ -139,12 +238,12 @@ class TestSave:
 
     def test_save_persists_money(self, db: Path, user: User) -> None:
         """Test that saving updates the user's money in the database."""
-        user.money = 99999.0
+        user.money = 99_999
         user.save()
 
         with sqlite3.connect(db) as conn:
             row: Any = conn.execute("SELECT money FROM users WHERE id = 1").fetchone()
-        assert row[0] == 99999.0  # noqa: PLR2004
+        assert row[0] == 99_999  # noqa: PLR2004
 
     def test_save_persists_level(self, db: Path, user: User) -> None:
         """Test that saving updates the user's level in the database."""
@@ -163,3 +262,236 @@ class TestSave:
         with sqlite3.connect(db) as conn:
             row: Any = conn.execute("SELECT prestige FROM users WHERE id = 1").fetchone()
         assert row[0] == 3  # noqa: PLR2004
+
+
+class TestBatchSave:
+    """Tests for batched saving of dirty users."""
+
+    def test_collect_dirty_rows_clears_dirty(self, user: User) -> None:
+        """Test that collecting rows returns dirty users and clears their flag."""
+        user.money = 500
+        dirty_users, batches = collect_dirty_rows()
+        assert dirty_users == [(user, 1 << USER_COLUMNS.index("money"))]
+        assert batches == {1 << USER_COLUMNS.index("money"): [(500, 1)]}
+        assert not user.dirty
+
+    def test_collect_skips_clean_users(self, user: User) -> None:  # noqa: ARG002
+        """Test that clean users aren't written."""
+        _, batches = collect_dirty_rows()
+        assert batches == {}
+
+    def test_groups_by_changed_columns(self, db: Path) -> None:  # noqa: ARG002
+        """Test that users with the same changed columns share one batch."""
+        first: User = User.create_if_not_exists(user_id=1, username="karma")
+        second: User = User.create_if_not_exists(user_id=2, username="dizznem")
+        first.message_count += 1
+        second.message_count += 1
+        _, batches = collect_dirty_rows()
+        assert list(batches.values()) == [[(1, 1), (1, 2)]]
+
+    def test_write_user_rows_persists(self, db: Path) -> None:
+        """Test that several users are written in one call."""
+        first: User = User.create_if_not_exists(user_id=1, username="karma")
+        second: User = User.create_if_not_exists(user_id=2, username="dizznem")
+        first.money = 1_000
+        second.message_count = 42
+        _, batches = collect_dirty_rows()
+        write_user_rows(batches)
+
+        with sqlite3.connect(db) as conn:
+            saved: list[Any] = conn.execute(
+                "SELECT money, message_count FROM users ORDER BY id",
+            ).fetchall()
+        assert saved == [(1_000, 0), (0, 42)]
+
+    async def test_autosave_flushes_off_loop(
+        self,
+        db: Path,
+        user: User,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that the autosave task flushes dirty users."""
+        monkeypatch.setattr("user.SAVE_INTERVAL", 0)
+        user.money = 12_300
+
+        task: asyncio.Task = asyncio.create_task(autosave())
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            with sqlite3.connect(db) as conn:
+                money: int = conn.execute(
+                    "SELECT money FROM users WHERE id = 1",
+                ).fetchone()[0]
+            if money == 12_300:  # noqa: PLR2004
+                break
+        task.cancel()
+
+        assert money == 12_300  # noqa: PLR2004
+        assert not user.dirty
+
+    async def test_autosave_survives_overflow(
+        self,
+        user: User,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a value SQLite can't store keeps the user dirty instead of killing autosave."""
+        monkeypatch.setattr("user.SAVE_INTERVAL", 0)
+        calls: list[Any] = []
+
+        def overflowing_write(batches: Any) -> None:
+            calls.append(batches)
+            raise OverflowError
+
+        monkeypatch.setattr("user.write_user_rows", overflowing_write)
+        user.money = 12_300
+
+        task: asyncio.Task = asyncio.create_task(autosave())
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if len(calls) > 1:
+                break
+
+        assert not task.done()
+        task.cancel()
+        # The failed user was marked dirty again, so the next round retried it.
+        assert len(calls) > 1
+        assert calls[1] == calls[0]
+
+
+class TestMoneyLimit:
+    """Tests for keeping money within what can be stored."""
+
+    def test_overflowing_balance_is_clamped(self, db: Path, user: User) -> None:
+        """Test that a balance past MAX_MONEY is capped and still saves."""
+        user.money = MAX_MONEY
+        user.money *= 10
+        user.save()
+
+        assert user.money == MAX_MONEY
+        with sqlite3.connect(db) as conn:
+            assert conn.execute("SELECT money FROM users WHERE id = 1").fetchone() == (MAX_MONEY,)
+
+    def test_negative_balance_is_clamped(self, user: User) -> None:
+        """Test that a huge loss is capped the other way."""
+        user.money = -(10**20)
+        assert user.money == -MAX_MONEY
+
+
+class TestUserCache:
+    """Tests for the bounded LRU user cache."""
+
+    @pytest.fixture
+    def cache(self, db: Path, monkeypatch: pytest.MonkeyPatch) -> UserCache:  # noqa: ARG002
+        """Install a two-user cache."""
+        cache: UserCache = UserCache(max_users=2)
+        monkeypatch.setattr("user.USER_CACHE", cache)
+        return cache
+
+    def test_evicts_least_recently_used(self, cache: UserCache) -> None:
+        """Test that the oldest untouched user is evicted first."""
+        User.create_if_not_exists(user_id=1, username="a")
+        User.create_if_not_exists(user_id=2, username="b")
+        User.create_if_not_exists(user_id=1, username="a")
+        User.create_if_not_exists(user_id=3, username="c")
+        assert list(cache) == [1, 3]
+        assert cache.evictions == 1
+
+    def test_dirty_user_written_back_after_eviction(self, db: Path, cache: UserCache) -> None:
+        """Test that an evicted dirty user is still flushed by autosave."""
+        user: User = User.create_if_not_exists(user_id=1, username="a")
+        user.money = 5_000
+        del user
+        User.create_if_not_exists(user_id=2, username="b")
+        User.create_if_not_exists(user_id=3, username="c")
+        assert 1 not in cache
+
+        _, batches = collect_dirty_rows()
+        write_user_rows(batches)
+        with sqlite3.connect(db) as conn:
+            money: int = conn.execute("SELECT money FROM users WHERE id = 1").fetchone()[0]
+        assert money == 5_000  # noqa: PLR2004
+        assert cache.stats()["pending_write_back"] == 1
+        cache.values()
+        assert cache.stats()["pending_write_back"] == 0
+
+    def test_held_user_keeps_identity(self, cache: UserCache) -> None:  # noqa: ARG002
+        """Test that an evicted user still referenced elsewhere isn't loaded twice."""
+        held: User = User.create_if_not_exists(user_id=1, username="a")
+        User.create_if_not_exists(user_id=2, username="b")
+        User.create_if_not_exists(user_id=3, username="c")
+        assert User.create_if_not_exists(user_id=1, username="a") is held
+
+    def test_changing_evicted_user_readmits_it(self, cache: UserCache) -> None:
+        """Test that changing an evicted user puts it back in the cache."""
+        held: User = User.create_if_not_exists(user_id=1, username="a")
+        User.create_if_not_exists(user_id=2, username="b")
+        User.create_if_not_exists(user_id=3, username="c")
+        held.money += 10
+        assert 1 in cache
+        assert held in cache.values()
+
+    def test_counts_hits_and_misses(self, cache: UserCache) -> None:
+        """Test that lookups are counted."""
+        User.create_if_not_exists(user_id=1, username="a")
+        User.create_if_not_exists(user_id=1, username="a")
+        stats: dict[str, int | float] = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5  # noqa: PLR2004
+
+    def test_resize_evicts(self, cache: UserCache) -> None:
+        """Test that shrinking the cache evicts users."""
+        User.create_if_not_exists(user_id=1, username="a")
+        User.create_if_not_exists(user_id=2, username="b")
+        cache.resize(1)
+        assert list(cache) == [2]
+
+
+class TestPreload:
+    """Tests for warming the cache on startup."""
+
+    @pytest.fixture
+    def populated(self, db: Path, monkeypatch: pytest.MonkeyPatch) -> UserCache:
+        """Insert users with increasing last_seen and install an empty cache."""
+        with sqlite3.connect(db) as conn:
+            conn.executemany(
+                "INSERT INTO users (id, name, last_seen) VALUES (?, ?, ?)",
+                [(i, f"user{i}", i * 100) for i in range(1, 11)],
+            )
+        cache: UserCache = UserCache(max_users=100)
+        monkeypatch.setattr("user.USER_CACHE", cache)
+        return cache
+
+    async def test_loads_most_recently_active(self, populated: UserCache) -> None:
+        """Test that the most recently active users are loaded."""
+        loaded: int = await preload_users(limit=3, max_bytes=10**9)
+        assert loaded == 3  # noqa: PLR2004
+        assert set(populated) == {8, 9, 10}
+        assert list(populated)[-1] == 10  # noqa: PLR2004
+
+    async def test_respects_memory_budget(self, populated: UserCache) -> None:
+        """Test that the memory budget caps how many users are loaded."""
+        loaded: int = await preload_users(limit=10, max_bytes=2 * ESTIMATED_USER_BYTES)
+        assert loaded == 2  # noqa: PLR2004
+        assert len(populated) == 2  # noqa: PLR2004
+
+    async def test_preloaded_users_are_clean(self, populated: UserCache) -> None:
+        """Test that preloading doesn't schedule any writes."""
+        await preload_users(limit=10, max_bytes=10**9)
+        assert not any(user.dirty for user in populated.values())
+
+
+class TestTouch:
+    """Tests for last_seen tracking."""
+
+    def test_touch_sets_last_seen(self, user: User) -> None:
+        """Test that touching a user records the current time."""
+        user.touch()
+        assert user.last_seen > 0
+        assert user.dirty
+
+    def test_touch_is_coarse(self, user: User) -> None:
+        """Test that touching again within the resolution doesn't change anything."""
+        user.touch()
+        user.dirty = False
+        user.touch()
+        assert not user.dirty